@@ -0,0 +1,78 @@
+"""Load historical exchange rates from a local JSON or CSV dump.
+
+JSON: ``{"2025-01-31": {"USD": 0.0011, ...}, ...}`` or a list of
+``{"date": "2025-01-31", "rates": {...}}`` (the exchangerate-api.com shape).
+CSV: ``date,currency,rate`` rows, or a ``date`` column plus one column per
+currency. Rates are units per ``--base`` (default AOA); other bases are
+converted through the dump's AOA rate. Days are upserted in batches, so
+re-running a dump overwrites rather than duplicates.
+"""
+import csv
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from currency import rates
+
+DAYS_PER_BATCH = 100
+
+
+def _read_json(handle) -> dict:
+    data = json.load(handle)
+    if isinstance(data, list):
+        return {entry['date']: entry['rates'] for entry in data}
+    return data
+
+
+def _read_csv(handle) -> dict:
+    days = {}
+    reader = csv.DictReader(handle)
+    for row in reader:
+        if 'currency' in row:
+            days.setdefault(row['date'], {})[row['currency'].upper()] = row['rate']
+        else:
+            days.setdefault(row['date'], {}).update(
+                {code.upper(): value for code, value in row.items() if code != 'date' and value}
+            )
+    return days
+
+
+class Command(BaseCommand):
+    help = "Backfill daily exchange rates from a JSON or CSV dump"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--base', default=rates.BASE_CURRENCY, help="Currency the dump's rates are quoted against")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        base = options['base'].upper()
+        try:
+            with path.open(newline='') as handle:
+                days = _read_csv(handle) if path.suffix.lower() == '.csv' else _read_json(handle)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            raise CommandError(f"Could not read {path}: {exc}") from exc
+
+        parsed = {}
+        for day, day_rates in days.items():
+            try:
+                day_rates = {code.upper(): Decimal(str(rate)) for code, rate in day_rates.items()}
+                non_finite = sorted(code for code, rate in day_rates.items() if not rate.is_finite())
+                if non_finite:
+                    raise CommandError(f"Non-finite rates for {day}: {', '.join(non_finite)}")
+                if base != rates.BASE_CURRENCY:
+                    # units per AOA = units per base / AOA per base
+                    per_base = day_rates[rates.BASE_CURRENCY]
+                    day_rates = {code: rate / per_base for code, rate in day_rates.items()}
+                parsed[date.fromisoformat(day)] = day_rates
+            except (InvalidOperation, KeyError, ValueError, ZeroDivisionError) as exc:
+                raise CommandError(f"Invalid rates for {day}: {exc!r}") from exc
+
+        stored = 0
+        ordered = sorted(parsed)
+        for offset in range(0, len(ordered), DAYS_PER_BATCH):
+            stored += rates.store({day: parsed[day] for day in ordered[offset:offset + DAYS_PER_BATCH]})
+        self.stdout.write(self.style.SUCCESS(f"Stored {stored} rates over {len(parsed)} days"))
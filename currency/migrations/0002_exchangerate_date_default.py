@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:13
+
+import currency.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('currency', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exchangerate',
+            name='date',
+            field=models.DateField(db_index=True, default=currency.models.today),
+        ),
+    ]
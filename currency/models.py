@@ -3,13 +3,19 @@ from django.db import models
 from django.utils import timezone
 from datetime import timedelta
 
+
+def today():
+    """Today's date as every rate read and ``refresh`` see it (``timezone.now().date()``)."""
+    return timezone.now().date()
+
+
 class ExchangeRate(models.Model):
     """Store daily exchange rates for currency conversion"""
     
     base_currency = models.CharField(max_length=3, default='AOA')  # Base currency (Angolan Kwanza)
     target_currency = models.CharField(max_length=3, db_index=True)  # Target currency code
     rate = models.DecimalField(max_digits=18, decimal_places=6)  # Exchange rate
-    date = models.DateField(auto_now_add=True, db_index=True)  # Rate date
+    date = models.DateField(default=today, db_index=True)  # Rate date (past days when backfilled)
     last_updated = models.DateTimeField(auto_now=True)
     
     class Meta:
@@ -0,0 +1,254 @@
+"""Process-wide exchange-rate table.
+
+``current_table`` loads the latest stored rate of every currency to and from
+the AOA base (falling back up to 7 days, as ``ExchangeRate.get_latest_rate``
+does) in one query. It then derives every pair through AOA, the same way
+``convert_currency`` always chained conversions. Each process keeps the
+table until the ``currency`` version or the day changes, or the
+database holds newer rates (checked every ``CURRENCY_TABLE_CHECK_SECONDS``,
+default 60). Conversions and the rates endpoint never query per currency.
+
+Rates are fetched by ``refresh``, which runs from the scheduled
+``currency.tasks.refresh_exchange_rates`` job (``CURRENCY_REFRESH_INTERVAL``
+seconds, default 6 hours) and the admin update endpoint, never from user
+requests. ``CURRENCY_RATE_PROVIDER`` is the dotted path of the rate source:
+exchangerate-api.com by default, or ``FixtureProvider`` offline and in tests.
+
+``store`` upserts any number of days with one ``bulk_create`` per batch. The
+refresh and the ``backfill_exchange_rates`` command both use it. The daily
+``ExchangeRate`` rows are the history, and ``history`` returns them as
+columnar series for charts.
+"""
+import logging
+import threading
+import time
+from datetime import timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+import requests
+from django.conf import settings
+from django.db.models import Max, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from kudya_platform import versions
+
+logger = logging.getLogger(__name__)
+
+SCOPE = "currency"
+BASE_CURRENCY = 'AOA'  # Angolan Kwanza as base
+SUPPORTED_CURRENCIES = [
+    'USD', 'EUR', 'GBP', 'AOA', 'BRL', 'ZAR', 'NGN', 'KES', 'GHS', 'EGP',
+    'MZN', 'CVE', 'XOF', 'STN', 'XAF', 'ZWL', 'BWP', 'NAD', 'ZMW'
+]
+FALLBACK_DAYS = 7
+CENT = Decimal('0.01')
+RATE_PLACES = Decimal('0.000001')  # ExchangeRate.rate precision
+BATCH_SIZE = 500
+
+
+class UnknownCurrency(KeyError):
+    pass
+
+
+class ExchangeRateAPIProvider:
+    """exchangerate-api.com free tier (1500 requests/month)."""
+    url = "https://api.exchangerate-api.com/v4/latest/{base}"
+
+    def fetch(self, base):
+        """``{currency: units per base unit}``, or None when unavailable."""
+        try:
+            response = requests.get(self.url.format(base=base), timeout=10)
+            response.raise_for_status()
+            return response.json().get('rates')
+        except (requests.RequestException, ValueError):
+            logger.warning("Could not fetch exchange rates", exc_info=True)
+            return None
+
+
+class FixtureProvider:
+    """Fixed rates (``CURRENCY_FIXTURE_RATES`` or these) standing in for the API."""
+    rates = {
+        'AOA': 1, 'USD': '0.0011', 'EUR': '0.00101', 'GBP': '0.00086', 'BRL': '0.0061', 'ZAR': '0.0198',
+        'NGN': '1.68', 'KES': '0.142', 'GHS': '0.0135', 'EGP': '0.0535', 'MZN': '0.0702', 'CVE': '0.111',
+        'XOF': '0.661', 'STN': '0.0247', 'XAF': '0.661', 'ZWL': '0.354', 'BWP': '0.0148', 'NAD': '0.0198',
+        'ZMW': '0.0289',
+    }
+
+    def fetch(self, base):
+        if base != BASE_CURRENCY:
+            return None
+        rates = getattr(settings, "CURRENCY_FIXTURE_RATES", self.rates)
+        return {currency: Decimal(str(rate)) for currency, rate in rates.items()}
+
+
+def provider():
+    return import_string(getattr(settings, "CURRENCY_RATE_PROVIDER", "currency.rates.ExchangeRateAPIProvider"))()
+
+
+class RateTable:
+    def __init__(self, from_base, to_base, updated_at=None, version=None, day=None):
+        """``from_base``: units of each currency per AOA; ``to_base``: AOA per unit of each currency."""
+        self.version = version
+        self.day = day
+        self.updated_at = updated_at
+        self.checked_at = time.monotonic()
+        from_base = dict(from_base, **{BASE_CURRENCY: Decimal(1)})
+        to_base = dict(to_base, **{BASE_CURRENCY: Decimal(1)})
+        for currency, rate in from_base.items():
+            if currency not in to_base and rate:
+                to_base[currency] = 1 / rate
+        # (from, to) -> rate, every pair chained through the base currency
+        self.pairs = {
+            (source, target): Decimal(1) if source == target else to_base[source] * from_base[target]
+            for source in to_base
+            for target in from_base
+        }
+        self.currencies = sorted(from_base)
+
+    def rate(self, from_currency, to_currency) -> Decimal:
+        try:
+            return self.pairs[from_currency, to_currency]
+        except KeyError:
+            raise UnknownCurrency(f"{from_currency}/{to_currency}") from None
+
+    def convert(self, amount, from_currency, to_currency) -> Decimal:
+        return Decimal(str(amount)) * self.rate(from_currency, to_currency)
+
+    def convert_many(self, amounts, from_currency, to_currency) -> list:
+        """``amounts`` converted and rounded to cents, looking the rate up once."""
+        rate = self.rate(from_currency, to_currency)
+        return [
+            ((amount if isinstance(amount, Decimal) else Decimal(str(amount))) * rate).quantize(CENT, ROUND_HALF_UP)
+            for amount in amounts
+        ]
+
+
+def _window(today):
+    """The stored rates a table of ``today`` is built from."""
+    from .models import ExchangeRate
+
+    return ExchangeRate.objects.filter(
+        Q(base_currency=BASE_CURRENCY) | Q(target_currency=BASE_CURRENCY),
+        date__gte=today - timedelta(days=FALLBACK_DAYS),
+    )
+
+
+def load_table(version=None) -> RateTable:
+    """The latest stored rates to and from the base currency, in one query."""
+    today = timezone.now().date()
+    rows = _window(today).order_by('-date', '-last_updated').values_list(
+        'base_currency', 'target_currency', 'rate', 'last_updated'
+    )
+    from_base, to_base, updated_at = {}, {}, None
+    for base_currency, target_currency, rate, last_updated in rows:
+        if base_currency == BASE_CURRENCY:
+            from_base.setdefault(target_currency, rate)
+        else:
+            to_base.setdefault(base_currency, rate)
+        updated_at = max(updated_at or last_updated, last_updated)
+    return RateTable(from_base, to_base, updated_at, version, today)
+
+
+_table = None
+_lock = threading.Lock()
+
+
+def _stale(table, today) -> bool:
+    """Whether rates were stored since ``table`` was loaded, checked at most every ``CURRENCY_TABLE_CHECK_SECONDS``."""
+    now = time.monotonic()
+    if now - table.checked_at < getattr(settings, "CURRENCY_TABLE_CHECK_SECONDS", 60):
+        return False
+    table.checked_at = now
+    latest = _window(today).aggregate(latest=Max('last_updated'))['latest']
+    return latest is not None and (table.updated_at is None or latest > table.updated_at)
+
+
+def current_table() -> RateTable:
+    """This process' table, reloaded after a refresh and at the start of each day.
+
+    A refresh in another process (the beat worker) bumps the version only
+    where the cache is shared, so the table also reloads when the database
+    holds newer rates than it was built from.
+    """
+    global _table
+    version = versions.version(SCOPE)
+    today = timezone.now().date()
+    table = _table
+    if table is None or table.version != version or table.day != today or _stale(table, today):
+        with _lock:
+            if _table is table:
+                _table = load_table(version)
+            table = _table
+    return table
+
+
+def convert_many(amounts, from_currency, to_currency) -> list:
+    return current_table().convert_many(amounts, from_currency, to_currency)
+
+
+def invalidate() -> None:
+    versions.invalidate(SCOPE)
+
+
+def store(days) -> int:
+    """Upsert ``{date: {currency: units per AOA}}`` in one statement per batch; returns the rates stored.
+
+    Each supported currency is stored in both directions, so the table and
+    ``ExchangeRate.get_latest_rate`` find the reverse rate too. Missing,
+    non-finite and non-positive rates are skipped.
+    """
+    from .models import ExchangeRate
+
+    rows, count = [], 0
+    for day, day_rates in days.items():
+        for currency_code in SUPPORTED_CURRENCIES:
+            if currency_code == BASE_CURRENCY or day_rates.get(currency_code) is None:
+                continue
+            rate_value = Decimal(str(day_rates[currency_code]))
+            if not rate_value.is_finite() or rate_value <= 0:
+                continue
+            rows.append(ExchangeRate(
+                base_currency=BASE_CURRENCY, target_currency=currency_code, date=day, rate=rate_value,
+            ))
+            rows.append(ExchangeRate(
+                base_currency=currency_code, target_currency=BASE_CURRENCY, date=day,
+                rate=(1 / rate_value).quantize(RATE_PLACES),
+            ))
+            count += 1
+    if rows:
+        ExchangeRate.objects.bulk_create(
+            rows, batch_size=BATCH_SIZE, update_conflicts=True,
+            unique_fields=['base_currency', 'target_currency', 'date'], update_fields=['rate', 'last_updated'],
+        )
+        invalidate()
+    return count
+
+
+def refresh(source=None) -> int:
+    """Store today's rates from ``source`` (default ``provider()``); returns the currencies updated."""
+    rates = (source or provider()).fetch(BASE_CURRENCY)
+    if not rates:
+        return 0
+    return store({timezone.now().date(): rates})
+
+
+def history(currencies, start_date, end_date) -> dict:
+    """Columnar AOA-based series for charting, in one query.
+
+    ``{"dates": [...], "rates": {currency: [rate or None per date]}}``,
+    with one entry per day that has any of the rates.
+    """
+    from .models import ExchangeRate
+
+    rows = ExchangeRate.objects.filter(
+        base_currency=BASE_CURRENCY, target_currency__in=currencies, date__range=(start_date, end_date),
+    ).order_by('date').values_list('date', 'target_currency', 'rate')
+    dates, series = [], {currency: [] for currency in currencies}
+    for day, currency, rate in rows:
+        if not dates or dates[-1] != day:
+            dates.append(day)
+            for values in series.values():
+                values.append(None)
+        series[currency][-1] = float(rate)
+    return {'dates': [day.isoformat() for day in dates], 'rates': series}
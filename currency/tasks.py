@@ -0,0 +1,13 @@
+"""Scheduled exchange-rate refresh (``CELERY_BEAT_SCHEDULE``)."""
+from celery import shared_task
+
+from . import rates
+
+
+@shared_task(bind=True, max_retries=3)
+def refresh_exchange_rates(self) -> int:
+    """Fetch and store today's rates; retried when the provider is unavailable."""
+    updated = rates.refresh()
+    if not updated and self.request.retries < self.max_retries:
+        raise self.retry(countdown=10 * 60)
+    return updated
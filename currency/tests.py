@@ -1,7 +1,16 @@
+import io
+import json
+import tempfile
 import unittest
-from django.test import TestCase
+from decimal import Decimal
+from pathlib import Path
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 from django.utils import timezone
-from datetime import timedelta
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+from . import rates
 from .models import ExchangeRate
 
 
@@ -21,6 +30,13 @@ class ExchangeRateModelTest(TestCase):
         self.assertEqual(self.rate.target_currency, 'USD')
         self.assertEqual(float(self.rate.rate), 0.0012)
 
+    @override_settings(TIME_ZONE='America/Sao_Paulo')
+    def test_default_date_follows_timezone_now(self):
+        with mock.patch('django.utils.timezone.now', return_value=datetime(2026, 1, 2, 1, 0, tzinfo=dt_timezone.utc)):
+            rate = ExchangeRate.objects.create(target_currency='EUR', rate=1)
+
+        self.assertEqual(rate.date, date(2026, 1, 2))
+
     def test_exchange_rate_str(self):
         """Test string representation"""
         self.assertIn('AOA', str(self.rate))
@@ -51,3 +67,133 @@ class ExchangeRateModelTest(TestCase):
     def test_needs_update_recent_rate_exists(self):
         """Test that needs_update returns False when recent rate exists"""
         self.assertFalse(ExchangeRate.needs_update())
+
+
+@override_settings(CURRENCY_RATE_PROVIDER='currency.rates.FixtureProvider')
+class RateTableTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_refresh_stores_both_directions(self):
+        self.assertEqual(rates.refresh(), 18)
+        self.assertEqual(
+            float(ExchangeRate.objects.get(base_currency='AOA', target_currency='USD').rate), 0.0011
+        )
+        self.assertAlmostEqual(
+            float(ExchangeRate.objects.get(base_currency='USD', target_currency='AOA').rate), 909.090909
+        )
+
+    def test_refresh_upserts_in_one_statement(self):
+        with self.assertNumQueries(1):
+            rates.refresh()
+        with self.settings(CURRENCY_FIXTURE_RATES={'USD': '0.0012'}):
+            rates.refresh()
+
+        self.assertEqual(ExchangeRate.objects.count(), 36)
+        self.assertEqual(rates.current_table().rate('AOA', 'USD'), Decimal('0.0012'))
+
+    def test_pairs_are_chained_through_the_base_currency(self):
+        rates.refresh()
+        table = rates.current_table()
+
+        self.assertEqual(table.rate('AOA', 'USD'), Decimal('0.0011'))
+        self.assertEqual(table.rate('ZAR', 'ZAR'), 1)
+        self.assertAlmostEqual(float(table.rate('USD', 'EUR')), 0.00101 / 0.0011, places=5)
+        self.assertEqual(
+            table.convert_many([100000, Decimal('2500.50'), '0'], 'AOA', 'USD'),
+            [Decimal('110.00'), Decimal('2.75'), Decimal('0.00')],
+        )
+        with self.assertRaises(rates.UnknownCurrency):
+            table.rate('AOA', 'XYZ')
+
+    def test_conversions_use_the_loaded_table(self):
+        rates.refresh()
+        rates.current_table()
+
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                '/currency/convert/', {'amount': 1000, 'from_currency': 'aoa', 'to_currency': 'eur'},
+                content_type='application/json',
+            )
+            self.assertEqual(rates.convert_many([1000] * 3, 'AOA', 'EUR'), [Decimal('1.01')] * 3)
+        self.assertAlmostEqual(response.json()['converted_amount'], 1.01)
+        self.assertEqual(self.client.post(
+            '/currency/convert/', {'amount': 1, 'to_currency': 'XYZ'}, content_type='application/json',
+        ).status_code, 400)
+
+    def test_refresh_reloads_the_table(self):
+        self.assertEqual(rates.current_table().currencies, ['AOA'])
+
+        with self.settings(CURRENCY_FIXTURE_RATES={'USD': '0.002'}):
+            rates.refresh()
+
+        self.assertEqual(rates.current_table().rate('USD', 'AOA'), Decimal('500'))
+
+    def test_rates_stored_by_another_process_reload_the_table(self):
+        rates.refresh()
+        self.assertEqual(rates.current_table().rate('AOA', 'USD'), Decimal('0.0011'))
+        # A worker without a shared cache stores rates but cannot bump this process' version
+        ExchangeRate.objects.filter(base_currency='AOA', target_currency='USD').update(
+            rate=Decimal('0.0013'), last_updated=timezone.now() + timedelta(seconds=1),
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(rates.current_table().rate('AOA', 'USD'), Decimal('0.0011'))
+        with self.settings(CURRENCY_TABLE_CHECK_SECONDS=0):
+            self.assertEqual(rates.current_table().rate('AOA', 'USD'), Decimal('0.0013'))
+            with self.assertNumQueries(1):
+                rates.current_table()
+
+    def test_rates_endpoint_does_not_fetch(self):
+        response = self.client.get('/currency/rates/')
+
+        self.assertEqual(response.json()['rates']['AOA'], 1.0)
+        self.assertFalse(ExchangeRate.objects.exists())
+
+
+class RateHistoryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.today = timezone.now().date()
+
+    def _dump(self, name, content):
+        path = self.directory / name
+        path.write_text(content)
+        return str(path)
+
+    def test_backfill_json_and_csv_dumps(self):
+        two_days_ago, yesterday = self.today - timedelta(days=2), self.today - timedelta(days=1)
+        call_command('backfill_exchange_rates', self._dump('rates.json', json.dumps([
+            {'date': two_days_ago.isoformat(), 'rates': {'AOA': 1, 'USD': 0.0011, 'XYZ': 3}},
+        ])), stdout=io.StringIO())
+        # Wide CSV quoted against USD
+        call_command('backfill_exchange_rates', self._dump('rates.csv', (
+            f"date,USD,AOA,EUR\n{self.today.isoformat()},1,800,0.9\n"
+        )), base='usd', stdout=io.StringIO())
+
+        self.assertEqual(ExchangeRate.objects.filter(date=two_days_ago).count(), 2)
+        self.assertEqual(
+            ExchangeRate.objects.get(base_currency='AOA', target_currency='EUR', date=self.today).rate,
+            Decimal('0.001125'),
+        )
+        self.assertEqual(ExchangeRate.objects.get(base_currency='USD', target_currency='AOA', date=self.today).rate, 800)
+
+        response = self.client.get('/currency/history/', {'currencies': 'usd,eur', 'days': 3})
+
+        self.assertEqual(response.json()['dates'], [two_days_ago.isoformat(), self.today.isoformat()])
+        self.assertEqual(response.json()['rates'], {'USD': [0.0011, 0.00125], 'EUR': [None, 0.001125]})
+        self.assertNotIn(yesterday.isoformat(), response.json()['dates'])
+
+    def test_backfill_rejects_non_finite_rates(self):
+        for rate in ('NaN', 'Infinity'):
+            dump = self._dump('rates.csv', f"date,currency,rate\n{self.today.isoformat()},USD,{rate}\n")
+            with self.assertRaisesMessage(CommandError, 'Non-finite rates'):
+                call_command('backfill_exchange_rates', dump, stdout=io.StringIO())
+
+        self.assertEqual(rates.store({self.today: {'USD': Decimal('Infinity'), 'EUR': Decimal('NaN')}}), 0)
+        self.assertFalse(ExchangeRate.objects.exists())
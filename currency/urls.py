@@ -6,6 +6,7 @@ app_name = 'currency'
 
 urlpatterns = [
     path('rates/', views.get_exchange_rates, name='exchange-rates'),
+    path('history/', views.get_rate_history, name='rate-history'),
     path('convert/', views.convert_currency, name='convert-currency'),
     path('update/', views.force_update_rates, name='force-update'),
 ]
@@ -1,5 +1,5 @@
 # currency/views.py
-import requests
+from datetime import timedelta
 from decimal import Decimal
 from django.utils import timezone
 from django.views.decorators.cache import cache_page
@@ -7,75 +7,12 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from .models import ExchangeRate
+from . import rates
 
-# Supported currency codes
-SUPPORTED_CURRENCIES = [
-    'USD', 'EUR', 'GBP', 'AOA', 'BRL', 'ZAR', 'NGN', 'KES', 'GHS', 'EGP',
-    'MZN', 'CVE', 'XOF', 'STN', 'XAF', 'ZWL', 'BWP', 'NAD', 'ZMW'
-]
-
-BASE_CURRENCY = 'AOA'  # Angolan Kwanza as base
-
-
-def fetch_exchange_rates_from_api():
-    """Fetch latest exchange rates from external API"""
-    try:
-        # Using exchangerate-api.com free tier (1500 requests/month)
-        # You can also use: fixer.io, currencyapi.com, or openexchangerates.org
-        api_url = f"https://api.exchangerate-api.com/v4/latest/{BASE_CURRENCY}"
-        
-        response = requests.get(api_url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if 'rates' in data:
-            return data['rates']
-        
-        return None
-    except Exception as e:
-        print(f"Error fetching exchange rates: {e}")
-        return None
-
-
-def update_exchange_rates():
-    """Update exchange rates in database"""
-    rates = fetch_exchange_rates_from_api()
-    
-    if not rates:
-        return False
-    
-    today = timezone.now().date()
-    updated_count = 0
-    
-    for currency_code in SUPPORTED_CURRENCIES:
-        if currency_code in rates and currency_code != BASE_CURRENCY:
-            rate_value = rates[currency_code]
-            
-            # Create or update the rate
-            ExchangeRate.objects.update_or_create(
-                base_currency=BASE_CURRENCY,
-                target_currency=currency_code,
-                date=today,
-                defaults={'rate': Decimal(str(rate_value))}
-            )
-            updated_count += 1
-    
-    # Also store the reverse rates (from other currencies to AOA)
-    for currency_code in SUPPORTED_CURRENCIES:
-        if currency_code in rates and currency_code != BASE_CURRENCY:
-            rate_value = rates[currency_code]
-            if rate_value > 0:
-                reverse_rate = 1 / Decimal(str(rate_value))
-                
-                ExchangeRate.objects.update_or_create(
-                    base_currency=currency_code,
-                    target_currency=BASE_CURRENCY,
-                    date=today,
-                    defaults={'rate': reverse_rate}
-                )
-    
-    return updated_count > 0
+# Supported currency codes and the base (Angolan Kwanza) live with the rate table
+SUPPORTED_CURRENCIES = rates.SUPPORTED_CURRENCIES
+BASE_CURRENCY = rates.BASE_CURRENCY
+MAX_HISTORY_DAYS = 3650
 
 
 @api_view(['GET'])
@@ -87,26 +24,19 @@ def get_exchange_rates(request):
     GET /api/currency/rates/
     """
     try:
-        # Check if rates need updating
-        if ExchangeRate.needs_update(BASE_CURRENCY):
-            updated = update_exchange_rates()
-            if not updated:
-                # If update failed, proceed with existing rates
-                pass
-        
-        # Get all latest rates
-        rates = {}
+        # Rates are refreshed by the scheduled job, never inside a request
+        table = rates.current_table()
+        latest = {}
         for currency in SUPPORTED_CURRENCIES:
-            if currency == BASE_CURRENCY:
-                rates[currency] = 1.0
-            else:
-                rate = ExchangeRate.get_latest_rate(BASE_CURRENCY, currency)
-                rates[currency] = float(rate) if rate is not None else 1.0
-        
+            try:
+                latest[currency] = float(table.rate(BASE_CURRENCY, currency))
+            except rates.UnknownCurrency:
+                latest[currency] = 1.0
+
         return Response({
             'base_currency': BASE_CURRENCY,
-            'rates': rates,
-            'last_updated': timezone.now().isoformat(),
+            'rates': latest,
+            'last_updated': (table.updated_at or timezone.now()).isoformat(),
         })
     except Exception as e:
         # Fallback: return minimal rates on error
@@ -135,29 +65,16 @@ def convert_currency(request):
         from_currency = request.data.get('from_currency', BASE_CURRENCY).upper()
         to_currency = request.data.get('to_currency', 'USD').upper()
         
-        if from_currency == to_currency:
-            converted_amount = amount
-        elif from_currency == BASE_CURRENCY:
-            # Convert from base to target
-            rate = ExchangeRate.get_latest_rate(BASE_CURRENCY, to_currency)
-            converted_amount = amount * Decimal(str(rate))
-        elif to_currency == BASE_CURRENCY:
-            # Convert from target to base
-            rate = ExchangeRate.get_latest_rate(from_currency, BASE_CURRENCY)
-            converted_amount = amount * Decimal(str(rate))
-        else:
-            # Convert via base currency (from -> AOA -> to)
-            rate_to_base = ExchangeRate.get_latest_rate(from_currency, BASE_CURRENCY)
-            amount_in_base = amount * Decimal(str(rate_to_base))
-            rate_from_base = ExchangeRate.get_latest_rate(BASE_CURRENCY, to_currency)
-            converted_amount = amount_in_base * Decimal(str(rate_from_base))
+        # Pairs are chained through the base currency (from -> AOA -> to)
+        rate = rates.current_table().rate(from_currency, to_currency)
+        converted_amount = amount * rate
         
         return Response({
             'original_amount': float(amount),
             'from_currency': from_currency,
             'to_currency': to_currency,
             'converted_amount': float(converted_amount),
-            'rate': float(converted_amount / amount) if amount > 0 else 0,
+            'rate': float(rate),
         })
     
     except Exception as e:
@@ -167,6 +84,27 @@ def convert_currency(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_rate_history(request):
+    """
+    Daily AOA-based rates for charts
+    GET /api/currency/history/?currencies=USD,EUR&days=90
+    """
+    currencies = [
+        code for code in request.query_params.get('currencies', '').upper().split(',') if code
+    ] or [code for code in SUPPORTED_CURRENCIES if code != BASE_CURRENCY]
+    try:
+        days = min(int(request.query_params.get('days', 30)), MAX_HISTORY_DAYS)
+    except ValueError:
+        return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    end_date = timezone.now().date()
+    return Response({
+        'base_currency': BASE_CURRENCY,
+        **rates.history(currencies, end_date - timedelta(days=max(days, 1) - 1), end_date),
+    })
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def force_update_rates(request):
@@ -175,7 +113,7 @@ def force_update_rates(request):
     POST /api/currency/update/
     """
     try:
-        success = update_exchange_rates()
+        success = rates.refresh()
         if success:
             return Response({
                 'message': 'Exchange rates updated successfully',
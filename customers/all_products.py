@@ -4,7 +4,7 @@ from stores.serializers import ProductSerializer
 
 
 class AllProductsList(generics.ListAPIView):
-    queryset = Product.objects.all().select_related("category", "store").prefetch_related("images")
+    queryset = ProductSerializer.eager(Product.objects.all())
     serializer_class = ProductSerializer
 
 
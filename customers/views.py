@@ -18,8 +18,7 @@ from rest_framework.parsers import *
 
 from django.contrib.auth import get_user_model
 
-from stores.models import Product, Store
-from stores.serializers import ProductSerializer, StoreSerializer
+from stores import catalog
 
 User = get_user_model()
 
@@ -59,23 +58,15 @@ def customer_update_profile(request, format=None):
 
 
 def customer_get_stores(request):
-    stores = StoreSerializer(
-        Store.objects.all().order_by("-id"),
-        many=True,
-        context={"request": request},
-    ).data
-
-    return JsonResponse({"stores": stores})
+    return catalog.respond(request, catalog.STORES, lambda: catalog.store_list(request))
 
 
 def customer_get_products(request, store_id):
-    products = ProductSerializer(
-        Product.objects.filter(store_id=store_id).order_by("-id"),
-        many=True,
-        context={"request": request},
-    ).data
-
-    return JsonResponse({"products": products})
+    return catalog.respond(
+        request,
+        catalog.products_scope(store_id),
+        lambda: catalog.product_list(request, store_id),
+    )
 
 
 #######################################################################################3
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_languages(apps, schema_editor):
+    DoctorProfile = apps.get_model('doctors', 'DoctorProfile')
+    DoctorLanguage = apps.get_model('doctors', 'DoctorLanguage')
+    rows = []
+    for doctor_id, languages in DoctorProfile.objects.values_list('id', 'languages').iterator():
+        codes = dict.fromkeys(code.strip().lower() for code in (languages or '').split(',') if code.strip())
+        rows.extend(DoctorLanguage(doctor_id=doctor_id, code=code) for code in codes)
+    DoctorLanguage.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0001_initial'),
+        ('kudya_platform', '0003_auditevent'),
+        ('services', '0002_country_currency_country_timezone'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorLanguage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=10)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='doctorprofile',
+            index=models.Index(condition=models.Q(('approval_status', 'approved'), ('is_active', True)), fields=['city', 'specialty', '-rating'], name='doctor_city_specialty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorprofile',
+            index=models.Index(condition=models.Q(('approval_status', 'approved'), ('is_active', True)), fields=['country', 'specialty', '-rating'], name='doctor_country_specialty_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorprofile',
+            index=models.Index(condition=models.Q(('approval_status', 'approved'), ('is_active', True)), fields=['specialty', 'consultation_fee'], name='doctor_specialty_fee_idx'),
+        ),
+        migrations.AddField(
+            model_name='doctorlanguage',
+            name='doctor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='spoken_languages', to='doctors.doctorprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='doctorlanguage',
+            index=models.Index(fields=['code', 'doctor'], name='doctor_language_code_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='doctorlanguage',
+            unique_together={('doctor', 'code')},
+        ),
+        migrations.RunPython(backfill_languages, migrations.RunPython.noop),
+    ]
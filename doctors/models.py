@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 
 User = get_user_model()
 
@@ -81,10 +83,49 @@ class DoctorProfile(models.Model):
 
     class Meta:
         ordering = ['-rating', '-created_at']
+        # Public search only sees approved, active doctors
+        indexes = [
+            models.Index(
+                fields=['city', 'specialty', '-rating'], name='doctor_city_specialty_idx',
+                condition=models.Q(approval_status='approved', is_active=True),
+            ),
+            models.Index(
+                fields=['country', 'specialty', '-rating'], name='doctor_country_specialty_idx',
+                condition=models.Q(approval_status='approved', is_active=True),
+            ),
+            models.Index(
+                fields=['specialty', 'consultation_fee'], name='doctor_specialty_fee_idx',
+                condition=models.Q(approval_status='approved', is_active=True),
+            ),
+        ]
 
     def __str__(self):
         return f'Dr. {self.user.get_full_name() or self.user.username} — {self.specialty.name}'
 
+    @staticmethod
+    def language_code(value):
+        """The stored (stripped, lowercase) form of one language code."""
+        return (value or '').strip().lower()
+
+    @staticmethod
+    def parse_languages(value):
+        """Lowercase, de-duplicated codes of a comma-separated ``languages`` value."""
+        codes = (DoctorProfile.language_code(code) for code in (value or '').split(','))
+        return list(dict.fromkeys(code for code in codes if code))
+
+
+class DoctorLanguage(models.Model):
+    """One row per language a doctor speaks, kept in sync with ``DoctorProfile.languages``."""
+    doctor = models.ForeignKey(DoctorProfile, on_delete=models.CASCADE, related_name='spoken_languages')
+    code = models.CharField(max_length=10)
+
+    class Meta:
+        unique_together = ('doctor', 'code')
+        indexes = [models.Index(fields=['code', 'doctor'], name='doctor_language_code_idx')]
+
+    def __str__(self):
+        return f'{self.doctor_id}: {self.code}'
+
 
 class DoctorDocument(models.Model):
     DOC_TYPES = [
@@ -163,3 +204,15 @@ class Appointment(models.Model):
 
     def __str__(self):
         return f'{self.customer} → {self.doctor} on {self.date}'
+
+
+@receiver(post_save, sender=DoctorProfile)
+def sync_doctor_languages(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'languages' not in update_fields:
+        return
+    codes = DoctorProfile.parse_languages(instance.languages)
+    if not created:
+        instance.spoken_languages.exclude(code__in=codes).delete()
+    DoctorLanguage.objects.bulk_create(
+        [DoctorLanguage(doctor=instance, code=code) for code in codes], ignore_conflicts=True,
+    )
@@ -0,0 +1,139 @@
+"""Faceted doctor search behind ``DoctorViewSet.search``.
+
+A search returns one page of approved, active doctors plus facet counts per
+specialty, language, price band (``DOCTOR_PRICE_BANDS``) and consultation
+mode. Each facet counts the doctors matching every other selected facet
+but not its own, so a client can offer the alternatives to a selection.
+The counts take three grouped queries however many values each facet has:
+specialties grouped, languages grouped on ``DoctorLanguage``, and a single
+conditional aggregate for the price bands, the modes and the total.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .models import DoctorLanguage, DoctorProfile
+
+DEFAULT_PRICE_BANDS = (250, 500, 1000, 2000)
+MODES = {'online': 'online_consultation_enabled', 'physical': 'physical_consultation_enabled'}
+ORDERINGS = {
+    'rating': ('-rating', '-id'),
+    'fee': ('consultation_fee', '-id'),
+    '-fee': ('-consultation_fee', '-id'),
+    'experience': ('-years_experience', '-id'),
+}
+
+
+def price_bands() -> list:
+    """``(label, low, high)`` per band; ``low`` inclusive, ``high`` exclusive, None unbounded."""
+    edges = [Decimal(str(edge)) for edge in getattr(settings, 'DOCTOR_PRICE_BANDS', DEFAULT_PRICE_BANDS)]
+    bounds = list(zip([None] + edges, edges + [None]))
+    return [
+        (f"{low if low is not None else 0}-{high}" if high is not None else f"{low}+", low, high)
+        for low, high in bounds
+    ]
+
+
+def _band_q(low, high) -> Q:
+    q = Q()
+    if low is not None:
+        q &= Q(consultation_fee__gte=low)
+    if high is not None:
+        q &= Q(consultation_fee__lt=high)
+    return q
+
+
+def facet_filters(specialty=None, specialty_slug=None, language=None, band=None, mode=None) -> dict:
+    """``{facet: Q}`` of the selected facet values; raises ValueError on unknown ones."""
+    selected = {}
+    language = DoctorProfile.language_code(language)
+    if specialty:
+        selected['specialty'] = Q(specialty_id=specialty)
+    elif specialty_slug:
+        selected['specialty'] = Q(specialty__slug=specialty_slug)
+    if language:
+        selected['language'] = Q(Exists(DoctorLanguage.objects.filter(doctor=OuterRef('pk'), code=language)))
+    if band:
+        bounds = {label: (low, high) for label, low, high in price_bands()}
+        if band not in bounds:
+            raise ValueError(f"Unknown price band {band!r}")
+        selected['price'] = _band_q(*bounds[band])
+    if mode:
+        if mode not in MODES:
+            raise ValueError(f"Unknown consultation mode {mode!r}")
+        selected['mode'] = Q(**{MODES[mode]: True})
+    return selected
+
+
+def _except(selected, facet) -> Q:
+    q = Q()
+    for name, condition in selected.items():
+        if name != facet:
+            q &= condition
+    return q
+
+
+def base_queryset(country=None, city=None, min_rating=None):
+    qs = DoctorProfile.objects.filter(approval_status='approved', is_active=True)
+    if country:
+        qs = qs.filter(country_id=country)
+    if city:
+        qs = qs.filter(city_id=city)
+    if min_rating:
+        qs = qs.filter(rating__gte=min_rating)
+    return qs
+
+
+def facets(base, selected) -> tuple:
+    """``(total, {facet: [{value, count}, ...]})`` for the selection, in three queries."""
+    specialties = [
+        {'id': row['specialty_id'], 'slug': row['specialty__slug'], 'name': row['specialty__name'],
+         'count': row['count']}
+        for row in base.filter(_except(selected, 'specialty')).order_by()
+        .values('specialty_id', 'specialty__slug', 'specialty__name')
+        .annotate(count=Count('pk')).order_by('-count', 'specialty__name')
+    ]
+    languages = [
+        {'code': row['code'], 'count': row['count']}
+        for row in DoctorLanguage.objects.filter(
+            doctor__in=base.filter(_except(selected, 'language')).order_by().values('pk')
+        ).values('code').annotate(count=Count('doctor')).order_by('-count', 'code')
+    ]
+    bands = price_bands()
+    everything = _except(selected, None)
+    counts = base.order_by().aggregate(
+        total=Count('pk', filter=everything),
+        **{
+            f'band_{index}': Count('pk', filter=_band_q(low, high) & _except(selected, 'price'))
+            for index, (_, low, high) in enumerate(bands)
+        },
+        **{
+            f'mode_{mode}': Count('pk', filter=Q(**{field: True}) & _except(selected, 'mode'))
+            for mode, field in MODES.items()
+        },
+    )
+    return counts['total'], {
+        'specialty': specialties,
+        'language': languages,
+        'price_band': [
+            {'band': label, 'min': low, 'max': high, 'count': counts[f'band_{index}']}
+            for index, (label, low, high) in enumerate(bands)
+        ],
+        'consultation': [{'mode': mode, 'count': counts[f'mode_{mode}']} for mode in MODES],
+    }
+
+
+def search(country=None, city=None, min_rating=None, specialty=None, specialty_slug=None, language=None,
+           price_band=None, consultation_type=None, ordering='rating', offset=0, limit=20):
+    """``(doctors of the page, total, facets)``; raises ValueError on unknown facet values or ordering."""
+    if ordering not in ORDERINGS:
+        raise ValueError(f"Unknown ordering {ordering!r}")
+    base = base_queryset(country, city, min_rating)
+    selected = facet_filters(specialty, specialty_slug, language, price_band, consultation_type)
+    total, counts = facets(base, selected)
+    page = list(
+        base.filter(_except(selected, None)).select_related('user', 'specialty', 'country', 'city')
+        .order_by(*ORDERINGS[ordering])[offset:offset + limit]
+    )
+    return page, total, counts
@@ -245,3 +245,88 @@ class DoctorVerificationDocumentTests(APITestCase):
                 target_id=str(document.id),
             ).exists()
         )
+
+
+class DoctorSearchTests(APITestCase):
+    def setUp(self):
+        self.country = Country.objects.create(name='Angola', code='AO', currency='AOA')
+        self.city = City.objects.create(country=self.country, name='Luanda')
+        self.gp = MedicalSpecialty.objects.create(slug='gp', name='General Practitioner')
+        self.cardiology = MedicalSpecialty.objects.create(slug='cardiology', name='Cardiology')
+        self.bilingual = self._doctor('ana', self.gp, 'en, PT,pt', '200.00', online=True, rating='4.5')
+        self.portuguese = self._doctor('bruno', self.gp, 'pt', '600.00', physical=True, rating='4.0')
+        self.cardiologist = self._doctor('carla', self.cardiology, 'fr,en', '1500.00', online=True, rating='5.0')
+        self._doctor('dario', self.gp, 'pt', '300.00', physical=True, approval_status='pending')
+
+    def _doctor(self, username, specialty, languages, fee, online=False, physical=False, rating='0',
+                approval_status='approved'):
+        user = User.objects.create_user(username=username, password='StrongPass123!', role='doctor')
+        return DoctorProfile.objects.create(
+            user=user, specialty=specialty, languages=languages, country=self.country, city=self.city,
+            consultation_fee=fee, online_consultation_enabled=online, physical_consultation_enabled=physical,
+            license_number=username, approval_status=approval_status, rating=rating,
+        )
+
+    def test_languages_are_normalized_into_rows(self):
+        self.assertEqual(
+            sorted(self.bilingual.spoken_languages.values_list('code', flat=True)), ['en', 'pt'],
+        )
+        self.bilingual.languages = 'fr'
+        self.bilingual.save()
+        self.assertEqual(list(self.bilingual.spoken_languages.values_list('code', flat=True)), ['fr'])
+
+        response = self.client.get('/api/doctors/', {'language': 'PT'})
+        self.assertEqual([doctor['id'] for doctor in response.json()], [self.portuguese.id])
+        self.assertEqual(self.client.get('/api/doctors/', {'language': 'p'}).json(), [])
+
+    def test_search_returns_the_page_and_facets_in_four_queries(self):
+        with self.assertNumQueries(4):
+            response = self.client.get(
+                '/api/doctors/search/', {'city': self.city.id, 'specialty_slug': 'gp', 'language': 'pt'},
+            )
+
+        body = response.json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body['count'], 2)
+        self.assertEqual([doctor['id'] for doctor in body['results']], [self.bilingual.id, self.portuguese.id])
+        # Each facet ignores its own selection
+        self.assertEqual(
+            [(facet['slug'], facet['count']) for facet in body['facets']['specialty']], [('gp', 2)],
+        )
+        self.assertEqual(
+            [(facet['code'], facet['count']) for facet in body['facets']['language']], [('pt', 2), ('en', 1)],
+        )
+        self.assertEqual(
+            [(facet['band'], facet['count']) for facet in body['facets']['price_band']],
+            [('0-250', 1), ('250-500', 0), ('500-1000', 1), ('1000-2000', 0), ('2000+', 0)],
+        )
+        self.assertEqual(body['facets']['consultation'], [
+            {'mode': 'online', 'count': 1}, {'mode': 'physical', 'count': 1},
+        ])
+
+    def test_search_pages_and_rejects_unknown_facet_values(self):
+        first = self.client.get('/api/doctors/search/', {'page_size': 2, 'consultation_type': 'online'}).json()
+
+        self.assertEqual(first['count'], 2)
+        self.assertEqual([doctor['id'] for doctor in first['results']], [self.cardiologist.id, self.bilingual.id])
+        self.assertIsNone(first['next'])
+        paged = self.client.get('/api/doctors/search/', {'page_size': 1, 'ordering': 'fee'}).json()
+        self.assertEqual([doctor['id'] for doctor in paged['results']], [self.bilingual.id])
+        self.assertIn('page=2', paged['next'])
+        self.assertEqual(self.client.get('/api/doctors/search/', {'price_band': 'cheap'}).status_code, 400)
+
+    def test_search_ignores_out_of_range_parameters(self):
+        response = self.client.get('/api/doctors/search/', {'min_rating': 'NaN', 'page_size': -5})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertEqual(response.json()['count'], self.client.get('/api/doctors/search/').json()['count'])
+
+    def test_list_and_search_normalise_the_language_alike(self):
+        listed = self.client.get('/api/doctors/', {'language': ' PT '}).json()
+        searched = self.client.get('/api/doctors/search/', {'language': ' PT '}).json()
+
+        self.assertEqual(len(listed), 2)
+        self.assertEqual(
+            sorted(doctor['id'] for doctor in searched['results']), sorted(doctor['id'] for doctor in listed),
+        )
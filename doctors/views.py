@@ -3,9 +3,11 @@ from rest_framework.decorators import action, api_view, permission_classes, pars
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
 
+from . import search
 from .models import MedicalSpecialty, DoctorProfile, DoctorAvailability, Appointment, DoctorDocument
 from .serializers import (
     MedicalSpecialtySerializer,
@@ -22,6 +24,7 @@ from documents.models import VerificationDocument
 from documents.serializers import VerificationDocumentSerializer
 from kudya_platform.audit import record_audit_event
 from kudya_platform.models import CountryComplianceSetting
+from kudya_platform.params import decimal_param, int_param
 
 
 class MedicalSpecialtyViewSet(viewsets.ReadOnlyModelViewSet):
@@ -50,9 +53,9 @@ class DoctorViewSet(viewsets.ReadOnlyModelViewSet):
         if specialty_slug:
             qs = qs.filter(specialty__slug=specialty_slug)
 
-        language = self.request.query_params.get('language')
+        language = DoctorProfile.language_code(self.request.query_params.get('language'))
         if language:
-            qs = qs.filter(languages__icontains=language)
+            qs = qs.filter(spoken_languages__code=language)
 
         min_price = self.request.query_params.get('min_price')
         max_price = self.request.query_params.get('max_price')
@@ -78,6 +81,38 @@ class DoctorViewSet(viewsets.ReadOnlyModelViewSet):
             return DoctorDetailSerializer
         return DoctorListSerializer
 
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """A page of doctors plus specialty, language, price band and mode counts (doctors.search)."""
+        params = request.query_params
+        page = max(int_param(params.get('page')) or 1, 1)
+        page_size = max(1, min(int_param(params.get('page_size')) or 20, 50))
+        try:
+            doctors, count, facets = search.search(
+                country=int_param(params.get('country')),
+                city=int_param(params.get('city')),
+                min_rating=decimal_param(params.get('min_rating')),
+                specialty=int_param(params.get('specialty')),
+                specialty_slug=params.get('specialty_slug') or None,
+                language=params.get('language') or None,
+                price_band=params.get('price_band') or None,
+                consultation_type=params.get('consultation_type') or None,
+                ordering=params.get('ordering') or 'rating',
+                offset=(page - 1) * page_size,
+                limit=page_size,
+            )
+        except ValueError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'count': count,
+            'next': (
+                replace_query_param(request.build_absolute_uri(), 'page', page + 1)
+                if page * page_size < count else None
+            ),
+            'results': DoctorListSerializer(doctors, many=True, context={'request': request}).data,
+            'facets': facets,
+        })
+
     @action(detail=True, methods=['get'])
     def availability(self, request, pk=None):
         doctor = self.get_object()
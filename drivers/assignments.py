@@ -0,0 +1,99 @@
+"""Per-driver cache of the ride and delivery currently in progress.
+
+Kept current by the state-transition methods (ride accept/complete/cancel,
+delivery accept/deliver) so that the GPS hot path can decide where to fan
+out a location without querying ``Ride`` or ``DeliveryRequest``. A cache miss
+(cold cache, evicted key) falls back to the database once and repopulates.
+Entries expire after ``DRIVER_ASSIGNMENT_CACHE_SECONDS`` to bound staleness
+from status changes made outside those methods (e.g. the admin).
+
+The database stays the source of truth and the cache only an accelerator.
+With a shared cache (Redis) a transition is seen by every worker at once
+and entries live 5 minutes by default. With a per-process cache, the other
+workers only see it once their entry expires, so entries live
+``LOCAL_TIMEOUT`` seconds by default.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from kudya_platform import versions
+
+ACTIVE_RIDE_STATUSES = ('accepted', 'arrived', 'in_progress')
+ACTIVE_DELIVERY_STATUSES = ('accepted', 'picked_up', 'in_transit')
+
+_KEY = 'driver_active_assignment:{}'
+SHARED_TIMEOUT = 300
+LOCAL_TIMEOUT = 5
+
+
+def _timeout():
+    configured = getattr(settings, 'DRIVER_ASSIGNMENT_CACHE_SECONDS', None)
+    if configured is not None:
+        return configured
+    return SHARED_TIMEOUT if versions.shared() else LOCAL_TIMEOUT
+
+
+def _load(driver_id: int) -> dict:
+    from rides.models import Ride
+    from .models import DeliveryRequest
+    return {
+        'ride': Ride.objects.filter(
+            driver_id=driver_id, status__in=ACTIVE_RIDE_STATUSES,
+        ).values_list('id', flat=True).first(),
+        'delivery': DeliveryRequest.objects.filter(
+            driver_id=driver_id, status__in=ACTIVE_DELIVERY_STATUSES,
+        ).values_list('id', flat=True).first(),
+    }
+
+
+def get_active_assignment(driver_id: int) -> dict:
+    """Return ``{'ride': id|None, 'delivery': id|None}`` for the driver."""
+    key = _KEY.format(driver_id)
+    assignment = cache.get(key)
+    if assignment is None:
+        assignment = _load(driver_id)
+        cache.set(key, assignment, _timeout())
+    return assignment
+
+
+def get_active_assignments(driver_ids) -> dict:
+    """Bulk variant of ``get_active_assignment`` keyed by driver id."""
+    keys = {_KEY.format(driver_id): driver_id for driver_id in driver_ids}
+    found = cache.get_many(keys.keys())
+    result = {keys[key]: value for key, value in found.items()}
+    for driver_id in set(keys.values()) - set(result):
+        result[driver_id] = get_active_assignment(driver_id)
+    return result
+
+
+def _update(driver_id: int, **changes) -> None:
+    if not driver_id:
+        return
+    key = _KEY.format(driver_id)
+    # This process' entry may predate another worker's transition
+    cached = cache.get(key) if versions.shared() else None
+    assignment = dict(cached or _load(driver_id))
+    assignment.update(changes)
+    cache.set(key, assignment, _timeout())
+
+
+def set_active_ride(driver_id: int, ride_id: int) -> None:
+    _update(driver_id, ride=ride_id)
+
+
+def clear_active_ride(driver_id: int, ride_id: int = None) -> None:
+    """Forget the active ride; with ``ride_id`` only if it is still that ride."""
+    if ride_id is not None and get_active_assignment(driver_id).get('ride') not in (ride_id, None):
+        return
+    _update(driver_id, ride=None)
+
+
+def set_active_delivery(driver_id: int, delivery_id: int) -> None:
+    _update(driver_id, delivery=delivery_id)
+
+
+def clear_active_delivery(driver_id: int, delivery_id: int = None) -> None:
+    """Forget the active delivery; with ``delivery_id`` only if it is still that one."""
+    if delivery_id is not None and get_active_assignment(driver_id).get('delivery') not in (delivery_id, None):
+        return
+    _update(driver_id, delivery=None)
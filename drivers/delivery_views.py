@@ -7,11 +7,16 @@ from django.db.models import Q, Avg, Count, Sum
 from django.utils import timezone
 from datetime import timedelta
 from .models import Driver, DriverLocation, DeliveryRequest, DriverRating
+from .assignments import get_active_assignment
+from .geo_index import driver_index
+from .location_ingest import latest_point, location_buffer
 from .serializers import (
     DriverSerializer, DriverLocationSerializer, DeliveryRequestSerializer,
-    DriverRatingSerializer, DriverStatsSerializer
+    DriverRatingSerializer, DriverStatsSerializer, LocationBatchSerializer
 )
+from realtime.broadcast import broadcast_driver_location
 import logging
+import math
 
 logger = logging.getLogger(__name__)
 
@@ -101,46 +106,19 @@ class DriverViewSet(viewsets.ModelViewSet):
         # Update driver's current location
         driver.update_location(latitude, longitude)
         
-        # Create location history entry
-        location = DriverLocation.objects.create(
+        # Create location history entry, tagged with the active delivery
+        DriverLocation.objects.create(
             driver=driver,
             latitude=latitude,
             longitude=longitude,
             accuracy=accuracy,
             speed=speed,
-            heading=heading
+            heading=heading,
+            delivery_request_id=get_active_assignment(driver.id).get('delivery'),
         )
-        
-        # If driver has active delivery, associate location with it
-        active_delivery = driver.delivery_requests.filter(
-            status__in=['accepted', 'picked_up', 'in_transit']
-        ).first()
-        
-        if active_delivery:
-            location.delivery_request = active_delivery
-            location.save()
 
         try:
-            from realtime.broadcast import broadcast_driver
-            broadcast_driver(driver.id, {
-                'type': 'location',
-                'driver_id': driver.id,
-                'latitude': str(latitude),
-                'longitude': str(longitude),
-            })
-            from rides.models import Ride
-            active_ride = Ride.objects.filter(
-                driver=driver,
-                status__in=['accepted', 'arrived', 'in_progress'],
-            ).first()
-            if active_ride:
-                from realtime.broadcast import broadcast_ride
-                broadcast_ride(active_ride.id, {
-                    'type': 'driver_location',
-                    'latitude': str(latitude),
-                    'longitude': str(longitude),
-                    'driver_id': driver.id,
-                })
+            broadcast_driver_location(driver.id, latitude, longitude)
         except Exception:
             pass
 
@@ -150,16 +128,40 @@ class DriverViewSet(viewsets.ModelViewSet):
             'longitude': longitude
         })
     
+    @action(detail=False, methods=['post'], url_path='locations')
+    def ingest_locations(self, request):
+        """Accept a batch of GPS pings for the authenticated driver.
+
+        Pings are buffered and persisted in bulk by a background writer; the
+        latest point is broadcast immediately.
+        """
+        if not hasattr(request.user, 'driver'):
+            return Response(
+                {'error': 'Only drivers can send locations'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        serializer = LocationBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        points = serializer.validated_data['points']
+        driver = request.user.driver
+        accepted = location_buffer.add(driver.id, points)
+        
+        latest = latest_point(points)
+        try:
+            broadcast_driver_location(driver.id, latest['latitude'], latest['longitude'])
+        except Exception:
+            pass
+        
+        return Response({'accepted': accepted}, status=status.HTTP_202_ACCEPTED)
+    
     @action(detail=True, methods=['get'])
     def stats(self, request, pk=None):
         """Get driver statistics"""
         driver = self.get_object()
         
         # Calculate earnings
-        today_earnings = driver.calculate_earnings('today')
-        week_earnings = driver.calculate_earnings('week')
-        month_earnings = driver.calculate_earnings('month')
-        total_earnings = driver.calculate_earnings('all')
+        earnings = driver.earnings_summary()
         
         # Get delivery stats
         total_deliveries = driver.delivery_requests.count()
@@ -175,10 +177,10 @@ class DriverViewSet(viewsets.ModelViewSet):
             'rejected_orders': driver.rejected_orders,
             'average_rating': float(driver.average_rating),
             'earnings': {
-                'today': float(today_earnings),
-                'week': float(week_earnings),
-                'month': float(month_earnings),
-                'total': float(total_earnings)
+                'today': float(earnings['today']),
+                'week': float(earnings['week']),
+                'month': float(earnings['month']),
+                'total': float(earnings['all'])
             }
         }
         
@@ -198,17 +200,26 @@ class DriverViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # This is a simplified version - in production, use PostGIS for proper geo queries
-        nearby_drivers = Driver.objects.filter(
+        try:
+            latitude, longitude = float(latitude), float(longitude)
+            radius_km = float(radius_km)
+            if not all(map(math.isfinite, (latitude, longitude, radius_km))):
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'Latitude, longitude and radius must be finite numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        driver_index.ensure_loaded()
+        matches = driver_index.within(latitude, longitude, radius_km)
+        drivers = Driver.objects.filter(
+            id__in=[driver_id for driver_id, _ in matches],
             is_online=True,
             is_available=True,
             is_verified=True,
-            current_latitude__isnull=False,
-            current_longitude__isnull=False
-        )
-        
-        # TODO: Implement proper distance calculation with PostGIS
-        # For now, return all available drivers
+        ).in_bulk()
+        nearby_drivers = [drivers[driver_id] for driver_id, _ in matches if driver_id in drivers]
         
         serializer = self.get_serializer(nearby_drivers, many=True)
         return Response(serializer.data)
@@ -464,13 +475,21 @@ def auto_assign_driver(request):
             status=status.HTTP_404_NOT_FOUND
         )
     
-    # Find nearest available driver
-    # This is simplified - in production, use proper geospatial queries
-    nearest_driver = Driver.objects.filter(
+    # Find nearest available driver whose service radius covers the pickup
+    driver_index.ensure_loaded()
+    candidates = driver_index.nearest(
+        delivery.pickup_latitude, delivery.pickup_longitude, k=5
+    )
+    drivers = Driver.objects.filter(
+        id__in=[driver_id for driver_id, _ in candidates],
         is_online=True,
         is_available=True,
-        is_verified=True
-    ).first()
+        is_verified=True,
+    ).in_bulk()
+    nearest_driver = next(
+        (drivers[driver_id] for driver_id, _ in candidates if driver_id in drivers),
+        None,
+    )
     
     if not nearest_driver:
         return Response(
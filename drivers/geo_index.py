@@ -0,0 +1,236 @@
+"""In-memory grid index of dispatchable drivers (online, available, verified).
+
+Drivers are bucketed into fixed-size lat/lng cells so nearby lookups only
+touch the cells around the query point instead of the whole fleet. The index
+is per process: it is kept current by ``Driver`` saves in this process and
+rebuilt from the database every ``DRIVER_INDEX_REFRESH_SECONDS`` so changes
+made by other workers are picked up.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.195
+DEFAULT_CELL_DEGREES = 0.01  # ~1.1 km at the equator
+MIN_CELL_DEGREES = 0.0025
+MAX_CELL_DEGREES = 0.08
+TARGET_CELL_OCCUPANCY = 8
+DEFAULT_MAX_RADIUS_KM = 50
+
+
+def haversine(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in km (float, unrounded)."""
+    p = math.pi / 180
+    a = (
+        0.5 - math.cos((lat2 - lat1) * p) / 2
+        + math.cos(lat1 * p) * math.cos(lat2 * p) * (1 - math.cos((lng2 - lng1) * p)) / 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(max(0.0, min(1.0, a))))
+
+
+def max_radius_km() -> float:
+    """Largest radius ``within`` searches (``DRIVER_NEARBY_MAX_RADIUS_KM``)."""
+    return float(getattr(settings, 'DRIVER_NEARBY_MAX_RADIUS_KM', DEFAULT_MAX_RADIUS_KM))
+
+
+def is_dispatchable(driver) -> bool:
+    return bool(
+        driver.is_online
+        and driver.is_available
+        and driver.is_verified
+        and driver.current_latitude is not None
+        and driver.current_longitude is not None
+    )
+
+
+class DriverGeoIndex:
+    """Grid-cell spatial index supporting within-radius and k-nearest queries."""
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES, adaptive: bool = True):
+        self.cell_degrees = cell_degrees
+        self.adaptive = adaptive
+        self._cells = {}     # (row, col) -> {driver_id: (lat, lng, service_radius_km)}
+        self._positions = {}  # driver_id -> (row, col)
+        self._lock = threading.RLock()
+        self._loaded_at = None
+
+    def __len__(self):
+        return len(self._positions)
+
+    def _cell(self, lat: float, lng: float):
+        return (int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees)))
+
+    def upsert(self, driver_id: int, lat: float, lng: float, service_radius_km: float = None) -> None:
+        lat, lng = float(lat), float(lng)
+        cell = self._cell(lat, lng)
+        with self._lock:
+            previous = self._positions.get(driver_id)
+            if previous is not None and previous != cell:
+                bucket = self._cells.get(previous)
+                if bucket is not None:
+                    bucket.pop(driver_id, None)
+                    if not bucket:
+                        del self._cells[previous]
+            self._cells.setdefault(cell, {})[driver_id] = (
+                lat, lng, float(service_radius_km) if service_radius_km else None,
+            )
+            self._positions[driver_id] = cell
+
+    def remove(self, driver_id: int) -> None:
+        with self._lock:
+            cell = self._positions.pop(driver_id, None)
+            if cell is None:
+                return
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.pop(driver_id, None)
+                if not bucket:
+                    del self._cells[cell]
+
+    def move(self, driver_id: int, lat: float, lng: float) -> None:
+        """Update the position of an already indexed driver; no-op otherwise."""
+        with self._lock:
+            cell = self._positions.get(driver_id)
+            if cell is None:
+                return
+            service_radius_km = self._cells[cell][driver_id][2]
+            self.upsert(driver_id, lat, lng, service_radius_km)
+
+    def sync(self, driver) -> None:
+        """Insert, move or drop a driver according to its current state."""
+        if is_dispatchable(driver):
+            self.upsert(driver.pk, driver.current_latitude, driver.current_longitude, driver.service_radius_km)
+        else:
+            self.remove(driver.pk)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cells.clear()
+            self._positions.clear()
+            self._loaded_at = None
+
+    def _fit_cell_size(self, rows) -> None:
+        """Resize cells so occupied cells hold about TARGET_CELL_OCCUPANCY drivers.
+
+        Keeps query cost roughly independent of fleet density: a dense city
+        gets small cells, a sparse one gets large cells.
+        """
+        if not rows:
+            return
+        size = self.cell_degrees
+        direction = None
+        for _ in range(8):
+            occupied = len({
+                (int(math.floor(float(lat) / size)), int(math.floor(float(lng) / size)))
+                for _, lat, lng, _ in rows
+            })
+            occupancy = len(rows) / occupied
+            if occupancy > TARGET_CELL_OCCUPANCY * 2 and direction != 'up' and size / 2 >= MIN_CELL_DEGREES:
+                size, direction = size / 2, 'down'
+            elif occupancy < TARGET_CELL_OCCUPANCY / 2 and direction != 'down' and size * 2 <= MAX_CELL_DEGREES:
+                size, direction = size * 2, 'up'
+            else:
+                break
+        self.cell_degrees = size
+
+    def load(self, rows) -> None:
+        """Replace the index contents with ``(id, lat, lng, service_radius_km)`` rows."""
+        rows = list(rows)
+        with self._lock:
+            if self.adaptive:
+                self._fit_cell_size(rows)
+            self._cells.clear()
+            self._positions.clear()
+            for driver_id, lat, lng, service_radius_km in rows:
+                self.upsert(driver_id, lat, lng, service_radius_km)
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self) -> None:
+        """Rebuild from the database when empty-and-unloaded or stale."""
+        max_age = getattr(settings, 'DRIVER_INDEX_REFRESH_SECONDS', 30)
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < max_age:
+            return
+        from .models import Driver
+        rows = Driver.objects.filter(
+            is_online=True,
+            is_available=True,
+            is_verified=True,
+            current_latitude__isnull=False,
+            current_longitude__isnull=False,
+        ).values_list('id', 'current_latitude', 'current_longitude', 'service_radius_km')
+        self.load(list(rows))
+
+    def _ring(self, center, radius: int):
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for c in range(col - radius, col + radius + 1):
+            yield (row - radius, c)
+            yield (row + radius, c)
+        for r in range(row - radius + 1, row + radius):
+            yield (r, col - radius)
+            yield (r, col + radius)
+
+    def _candidates(self, lat: float, lng: float, cells, radius_km: float, out: list) -> None:
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if not bucket:
+                continue
+            for driver_id, (d_lat, d_lng, service_radius) in bucket.items():
+                distance = haversine(lat, lng, d_lat, d_lng)
+                if distance > radius_km:
+                    continue
+                if service_radius is not None and distance > service_radius:
+                    continue
+                out.append((distance, driver_id))
+
+    def _min_cell_km(self, lat: float) -> float:
+        return self.cell_degrees * KM_PER_DEGREE * max(math.cos(math.radians(min(abs(lat), 89.0))), 0.01)
+
+    def within(self, lat: float, lng: float, radius_km: float):
+        """Return ``[(driver_id, distance_km), ...]`` within radius, nearest first.
+
+        Drivers whose own ``service_radius_km`` is smaller than the distance
+        are excluded. The radius is capped to ``max_radius_km()``; raises
+        ValueError on non-finite coordinates or radius.
+        """
+        lat, lng, radius_km = float(lat), float(lng), float(radius_km)
+        if not all(map(math.isfinite, (lat, lng, radius_km))):
+            raise ValueError("Coordinates and radius must be finite")
+        radius_km = min(radius_km, max_radius_km())
+        center = self._cell(lat, lng)
+        rings = int(math.ceil(radius_km / self._min_cell_km(lat)))
+        found = []
+        with self._lock:
+            for ring in range(rings + 1):
+                self._candidates(lat, lng, self._ring(center, ring), radius_km, found)
+        found.sort()
+        return [(driver_id, distance) for distance, driver_id in found]
+
+    def nearest(self, lat: float, lng: float, k: int = 1, max_radius_km: float = 50):
+        """Return up to ``k`` nearest ``(driver_id, distance_km)`` pairs.
+
+        Searches outwards ring by ring and stops once ``k`` drivers are found
+        closer than any cell not yet visited.
+        """
+        lat, lng, max_radius_km = float(lat), float(lng), float(max_radius_km)
+        center = self._cell(lat, lng)
+        cell_km = self._min_cell_km(lat)
+        max_rings = int(math.ceil(max_radius_km / cell_km))
+        found = []
+        with self._lock:
+            for ring in range(max_rings + 1):
+                self._candidates(lat, lng, self._ring(center, ring), max_radius_km, found)
+                if len(found) >= k:
+                    found.sort()
+                    if found[k - 1][0] <= ring * cell_km:
+                        break
+        found.sort()
+        return [(driver_id, distance) for distance, driver_id in found[:k]]
+
+
+driver_index = DriverGeoIndex()
@@ -0,0 +1,186 @@
+"""Buffered GPS ingest for driver location pings.
+
+Pings are appended to an in-process buffer and written by a background
+thread: one ``bulk_create`` of ``DriverLocation`` rows per flush plus one
+``bulk_update`` of each driver's latest position, instead of several
+queries per ping. Buffered pings not yet flushed are lost if the process
+dies, which is acceptable for location history. Setting
+``DRIVER_LOCATION_FLUSH_SECONDS = 0`` writes synchronously (used in tests).
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .assignments import get_active_assignments
+from .geo_index import driver_index
+
+logger = logging.getLogger(__name__)
+
+
+def latest_point(points):
+    """The newest of ``points`` by ``recorded_at``; the last one if any lacks it."""
+    if all(point.get('recorded_at') for point in points):
+        return max(points, key=lambda point: point['recorded_at'])
+    return points[-1]
+
+
+class LocationBuffer:
+    """Thread-safe ping buffer with a lazily started background writer."""
+
+    def __init__(self, flush_seconds: float = None, flush_size: int = None):
+        self.flush_seconds = flush_seconds
+        self.flush_size = flush_size
+        self._pings = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def _setting(self, name, default):
+        return getattr(settings, name, default)
+
+    def _flush_interval(self) -> float:
+        if self.flush_seconds is not None:
+            return self.flush_seconds
+        return self._setting('DRIVER_LOCATION_FLUSH_SECONDS', 1.0)
+
+    def add(self, driver_id: int, points) -> int:
+        """Queue ``points`` (dicts with latitude/longitude/...) for ``driver_id``."""
+        now = timezone.now()
+        rows = [
+            (
+                driver_id,
+                point['latitude'],
+                point['longitude'],
+                point.get('accuracy'),
+                point.get('speed'),
+                point.get('heading'),
+                point.get('recorded_at') or now,
+            )
+            for point in points
+        ]
+        flush_size = self.flush_size or self._setting('DRIVER_LOCATION_FLUSH_SIZE', 500)
+        with self._lock:
+            self._pings.extend(rows)
+            pending = len(self._pings)
+        if self._flush_interval() == 0:
+            self.flush()
+            return len(rows)
+        self._ensure_writer()
+        if pending >= flush_size:
+            self._wakeup.set()
+        return len(rows)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pings)
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of pings written."""
+        from .models import Driver, DriverLocation
+
+        with self._flush_lock:
+            with self._lock:
+                pings, self._pings = self._pings, []
+            if not pings:
+                return 0
+
+            known = set(
+                Driver.objects.filter(pk__in={ping[0] for ping in pings}).values_list('pk', flat=True)
+            )
+            pings = [ping for ping in pings if ping[0] in known]
+            if not pings:
+                return 0
+
+            latest = {}
+            for ping in pings:
+                current = latest.get(ping[0])
+                if current is None or ping[6] >= current[6]:
+                    latest[ping[0]] = ping
+
+            active_delivery = {
+                driver_id: assignment.get('delivery')
+                for driver_id, assignment in get_active_assignments(latest.keys()).items()
+            }
+
+            try:
+                with transaction.atomic():
+                    DriverLocation.objects.bulk_create(
+                        [
+                            DriverLocation(
+                                driver_id=driver_id,
+                                latitude=lat,
+                                longitude=lng,
+                                accuracy=accuracy,
+                                speed=speed,
+                                heading=heading,
+                                recorded_at=recorded_at,
+                                delivery_request_id=active_delivery.get(driver_id),
+                            )
+                            for driver_id, lat, lng, accuracy, speed, heading, recorded_at in pings
+                        ],
+                        batch_size=500,
+                    )
+                    Driver.objects.bulk_update(
+                        [
+                            Driver(
+                                pk=driver_id,
+                                current_latitude=lat,
+                                current_longitude=lng,
+                                last_location_update=recorded_at,
+                            )
+                            for driver_id, lat, lng, _, _, _, recorded_at in latest.values()
+                        ],
+                        ['current_latitude', 'current_longitude', 'last_location_update'],
+                        batch_size=500,
+                    )
+            except Exception:
+                self._requeue(pings)
+                raise
+            # bulk_update skips post_save, so move indexed drivers explicitly
+            for driver_id, lat, lng, *_ in latest.values():
+                driver_index.move(driver_id, lat, lng)
+            return len(pings)
+
+    def _requeue(self, pings) -> None:
+        # Keep failed pings for the next flush, bounded so a dead database
+        # cannot grow the buffer without limit
+        limit = 10 * (self.flush_size or self._setting('DRIVER_LOCATION_FLUSH_SIZE', 500))
+        with self._lock:
+            self._pings = (pings + self._pings)[-limit:]
+
+    def _ensure_writer(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='driver-location-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait(self._flush_interval() or 1.0)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception:
+                logger.exception("Driver location flush failed")
+            finally:
+                close_old_connections()
+
+
+location_buffer = LocationBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        location_buffer.flush()
+    except Exception:
+        logger.exception("Driver location flush at exit failed")
@@ -0,0 +1,55 @@
+"""Benchmark DriverGeoIndex query latency as the online fleet grows."""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from drivers.geo_index import DriverGeoIndex
+
+# Greater Luanda bounding box
+LAT_RANGE = (-9.10, -8.70)
+LNG_RANGE = (13.10, 13.50)
+
+
+class Command(BaseCommand):
+    help = "Measure within-radius and k-nearest latency for 1k..100k indexed drivers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000')
+        parser.add_argument('--queries', type=int, default=500)
+        parser.add_argument('--radius', type=float, default=1.0)
+        parser.add_argument('--k', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        sizes = [int(s) for s in options['sizes'].split(',') if s]
+        queries = [
+            (rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE))
+            for _ in range(options['queries'])
+        ]
+
+        self.stdout.write(f"{'drivers':>8} {'cell deg':>9} {'hits':>6} {'within p50 ms':>14} {'within p95 ms':>14} {'knn p50 ms':>11} {'knn p95 ms':>11}")
+        for size in sizes:
+            index = DriverGeoIndex()
+            index.load(
+                (i, rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE), rng.choice((5, 10, 15)))
+                for i in range(size)
+            )
+            radius = options['radius']
+            hits = sum(len(index.within(lat, lng, radius)) for lat, lng in queries) // len(queries)
+            within = self._time(lambda lat, lng: index.within(lat, lng, radius), queries)
+            knn = self._time(lambda lat, lng: index.nearest(lat, lng, k=options['k']), queries)
+            self.stdout.write(
+                f"{size:>8} {index.cell_degrees:>9.4f} {hits:>6} {within[0]:>14.3f} {within[1]:>14.3f} {knn[0]:>11.3f} {knn[1]:>11.3f}"
+            )
+
+    @staticmethod
+    def _time(fn, queries):
+        samples = []
+        for lat, lng in queries:
+            start = time.perf_counter()
+            fn(lat, lng)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        return samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
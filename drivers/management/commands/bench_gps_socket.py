@@ -0,0 +1,85 @@
+"""Simulate N drivers streaming GPS over the driver WebSocket.
+
+Uses an in-memory channel layer and one subscriber per driver on the
+public ``ws/drivers/<id>/`` stream, and reports frames/sec accepted plus the
+frame-to-subscriber latency. Throwaway drivers are deleted afterwards.
+"""
+import asyncio
+import random
+import time
+
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from drivers.models import Driver
+from realtime.routing import websocket_urlpatterns
+
+User = get_user_model()
+PREFIX = 'bench-gps-'
+
+
+class Command(BaseCommand):
+    help = "Benchmark the driver GPS WebSocket with simulated drivers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drivers', type=int, default=50)
+        parser.add_argument('--frames', type=int, default=20, help="Frames per driver")
+        parser.add_argument('--interval-ms', type=float, default=50, help="Delay between a driver's frames")
+
+    def handle(self, *args, **options):
+        User.objects.filter(username__startswith=PREFIX).delete()
+        drivers = []
+        for i in range(options['drivers']):
+            user = User.objects.create_user(username=f'{PREFIX}{i}', role='driver')
+            drivers.append((Driver.objects.create(user=user).id, str(RefreshToken.for_user(user).access_token)))
+        try:
+            with override_settings(
+                CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+                REALTIME_LOCATION_MAX_RATE=0,
+            ):
+                frames, elapsed, latencies = asyncio.run(self._run(drivers, options))
+        finally:
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+        latencies.sort()
+        self.stdout.write(f"drivers={len(drivers)} frames={frames} wall={elapsed:.2f}s")
+        self.stdout.write(f"throughput: {frames / elapsed:,.0f} frames/sec")
+        if latencies:
+            self.stdout.write(
+                f"frame->subscriber latency: p50={latencies[len(latencies) // 2]:.1f} ms "
+                f"p95={latencies[int(len(latencies) * 0.95)]:.1f} ms "
+                f"max={latencies[-1]:.1f} ms"
+            )
+
+    async def _run(self, drivers, options):
+        application = URLRouter(websocket_urlpatterns)
+        latencies = []
+
+        async def simulate(driver_id, token):
+            rng = random.Random(driver_id)
+            subscriber = WebsocketCommunicator(application, f'/ws/drivers/{driver_id}/')
+            await subscriber.connect()
+            socket = WebsocketCommunicator(application, f'/ws/driver/gps/?token={token}')
+            await socket.connect(timeout=10)
+            await socket.receive_json_from(timeout=10)
+            for _ in range(options['frames']):
+                sent = time.perf_counter()
+                await socket.send_json_to({
+                    'latitude': f'{rng.uniform(-9.1, -8.7):.7f}',
+                    'longitude': f'{rng.uniform(13.1, 13.5):.7f}',
+                })
+                await subscriber.receive_json_from(timeout=10)
+                latencies.append((time.perf_counter() - sent) * 1000)
+                await socket.receive_json_from(timeout=10)
+                await asyncio.sleep(options['interval_ms'] / 1000)
+            await socket.disconnect()
+            await subscriber.disconnect()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(simulate(driver_id, token) for driver_id, token in drivers))
+        elapsed = time.perf_counter() - start
+        return len(drivers) * options['frames'], elapsed, latencies
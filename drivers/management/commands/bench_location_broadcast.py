@@ -0,0 +1,71 @@
+"""Measure update_location request latency with inline vs dispatched broadcasts.
+
+A channel layer round trip is simulated with ``--layer-latency-ms`` (Redis
+in production typically costs 0.5-3 ms per group_send). Runs against the
+configured database with a throwaway driver that is deleted afterwards.
+"""
+import asyncio
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from drivers.delivery_views import DriverViewSet
+from drivers.models import Driver
+
+User = get_user_model()
+USERNAME = 'bench-broadcast-driver'
+
+
+class SlowLayer:
+    def __init__(self, latency):
+        self.latency = latency
+        self.sent = 0
+
+    async def group_send(self, group, message):
+        await asyncio.sleep(self.latency)
+        self.sent += 1
+
+
+class Command(BaseCommand):
+    help = "Compare update_location latency with synchronous and background broadcasts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--layer-latency-ms', type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        User.objects.filter(username=USERNAME).delete()
+        user = User.objects.create_user(username=USERNAME, role='driver')
+        driver = Driver.objects.create(user=user, is_online=True, is_verified=True)
+        view = DriverViewSet.as_view({'post': 'update_location'})
+        factory = APIRequestFactory()
+        layer = SlowLayer(options['layer_latency_ms'] / 1000)
+
+        try:
+            with mock.patch('realtime.broadcast._get_channel_layer', return_value=layer):
+                for label, sync in (('inline', True), ('dispatcher', False)):
+                    with override_settings(REALTIME_BROADCAST_SYNC=sync):
+                        samples = []
+                        for i in range(options['requests']):
+                            request = factory.post(
+                                f'/drivers/api/drivers/{driver.id}/update_location/',
+                                {'latitude': f'{-8.8 - i * 1e-5:.7f}', 'longitude': '13.2344'},
+                                format='json',
+                            )
+                            force_authenticate(request, user=user)
+                            start = time.perf_counter()
+                            view(request, pk=driver.id)
+                            samples.append((time.perf_counter() - start) * 1000)
+                    samples.sort()
+                    self.stdout.write(
+                        f"{label:>10}: p50={samples[len(samples) // 2]:.2f} ms "
+                        f"p95={samples[int(len(samples) * 0.95)]:.2f} ms "
+                        f"mean={sum(samples) / len(samples):.2f} ms"
+                    )
+            self.stdout.write(f"messages delivered to layer: {layer.sent}")
+        finally:
+            User.objects.filter(username=USERNAME).delete()
@@ -0,0 +1,81 @@
+"""Load test: sustained GPS pings/sec, per-ping ORM writes vs buffered ingest.
+
+Runs against the configured ``default`` database (SQLite locally, Postgres
+in production) using throwaway drivers that are deleted afterwards.
+"""
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from drivers.location_ingest import LocationBuffer
+from drivers.models import Driver, DriverLocation
+
+User = get_user_model()
+PREFIX = 'bench-ingest-'
+
+
+class Command(BaseCommand):
+    help = "Compare pings/sec for per-ping writes and the batched ingest buffer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drivers', type=int, default=200)
+        parser.add_argument('--pings', type=int, default=20, help="Pings per driver")
+        parser.add_argument('--batch', type=int, default=10, help="Pings per ingest request")
+
+    def handle(self, *args, **options):
+        rng = random.Random(3)
+        drivers = self._make_drivers(options['drivers'])
+        try:
+            tracks = {
+                driver: [
+                    {
+                        'latitude': Decimal(f"{rng.uniform(-9.1, -8.7):.7f}"),
+                        'longitude': Decimal(f"{rng.uniform(13.1, 13.5):.7f}"),
+                        'accuracy': 5.0,
+                    }
+                    for _ in range(options['pings'])
+                ]
+                for driver in drivers
+            }
+            total = sum(len(points) for points in tracks.values())
+
+            start = time.perf_counter()
+            for driver, points in tracks.items():
+                for point in points:
+                    driver.update_location(point['latitude'], point['longitude'])
+                    location = DriverLocation.objects.create(driver=driver, **point)
+                    active = driver.delivery_requests.filter(
+                        status__in=['accepted', 'picked_up', 'in_transit']
+                    ).first()
+                    if active:
+                        location.delivery_request = active
+                        location.save()
+            per_ping = total / (time.perf_counter() - start)
+
+            buffer = LocationBuffer(flush_seconds=3600, flush_size=10 ** 9)
+            batch = options['batch']
+            start = time.perf_counter()
+            for driver, points in tracks.items():
+                for i in range(0, len(points), batch):
+                    buffer.add(driver.id, points[i:i + batch])
+                    if buffer.pending() >= 2000:
+                        buffer.flush()
+            buffer.flush()
+            buffered = total / (time.perf_counter() - start)
+
+            self.stdout.write(f"database={connection.vendor} pings={total}")
+            self.stdout.write(f"per-ping ORM: {per_ping:,.0f} pings/sec")
+            self.stdout.write(f"buffered:     {buffered:,.0f} pings/sec")
+        finally:
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+    def _make_drivers(self, count):
+        User.objects.filter(username__startswith=PREFIX).delete()
+        users = User.objects.bulk_create(
+            [User(username=f"{PREFIX}{i}", role='driver') for i in range(count)]
+        )
+        return Driver.objects.bulk_create([Driver(user=user) for user in users])
@@ -6,8 +6,13 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 import logging
 
+from .assignments import clear_active_delivery, set_active_delivery
+from .geo_index import driver_index
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
@@ -107,19 +112,36 @@ class Driver(models.Model):
 
     def calculate_earnings(self, period='all'):
         """Calculate driver earnings for a period"""
+        summary = self.earnings_summary()
+        return summary.get(period, summary['all'])
+
+    def earnings_summary(self):
+        """Commission earned today, in the last 7 and 30 days and overall (one query)"""
         from order.models import Order
-        
-        orders = Order.objects.filter(driver=self, status=Order.DELIVERED)
-        
-        if period == 'today':
-            orders = orders.filter(created_at__date=timezone.now().date())
-        elif period == 'week':
-            orders = orders.filter(created_at__gte=timezone.now() - timezone.timedelta(days=7))
-        elif period == 'month':
-            orders = orders.filter(created_at__gte=timezone.now() - timezone.timedelta(days=30))
-        
-        total_earnings = sum(order.driver_commission for order in orders)
-        return total_earnings
+        from report.buckets import window_totals
+
+        now = timezone.localtime()
+        return window_totals(
+            Order.objects.filter(driver=self, status=Order.DELIVERED),
+            'driver_commission',
+            {
+                'today': now.replace(hour=0, minute=0, second=0, microsecond=0),
+                'week': now - timezone.timedelta(days=7),
+                'month': now - timezone.timedelta(days=30),
+                'all': None,
+            },
+        )
+
+
+@receiver(post_save, sender=Driver)
+def sync_driver_geo_index(sender, instance, **kwargs):
+    # Covers update_location as well as online/available/verified toggles
+    driver_index.sync(instance)
+
+
+@receiver(post_delete, sender=Driver)
+def drop_driver_from_geo_index(sender, instance, **kwargs):
+    driver_index.remove(instance.pk)
 
 
 class DriverLocation(models.Model):
@@ -130,7 +152,7 @@ class DriverLocation(models.Model):
     accuracy = models.FloatField(null=True, blank=True, help_text="GPS accuracy in meters")
     speed = models.FloatField(null=True, blank=True, help_text="Speed in km/h")
     heading = models.FloatField(null=True, blank=True, help_text="Direction in degrees")
-    recorded_at = models.DateTimeField(auto_now_add=True)
+    recorded_at = models.DateTimeField(default=timezone.now)
     
     # Associated delivery
     delivery_request = models.ForeignKey('DeliveryRequest', on_delete=models.SET_NULL, null=True, blank=True, related_name='location_updates')
@@ -260,6 +282,7 @@ class DeliveryRequest(models.Model):
         self.status = 'accepted'
         self.accepted_at = timezone.now()
         self.save()
+        set_active_delivery(self.driver_id, self.id)
         self.send_acceptance_notification()
 
     def reject_by_driver(self, reason=''):
@@ -267,6 +290,7 @@ class DeliveryRequest(models.Model):
         self.status = 'rejected'
         self.delivery_notes = reason
         self.save()
+        clear_active_delivery(self.driver_id, self.id)
         if self.driver:
             self.driver.increment_rejected_orders()
         self.find_next_available_driver()
@@ -287,6 +311,7 @@ class DeliveryRequest(models.Model):
         if signature:
             self.customer_signature = signature
         self.save()
+        clear_active_delivery(self.driver_id, self.id)
         
         # Update driver stats
         if self.driver:
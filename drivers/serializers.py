@@ -75,3 +75,16 @@ class DriverStatsSerializer(serializers.Serializer):
     rejected_orders = serializers.IntegerField()
     average_rating = serializers.FloatField()
     earnings = serializers.DictField()
+
+
+class LocationPingSerializer(serializers.Serializer):
+    latitude = serializers.DecimalField(max_digits=10, decimal_places=7, min_value=-90, max_value=90)
+    longitude = serializers.DecimalField(max_digits=10, decimal_places=7, min_value=-180, max_value=180)
+    accuracy = serializers.FloatField(required=False, allow_null=True)
+    speed = serializers.FloatField(required=False, allow_null=True)
+    heading = serializers.FloatField(required=False, allow_null=True)
+    recorded_at = serializers.DateTimeField(required=False, allow_null=True)
+
+
+class LocationBatchSerializer(serializers.Serializer):
+    points = LocationPingSerializer(many=True, allow_empty=False, max_length=500)
@@ -1,3 +1,181 @@
-from django.test import TestCase
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from drivers.assignments import get_active_assignment, set_active_ride
+from drivers.geo_index import DriverGeoIndex
+from drivers.models import DeliveryRequest, Driver, DriverLocation
+
+
+User = get_user_model()
+
+
+class DriverGeoIndexTests(TestCase):
+    def setUp(self):
+        self.index = DriverGeoIndex(adaptive=False)
+        # Luanda city centre and points roughly 1, 5 and 20 km away
+        self.index.upsert(1, -8.8383, 13.2344, 10)
+        self.index.upsert(2, -8.8473, 13.2344, 10)
+        self.index.upsert(3, -8.8833, 13.2344, 10)
+        self.index.upsert(4, -9.0183, 13.2344, 10)
+
+    def test_within_returns_nearest_first_and_respects_radius(self):
+        ids = [driver_id for driver_id, _ in self.index.within(-8.8383, 13.2344, 6)]
+
+        self.assertEqual(ids, [1, 2, 3])
+
+    def test_within_excludes_drivers_outside_their_service_radius(self):
+        self.index.upsert(3, -8.8833, 13.2344, 2)
+
+        ids = [driver_id for driver_id, _ in self.index.within(-8.8383, 13.2344, 6)]
+
+        self.assertEqual(ids, [1, 2])
+
+    def test_within_caps_the_radius_and_rejects_non_finite_values(self):
+        self.index.upsert(4, -9.0183, 13.2344, 100)
+
+        self.assertEqual([driver_id for driver_id, _ in self.index.within(-8.8383, 13.2344, 1e308)], [1, 2, 3, 4])
+        with self.settings(DRIVER_NEARBY_MAX_RADIUS_KM=15):
+            self.assertEqual([driver_id for driver_id, _ in self.index.within(-8.8383, 13.2344, 1e308)], [1, 2, 3])
+        for radius in ('inf', 'nan'):
+            with self.assertRaises(ValueError):
+                self.index.within(-8.8383, 13.2344, radius)
+
+    def test_nearest_returns_k_closest(self):
+        ids = [driver_id for driver_id, _ in self.index.nearest(-8.8480, 13.2344, k=2)]
+
+        self.assertEqual(ids, [2, 1])
+
+    def test_moved_and_removed_drivers_are_reindexed(self):
+        self.index.upsert(1, -9.0183, 13.2344, 10)
+        self.index.remove(2)
+
+        ids = [driver_id for driver_id, _ in self.index.within(-8.8383, 13.2344, 6)]
+
+        self.assertEqual(ids, [3])
+        self.assertEqual(len(self.index), 3)
+
+
+class NearbyDriversApiTests(APITestCase):
+    def setUp(self):
+        user = User.objects.create_user(username='dispatch@example.com', password='StrongPass123!')
+        self.client.force_authenticate(user)
+
+    def test_nearby_rejects_non_finite_radius(self):
+        for radius in ('inf', 'nan'):
+            response = self.client.get(
+                '/drivers/api/drivers/nearby/', {'latitude': '-8.8383', 'longitude': '13.2344', 'radius': radius},
+            )
+            self.assertEqual(response.status_code, 400)
+        response = self.client.get(
+            '/drivers/api/drivers/nearby/', {'latitude': '-8.8383', 'longitude': '13.2344', 'radius': '1e308'},
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(DRIVER_LOCATION_FLUSH_SECONDS=0)
+class DriverLocationIngestTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='driver@example.com', password='StrongPass123!', role='driver')
+        self.driver = Driver.objects.create(user=self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_batch_is_bulk_written_and_latest_point_becomes_current_position(self):
+        delivery = DeliveryRequest.objects.create(
+            driver=self.driver,
+            status='picked_up',
+            pickup_address='A',
+            pickup_latitude='-8.8383',
+            pickup_longitude='13.2344',
+            delivery_address='B',
+            delivery_latitude='-8.9000',
+            delivery_longitude='13.2344',
+            delivery_fee='100.00',
+            driver_commission='80.00',
+            platform_fee='20.00',
+        )
+
+        response = self.client.post(
+            '/drivers/api/drivers/locations/',
+            {'points': [
+                {'latitude': '-8.8383', 'longitude': '13.2344', 'recorded_at': '2026-01-01T10:00:00Z'},
+                {'latitude': '-8.8400', 'longitude': '13.2350', 'recorded_at': '2026-01-01T10:00:05Z'},
+            ]},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['accepted'], 2)
+        self.assertEqual(DriverLocation.objects.filter(driver=self.driver, delivery_request=delivery).count(), 2)
+        self.driver.refresh_from_db()
+        self.assertEqual(str(self.driver.current_latitude), '-8.8400000')
+        self.assertEqual(str(self.driver.current_longitude), '13.2350000')
+
+    def test_rejects_invalid_points(self):
+        response = self.client.post(
+            '/drivers/api/drivers/locations/',
+            {'points': [{'latitude': '123', 'longitude': '13.2344'}]},
+            format='json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(DriverLocation.objects.exists())
+
+
+class ActiveAssignmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='courier@example.com', password='StrongPass123!', role='driver')
+        self.driver = Driver.objects.create(user=user)
+        self.delivery = DeliveryRequest.objects.create(
+            driver=self.driver,
+            status='assigned',
+            pickup_address='A',
+            pickup_latitude='-8.8383',
+            pickup_longitude='13.2344',
+            delivery_address='B',
+            delivery_latitude='-8.9000',
+            delivery_longitude='13.2344',
+            delivery_fee='100.00',
+            driver_commission='80.00',
+            platform_fee='20.00',
+        )
+
+    def test_delivery_transitions_keep_the_cache_current(self):
+        self.delivery.accept_by_driver()
+        self.assertEqual(get_active_assignment(self.driver.id)['delivery'], self.delivery.id)
+
+        self.delivery.mark_delivered()
+        self.assertIsNone(get_active_assignment(self.driver.id)['delivery'])
+
+    def test_location_fan_out_does_not_query_the_database_when_warm(self):
+        self.delivery.accept_by_driver()
+
+        with mock.patch('realtime.broadcast._send') as send, self.assertNumQueries(0):
+            from realtime.broadcast import broadcast_driver_location
+            broadcast_driver_location(self.driver.id, '-8.8383', '13.2344')
+
+        self.assertEqual([call.args[0] for call in send.call_args_list], [f'driver_{self.driver.id}'])
+
+    def test_without_a_shared_cache_other_workers_transitions_are_seen_within_seconds(self):
+        self.assertIsNone(get_active_assignment(self.driver.id)['delivery'])
+        # Accepted through another worker, whose cache this process does not share
+        DeliveryRequest.objects.filter(pk=self.delivery.pk).update(status='accepted')
+
+        self.assertIsNone(get_active_assignment(self.driver.id)['delivery'])
+        later = time.time() + 6
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            self.assertEqual(get_active_assignment(self.driver.id)['delivery'], self.delivery.id)
+
+    def test_transitions_without_a_shared_cache_start_from_the_database(self):
+        self.assertIsNone(get_active_assignment(self.driver.id)['delivery'])
+        DeliveryRequest.objects.filter(pk=self.delivery.pk).update(status='accepted')
+
+        set_active_ride(self.driver.id, 7)
+
+        self.assertEqual(get_active_assignment(self.driver.id), {'ride': 7, 'delivery': self.delivery.id})
@@ -0,0 +1,51 @@
+"""Cached super-app home payload for ``home_modules``.
+
+The module cards are serialized once per language and country. Their titles
+and subtitles come from the language's translation bundle, which is already
+compiled and shared with ``translations_bundle``, not from per-module
+queries. Entries are keyed by the ``platform_modules`` and ``translations``
+versions and live ``PLATFORM_HOME_CACHE_TIMEOUT`` seconds (default 1
+day). Receivers in ``kudya_platform.models`` bump ``platform_modules`` on
+module, ``allowed_countries`` and country changes.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+
+from . import versions
+
+from . import translations
+
+SCOPE = "platform_modules"
+
+
+def invalidate() -> None:
+    versions.invalidate(SCOPE)
+
+
+def build(language, country_id=None) -> list:
+    from .models import PlatformModule
+    from .serializers import PlatformModuleSerializer
+
+    qs = PlatformModule.objects.filter(is_active=True)
+    if country_id:
+        qs = qs.filter(
+            models.Q(allowed_countries__isnull=True) |
+            models.Q(allowed_countries__id=country_id)
+        ).distinct()
+    return PlatformModuleSerializer(
+        qs, many=True,
+        context={'language': language, 'translations': translations.bundle(language).values},
+    ).data
+
+
+def modules(language, country_id=None) -> list:
+    key = (
+        f"platform:home:{versions.version(SCOPE)}:{versions.version(translations.SCOPE)}:"
+        f"{language}:{country_id or ''}"
+    )
+    data = cache.get(key)
+    if data is None:
+        data = build(language, country_id)
+        cache.set(key, data, getattr(settings, "PLATFORM_HOME_CACHE_TIMEOUT", 24 * 3600))
+    return data
@@ -1,5 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 
 
 class City(models.Model):
@@ -145,3 +147,24 @@ class AuditEvent(models.Model):
 
     def __str__(self):
         return f'{self.action} {self.target_type}:{self.target_id}'
+
+
+# Translation bundles (kudya_platform.translations) are recompiled when these change
+
+@receiver([post_save, post_delete], sender=Translation)
+def invalidate_translation_bundles(sender, **kwargs):
+    from kudya_platform import translations
+
+    transaction.on_commit(translations.invalidate)
+
+
+# The cached home payload (kudya_platform.home) is rebuilt when these change;
+# translation changes are covered by the bundle version it is keyed on
+
+@receiver([post_save, post_delete], sender=PlatformModule)
+@receiver(m2m_changed, sender=PlatformModule.allowed_countries.through)
+@receiver(post_delete, sender='services.Country')
+def invalidate_home_modules(sender, **kwargs):
+    from kudya_platform import home
+
+    transaction.on_commit(home.invalidate)
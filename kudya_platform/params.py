@@ -0,0 +1,22 @@
+"""Lenient query-string parsing shared by the search endpoints.
+
+Invalid values are ignored (None) rather than rejected, so a bad filter
+widens the search instead of failing it.
+"""
+from decimal import Decimal, InvalidOperation
+
+
+def int_param(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None  # Ignore invalid input
+
+
+def decimal_param(value):
+    """``value`` as a finite Decimal, else None (NaN and infinities included)."""
+    try:
+        number = Decimal(value) if value else None
+    except InvalidOperation:
+        return None
+    return number if number is None or number.is_finite() else None
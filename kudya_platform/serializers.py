@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from . import translations
 from .models import City, Translation, PlatformModule, CountryComplianceSetting, AuditEvent
 
 
@@ -28,37 +30,22 @@ class PlatformModuleSerializer(serializers.ModelSerializer):
             'gradient_start', 'gradient_end', 'order', 'requires_auth',
         ]
 
+    def _translations(self):
+        """``{key: value}`` of the context language, English filling the gaps.
+
+        Pass ``translations`` in the context (e.g. ``translations.bundle(...).values``)
+        when serializing many modules; otherwise the compiled bundle is used.
+        """
+        if 'translations' not in self.context:
+            self.context['translations'] = translations.bundle(self.context.get('language', 'en')).values
+        return self.context['translations']
+
     def get_title(self, obj):
-        lang = self.context.get('language', 'en')
-        t = Translation.objects.filter(
-            key=f'module.{obj.key}.title',
-            language=lang,
-            is_active=True,
-        ).first()
-        if t:
-            return t.value
-        t_en = Translation.objects.filter(
-            key=f'module.{obj.key}.title',
-            language='en',
-            is_active=True,
-        ).first()
-        return t_en.value if t_en else obj.get_key_display()
+        title = self._translations().get(f'module.{obj.key}.title')
+        return obj.get_key_display() if title is None else title
 
     def get_subtitle(self, obj):
-        lang = self.context.get('language', 'en')
-        t = Translation.objects.filter(
-            key=f'module.{obj.key}.subtitle',
-            language=lang,
-            is_active=True,
-        ).first()
-        if t:
-            return t.value
-        t_en = Translation.objects.filter(
-            key=f'module.{obj.key}.subtitle',
-            language='en',
-            is_active=True,
-        ).first()
-        return t_en.value if t_en else ''
+        return self._translations().get(f'module.{obj.key}.subtitle', '')
 
 
 class CountryComplianceSettingSerializer(serializers.ModelSerializer):
@@ -1,15 +1,25 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from services.models import Country
-from .models import AuditEvent, City, Translation, CountryComplianceSetting
+from . import translations
+from .models import AuditEvent, City, PlatformModule, Translation, CountryComplianceSetting
 
 
 User = get_user_model()
 
 
 class PlatformTranslationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def _translate(self, key, language, value, module='common'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Translation.objects.create(key=key, language=language, value=value, module=module)
+
     def test_translation_bundle_merges_english_fallback_with_requested_language(self):
         Translation.objects.create(
             key='common.greeting',
@@ -33,8 +43,93 @@ class PlatformTranslationTests(APITestCase):
         response = self.client.get('/api/translations/?lang=fr')
 
         self.assertEqual(response.status_code, 200)
-        self.assertEqual(response.data['common.greeting'], 'Bonjour')
-        self.assertEqual(response.data['common.checkout'], 'Checkout')
+        self.assertEqual(response.json()['common.greeting'], 'Bonjour')
+        self.assertEqual(response.json()['common.checkout'], 'Checkout')
+
+    def test_bundle_is_served_from_memory_with_an_etag(self):
+        self._translate('common.greeting', 'en', 'Hello')
+        self._translate('common.greeting', 'pt', 'Olá')
+        self._translate('food.menu', 'pt', 'Cardápio', module='food')
+
+        response = self.client.get('/api/translations/', {'lang': 'pt', 'module': 'common'})
+        etag = response['ETag']
+
+        self.assertEqual(response.json(), {'common.greeting': 'Olá'})
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/translations/', {'lang': 'pt', 'module': 'common'})
+            revalidated = self.client.get(
+                '/api/translations/', {'lang': 'pt', 'module': 'common'}, HTTP_IF_NONE_MATCH=etag,
+            )
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(revalidated.status_code, 304)
+
+        self._translate('common.checkout', 'en', 'Checkout')
+        changed = self.client.get('/api/translations/', {'lang': 'pt', 'module': 'common'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_delta_returns_changed_and_removed_keys(self):
+        self._translate('common.greeting', 'en', 'Hello')
+        bye = self._translate('common.bye', 'en', 'Bye')
+        version = translations.bundle('fr').version
+
+        self._translate('common.greeting', 'fr', 'Bonjour')
+        with self.captureOnCommitCallbacks(execute=True):
+            bye.delete()
+
+        delta = self.client.get('/api/translations/', {'lang': 'fr', 'since': version}).json()
+
+        self.assertEqual(delta['changed'], {'common.greeting': 'Bonjour'})
+        self.assertEqual(delta['removed'], ['common.bye'])
+        self.assertFalse(delta['full'])
+        unknown = self.client.get('/api/translations/', {'lang': 'fr', 'since': 'f' * 40}).json()
+        self.assertEqual((unknown['full'], unknown['changed']), (True, {'common.greeting': 'Bonjour'}))
+
+
+class HomeModulesTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.angola = Country.objects.create(name='Angola', code='AO', currency='AOA')
+        self.mozambique = Country.objects.create(name='Mozambique', code='MZ', currency='MZN')
+        self.food = PlatformModule.objects.create(key='food', route='/food', order=1)
+        self.rides = PlatformModule.objects.create(key='rides', route='/rides', order=2)
+        self.rides.allowed_countries.add(self.angola)
+        Translation.objects.create(key='module.food.title', language='en', value='Food', module='home')
+        Translation.objects.create(key='module.food.title', language='pt', value='Comida', module='home')
+        Translation.objects.create(key='module.food.subtitle', language='en', value='Restaurants', module='home')
+
+    def _home(self, **params):
+        response = self.client.get('/api/platform/home-modules/', params)
+        self.assertEqual(response.status_code, 200)
+        return [(module['key'], module['title'], module['subtitle']) for module in response.json()]
+
+    def test_payload_uses_one_translation_map_and_is_cached(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self._home(lang='pt', country=self.angola.id), [
+                ('food', 'Comida', 'Restaurants'), ('rides', 'Rides', ''),
+            ])
+        with self.assertNumQueries(0):
+            self._home(lang='pt', country=self.angola.id)
+
+        self.assertEqual(self._home(lang='pt', country=self.mozambique.id), [('food', 'Comida', 'Restaurants')])
+        self.assertEqual(self.client.get('/api/platform/home-modules/', {'country': 'x'}).status_code, 400)
+
+    def test_writes_invalidate_the_payload(self):
+        self.assertEqual(self._home(country=self.mozambique.id), [('food', 'Food', 'Restaurants')])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rides.allowed_countries.add(self.mozambique)
+        with self.captureOnCommitCallbacks(execute=True):
+            Translation.objects.create(key='module.rides.title', language='en', value='Taxi', module='home')
+        self.assertEqual(self._home(country=self.mozambique.id), [
+            ('food', 'Food', 'Restaurants'), ('rides', 'Taxi', ''),
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.food.is_active = False
+            self.food.save()
+        self.assertEqual(self._home(country=self.mozambique.id), [('rides', 'Taxi', '')])
 
 
 class CountryComplianceTests(APITestCase):
@@ -0,0 +1,117 @@
+"""Compiled translation bundles for ``translations_bundle``.
+
+A bundle is the ``{key: value}`` dict of one language and module (or all
+modules), English values filling the keys the language lacks. It is compiled
+in one query once per ``translations`` version, which receivers in
+``kudya_platform.models`` bump on every ``Translation`` save and delete. The
+compiled bundle is shared through the Django cache and kept in each process'
+memory, so steady-state requests do no database work.
+
+The bundle's version is the hash of its content, served as the ETag.
+Clients revalidating with ``If-None-Match`` get a 304. Clients passing
+``?since=<version>`` get only the keys changed or removed since that
+version, as long as the old content is still cached
+(``TRANSLATIONS_CACHE_TIMEOUT``, default 30 days). Otherwise they get
+every key, flagged ``full``.
+"""
+import hashlib
+import json
+import re
+import threading
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import versions
+
+SCOPE = "translations"
+FALLBACK_LANGUAGE = 'en'
+MAX_BUNDLES = 256  # kept in memory per process; modules come from the query string
+
+
+@dataclass(frozen=True)
+class Bundle:
+    catalog_version: int
+    version: str
+    values: dict
+    body: bytes
+
+
+def _timeout() -> int:
+    return getattr(settings, "TRANSLATIONS_CACHE_TIMEOUT", 30 * 24 * 3600)
+
+
+def _content_key(language, module, version) -> str:
+    return f"translations:content:{language}:{module or ''}:{version}"
+
+
+def compile_bundle(language, module=None) -> dict:
+    from .models import Translation
+
+    rows = Translation.objects.filter(language__in=[FALLBACK_LANGUAGE, language], is_active=True)
+    if module:
+        rows = rows.filter(module=module)
+    fallback, translated = {}, {}
+    for key, row_language, value in rows.order_by('module', 'key').values_list('key', 'language', 'value'):
+        (translated if row_language == language else fallback)[key] = value
+    return {**fallback, **translated}
+
+
+def _build(language, module, catalog_version) -> Bundle:
+    key = f"translations:bundle:{catalog_version}:{language}:{module or ''}"
+    cached = cache.get(key)
+    if cached is None:
+        values = compile_bundle(language, module)
+        body = json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode()
+        cached = (hashlib.sha1(body).hexdigest(), body)
+        cache.set(key, cached, _timeout())
+        # Kept by content version as the base of later deltas
+        cache.set(_content_key(language, module, cached[0]), values, _timeout())
+    version, body = cached
+    return Bundle(catalog_version, version, json.loads(body), body)
+
+
+_bundles = {}
+_lock = threading.Lock()
+
+
+def bundle(language, module=None) -> Bundle:
+    """The current bundle, from memory, then the cache, then the database."""
+    catalog_version = versions.version(SCOPE)
+    current = _bundles.get((language, module))
+    if current is None or current.catalog_version != catalog_version:
+        current = _build(language, module, catalog_version)
+        with _lock:
+            if len(_bundles) >= MAX_BUNDLES:
+                _bundles.clear()
+            _bundles[(language, module)] = current
+    return current
+
+
+def delta(language, module, since) -> dict:
+    """Changes since content version ``since``.
+
+    ``{"version", "full", "changed", "removed"}``; ``full`` (every key in
+    ``changed``) when ``since`` is no longer known.
+    """
+    current = bundle(language, module)
+    since = since.strip('"')
+    if since == current.version:
+        previous = current.values
+    elif re.fullmatch(r'[0-9a-f]{40}', since):
+        previous = cache.get(_content_key(language, module, since))
+    else:
+        previous = None
+    if previous is None:
+        return {'version': current.version, 'full': True, 'changed': current.values, 'removed': []}
+    return {
+        'version': current.version,
+        'full': False,
+        'changed': {key: value for key, value in current.values.items() if previous.get(key) != value},
+        'removed': sorted(previous.keys() - current.values.keys()),
+    }
+
+
+def invalidate() -> None:
+    versions.invalidate(SCOPE)
@@ -0,0 +1,62 @@
+"""Cache version counters shared by every app.
+
+Each scope (a store's products, the service index, exchange rates,
+translation bundles...) has a counter in the default cache. Readers key
+their cached data by ``version(scope)`` and writers call
+``invalidate(scope)``, so a bump makes every cached copy unreachable at once.
+
+Versions only reach every worker when the default cache is shared between
+processes (Redis, configured from ``REDIS_URL``). With a per-process cache
+(LocMem, the default without ``REDIS_URL``), a bump is only seen by the
+process that made it. So versions there expire after
+``CATALOG_LOCAL_TIMEOUT`` seconds (default 60), which bounds how long other
+processes serve stale data. ``timeout`` caps cache lifetimes the same way.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def shared() -> bool:
+    """Whether the default cache is shared by every process (so are the versions)."""
+    return settings.CACHES.get("default", {}).get("BACKEND") not in LOCAL_BACKENDS
+
+
+def local_timeout() -> int:
+    return getattr(settings, "CATALOG_LOCAL_TIMEOUT", 60)
+
+
+def timeout(name, default) -> int:
+    """Setting ``name``, else ``default`` seconds, capped to ``local_timeout()`` without a shared cache."""
+    configured = getattr(settings, name, None)
+    if configured is not None:
+        return configured
+    return default if shared() else min(default, local_timeout())
+
+
+def _version_key(scope) -> str:
+    return f"catalog:version:{scope}"
+
+
+def version(scope) -> int:
+    key = _version_key(scope)
+    current = cache.get(key)
+    if current is None:
+        # Start from a fresh value so data cached under an evicted
+        # version can never be served again
+        cache.add(key, time.time_ns(), None if shared() else local_timeout())
+        current = cache.get(key)
+    return current
+
+
+def invalidate(scope) -> None:
+    try:
+        cache.incr(_version_key(scope))
+    except ValueError:
+        pass  # no version yet: the next read starts a fresh one
@@ -1,14 +1,15 @@
-from django.db import models
-from rest_framework import viewsets
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework import status, viewsets
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
-from .models import City, Translation, PlatformModule, CountryComplianceSetting, AuditEvent
+from . import home, translations
+from .models import City, Translation, CountryComplianceSetting, AuditEvent
 from .serializers import (
     CitySerializer,
     TranslationSerializer,
-    PlatformModuleSerializer,
     CountryComplianceSettingSerializer,
     AuditEventSerializer,
 )
@@ -25,36 +26,42 @@ class CityViewSet(viewsets.ReadOnlyModelViewSet):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def translations_bundle(request):
-    """Return all translations for a language/module as key-value dict."""
+    """Return all translations for a language/module as key-value dict.
+
+    The compiled bundle's version is its ETag; ``?since=<version>`` returns
+    only the keys changed since then (see ``kudya_platform.translations``).
+    """
     language = request.query_params.get('lang', 'en')
-    module = request.query_params.get('module')
-    qs = Translation.objects.filter(language__in=['en', language], is_active=True)
-    if module:
-        qs = qs.filter(module=module)
-    bundle = {}
-    for item in qs.filter(language='en'):
-        bundle[item.key] = item.value
-    for item in qs.filter(language=language):
-        bundle[item.key] = item.value
-    return Response(bundle)
+    if language not in dict(Translation.LANGUAGE_CHOICES):
+        language = translations.FALLBACK_LANGUAGE  # same result: only the English values
+    module = request.query_params.get('module') or None
+    since = request.query_params.get('since')
+    if since:
+        response = Response(translations.delta(language, module, since))
+    else:
+        bundle = translations.bundle(language, module)
+        etag = f'"{bundle.version}"'
+        etags = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in etags or '*' in etags:
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(bundle.body, content_type='application/json')
+        response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'  # always revalidate; 304s are cheap
+    return response
 
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def home_modules(request):
-    """Super-app home service cards."""
+    """Super-app home service cards, cached per language and country."""
     language = request.query_params.get('lang', 'en')
-    country_id = request.query_params.get('country')
-    qs = PlatformModule.objects.filter(is_active=True)
-    if country_id:
-        qs = qs.filter(
-            models.Q(allowed_countries__isnull=True) |
-            models.Q(allowed_countries__id=country_id)
-        ).distinct()
-    serializer = PlatformModuleSerializer(
-        qs, many=True, context={'language': language, 'request': request}
-    )
-    return Response(serializer.data)
+    if language not in dict(Translation.LANGUAGE_CHOICES):
+        language = translations.FALLBACK_LANGUAGE  # same result: only the English titles
+    country_id = request.query_params.get('country') or None
+    if country_id is not None and not country_id.isdigit():
+        return Response({'country': 'Must be an integer id.'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(home.modules(language, country_id and int(country_id)))
 
 
 class CountryComplianceSettingViewSet(viewsets.ReadOnlyModelViewSet):
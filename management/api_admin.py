@@ -10,8 +10,7 @@ from contas.permissions import IsScopedPlatformAdmin, scope_queryset_for_user
 @permission_classes([IsScopedPlatformAdmin])
 def admin_dashboard(request):
     from order.models import Order
-    today = timezone.now().date()
-    week_ago = timezone.now() - timedelta(days=7)
+    today = timezone.localdate()
     scoped_orders = scope_queryset_for_user(
         request.user,
         Order.objects.all(),
@@ -19,9 +18,20 @@ def admin_dashboard(request):
         city_lookup='customer__user__city',
     )
 
+    # Last 7 days including today: closed days from the city rollups
+    from report.models import CityDailyRollup
+    from report.rollups import rollup_totals
+    scoped_rollups = scope_queryset_for_user(
+        request.user,
+        CityDailyRollup.objects.all(),
+        country_lookup='country',
+        city_lookup='city',
+    )
     data = {
         'orders_today': scoped_orders.filter(created_at__date=today).count(),
-        'orders_week': scoped_orders.filter(created_at__gte=week_ago).count(),
+        'orders_week': rollup_totals(
+            scoped_rollups.filter(day__gte=today - timedelta(days=6)), scoped_orders, ('orders',),
+        )['orders'],
     }
     try:
         from rides.models import Ride
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Coupon, Order, OrderDetails
+from .models import Coupon, Order, OrderDetails, OrderSideEffect
 
 class CouponAdmin(admin.ModelAdmin):
     list_display = ("code", "user", "discount_percentage", "order_count")
@@ -110,3 +110,13 @@ admin.site.register(Coupon, CouponAdmin)
 admin.site.register(Order, OrderAdmin)
 admin.site.register(OrderDetails, OrderDetailsAdmin)
 
+
+class OrderSideEffectAdmin(admin.ModelAdmin):
+    list_display = ("key", "order", "kind", "status", "attempts", "updated_at")
+    list_filter = ("status", "kind")
+    search_fields = ("key", "order__id")
+    readonly_fields = ("key", "attempts", "last_error", "created_at", "updated_at", "completed_at")
+
+
+admin.site.register(OrderSideEffect, OrderSideEffectAdmin)
+
@@ -0,0 +1,134 @@
+"""Build checkout orders from carts with a constant number of queries.
+
+``load_products`` fetches every product referenced by one or more carts in a
+single ``in_bulk`` query; ``price_cart`` computes the totals from that
+snapshot and ``create_orders`` saves the orders and ``bulk_create``s their
+details inside one transaction, so a failure never leaves a half-created
+checkout behind. Multi-store checkouts go through the same transaction: either
+every store's order is created or none is.
+"""
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db import transaction
+
+from stores.models.product import Product
+
+from .models import Order, OrderDetails
+from .tasks import schedule_order_created
+
+
+class OrderBuildError(Exception):
+    def __init__(self, message, store_id=None, product_id=None):
+        super().__init__(message)
+        self.store_id = store_id
+        self.product_id = product_id
+
+
+@dataclass
+class Cart:
+    """One store's part of a checkout.
+
+    ``lines`` are ``{"product_id": ..., "quantity": ...}`` dicts as posted by
+    the apps; ``fields`` are extra ``Order`` fields (address, payment method…).
+    """
+    store_id: int
+    lines: list
+    delivery_fee: Decimal = Decimal(0)
+    coupon: object = None
+    fields: dict = field(default_factory=dict)
+
+
+@dataclass
+class PricedCart:
+    cart: Cart
+    details: list  # [(product, quantity, sub_total)]
+    order_total: Decimal
+    original_total: Decimal
+
+    @property
+    def discount_amount(self):
+        if self.cart.coupon is None:
+            return Decimal(0)
+        return (self.order_total * Decimal(self.cart.coupon.discount_percentage)) / 100
+
+    @property
+    def driver_commission(self):
+        return (self.order_total * Order.DRIVER_COMMISSION_PERCENTAGE_DEFAULT) / 100
+
+    @property
+    def total(self):
+        return self.order_total + self.cart.delivery_fee - self.discount_amount
+
+
+def _quantity(line, store_id):
+    try:
+        quantity = int(line["quantity"])
+    except (KeyError, TypeError, ValueError):
+        raise OrderBuildError("Invalid quantity.", store_id=store_id, product_id=line.get("product_id"))
+    if quantity < 1:
+        raise OrderBuildError("Invalid quantity.", store_id=store_id, product_id=line.get("product_id"))
+    return quantity
+
+
+def _product_id(line, store_id):
+    try:
+        return int(line["product_id"])
+    except (KeyError, TypeError, ValueError):
+        raise OrderBuildError("Invalid product.", store_id=store_id, product_id=line.get("product_id"))
+
+
+def load_products(carts) -> dict:
+    """``{id: Product}`` for every line of ``carts`` in one query."""
+    ids = {_product_id(line, cart.store_id) for cart in carts for line in cart.lines}
+    return Product.objects.in_bulk(ids)
+
+
+def price_cart(cart, products) -> PricedCart:
+    """Totals and detail rows of ``cart`` from the ``products`` snapshot."""
+    details, order_total, original_total = [], Decimal(0), Decimal(0)
+    for line in cart.lines:
+        product_id = _product_id(line, cart.store_id)
+        product = products.get(product_id)
+        if product is None:
+            raise OrderBuildError(
+                f"Product with ID {product_id} not found.", store_id=cart.store_id, product_id=product_id,
+            )
+        quantity = _quantity(line, cart.store_id)
+        sub_total = product.price_with_markup * quantity
+        details.append((product, quantity, sub_total))
+        order_total += sub_total
+        original_total += product.price * quantity
+    return PricedCart(cart, details, order_total, original_total)
+
+
+def create_orders(customer, carts) -> list:
+    """Create one order per cart atomically; raises ``OrderBuildError``.
+
+    Invoices and emails are queued for after the commit.
+    """
+    products = load_products(carts)
+    priced = [price_cart(cart, products) for cart in carts]
+    orders = []
+    with transaction.atomic():
+        for priced_cart in priced:
+            cart = priced_cart.cart
+            order = Order.objects.create(
+                customer=customer,
+                store_id=cart.store_id,
+                total=priced_cart.total,
+                status=Order.PROCESSING,
+                original_price=priced_cart.original_total,
+                driver_commission=priced_cart.driver_commission,
+                delivery_fee=cart.delivery_fee,
+                discount_amount=priced_cart.discount_amount,
+                coupon=cart.coupon,
+                **cart.fields,
+            )
+            OrderDetails.objects.bulk_create([
+                OrderDetails(order=order, product=product, quantity=quantity, sub_total=sub_total)
+                for product, quantity, sub_total in priced_cart.details
+            ])
+            schedule_order_created(order)
+            orders.append(order)
+    return orders
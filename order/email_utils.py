@@ -22,7 +22,8 @@ def send_order_email(to_email, order, pdf_path, pdf_content, is_store=False):
     email_message = EmailMessage(
         subject, message, settings.DEFAULT_FROM_EMAIL, [to_email]
     )
-    email_message.attach(f"order_{order.id}.pdf", pdf_content, "application/pdf")
+    if pdf_content:
+        email_message.attach(f"order_{order.id}.pdf", pdf_content, "application/pdf")
     email_message.content_subtype = "html"
 
     try:
@@ -0,0 +1,71 @@
+"""Benchmark: invoices/sec of the previous renderer vs the warm, cached one.
+
+Renders ``--invoices`` synthetic invoices (``--lines`` items each) three ways:
+the previous code path (``render_to_string`` plus a ``NamedTemporaryFile``
+round-trip per invoice), the warm ``InvoiceRenderer`` with distinct contexts
+(every call renders), and the same contexts again (every call is a cache
+hit). Needs WeasyPrint.
+"""
+import os
+import tempfile
+import time
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+
+from order.utils import INVOICE_TEMPLATE, _weasyprint, renderer
+
+
+def legacy_render(context):
+    """The previous implementation (without leaking the temp file)."""
+    from weasyprint import HTML
+
+    html_string = render_to_string(INVOICE_TEMPLATE, context)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
+        HTML(string=html_string).write_pdf(temp_pdf.name)
+        temp_pdf.seek(0)
+        pdf_content = temp_pdf.read()
+    os.unlink(temp_pdf.name)
+    return pdf_content
+
+
+class Command(BaseCommand):
+    help = "Compare invoices/sec of the previous and the cached invoice renderer"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--invoices', type=int, default=50)
+        parser.add_argument('--lines', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if _weasyprint() is None:
+            raise CommandError("WeasyPrint is not installed")
+        contexts = [
+            {
+                "order_id": order_id,
+                "customer_name": "Bench Customer",
+                "address": "Rua 1, Luanda",
+                "order_details": [
+                    {"product_name": f"Item {line}", "quantity": 2, "sub_total": Decimal(100 + line)}
+                    for line in range(options['lines'])
+                ],
+                "order_total": Decimal(1000 + order_id),
+            }
+            for order_id in range(options['invoices'])
+        ]
+        for context in contexts:
+            cache.delete(renderer.cache_key(INVOICE_TEMPLATE, context))
+
+        self._report("legacy", lambda context: legacy_render(context), contexts)
+        self._report("warm renderer", lambda context: renderer.cached_pdf(INVOICE_TEMPLATE, context), contexts)
+        self._report("cache hits", lambda context: renderer.cached_pdf(INVOICE_TEMPLATE, context), contexts)
+
+    def _report(self, label, render, contexts):
+        start = time.perf_counter()
+        for context in contexts:
+            render(context)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:>14}: {len(contexts) / elapsed:9.1f} invoices/s ({elapsed * 1000 / len(contexts):.1f} ms each)"
+        )
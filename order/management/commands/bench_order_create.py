@@ -0,0 +1,108 @@
+"""Benchmark: per-line checkout queries vs the bulk order builder.
+
+Seeds one throwaway store with ``--lines`` products and creates orders for a
+1-line and a ``--lines``-line cart (default 50) with the previous checkout
+code and with ``order.builder.create_orders``, reporting query counts and
+wall time. Side effects queued after commit (invoice, emails) are left out of
+both measurements. Seeded rows are deleted afterwards unless ``--keep``.
+"""
+import time
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from customers.models import Customer
+from order.builder import Cart, create_orders
+from order.models import Order, OrderDetails
+from stores.models import Product, ProductCategory, Store
+
+User = get_user_model()
+PREFIX = 'bench-checkout-'
+
+
+def legacy_create_order(customer, store_id, lines, delivery_fee):
+    """The previous implementation: two product lookups and one insert per line."""
+    order_total = 0
+    original_total = 0
+    for item in lines:
+        product = Product.objects.get(id=item["product_id"])
+        order_total += product.price_with_markup * item["quantity"]
+        original_total += product.price * item["quantity"]
+    order = Order.objects.create(
+        customer=customer,
+        store_id=store_id,
+        total=order_total + delivery_fee,
+        status=Order.PROCESSING,
+        payment_method='cash',
+        original_price=original_total,
+        driver_commission=(order_total * Order.DRIVER_COMMISSION_PERCENTAGE_DEFAULT) / 100,
+        delivery_fee=delivery_fee,
+    )
+    for item in lines:
+        product = Product.objects.get(id=item["product_id"])
+        OrderDetails.objects.create(
+            order=order,
+            product_id=product.id,
+            quantity=item["quantity"],
+            sub_total=product.price_with_markup * item["quantity"],
+        )
+    return order
+
+
+class Command(BaseCommand):
+    help = "Compare query count and wall time of per-line and bulk order creation"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded rows")
+
+    def handle(self, *args, **options):
+        store, customer, products = self._seed(options['lines'])
+        delivery_fee = Decimal('5.00')
+        try:
+            self.stdout.write(f"database={connection.vendor}")
+            for size in sorted({1, options['lines']}):
+                lines = [{'product_id': product.id, 'quantity': 2} for product in products[:size]]
+                legacy_seconds, legacy_queries = self._measure(
+                    lambda: legacy_create_order(customer, store.id, lines, delivery_fee), options['repeat'])
+                cart = Cart(store_id=store.id, lines=lines, delivery_fee=delivery_fee,
+                            fields={'payment_method': 'cash'})
+                with mock.patch('order.builder.schedule_order_created'):
+                    new_seconds, new_queries = self._measure(
+                        lambda: create_orders(customer, [cart]), options['repeat'])
+                self.stdout.write(
+                    f"{size:>4} lines: legacy {legacy_queries:>4} queries {legacy_seconds * 1000:8.1f} ms | "
+                    f"builder {new_queries:>4} queries {new_seconds * 1000:8.1f} ms"
+                )
+        finally:
+            if not options['keep']:
+                User.objects.filter(username__startswith=PREFIX).delete()
+                ProductCategory.objects.filter(name__startswith=PREFIX).delete()
+
+    def _measure(self, run, repeat):
+        best = None
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(queries)
+
+    def _seed(self, lines):
+        User.objects.filter(username__startswith=PREFIX).delete()
+        ProductCategory.objects.filter(name__startswith=PREFIX).delete()
+        owner = User.objects.create(username=f"{PREFIX}owner")
+        store = Store.objects.create(user=owner, name='Bench', phone='0', address='Luanda', logo='x.png')
+        category = ProductCategory.objects.create(name=f"{PREFIX}category")
+        products = Product.objects.bulk_create([
+            Product(store=store, category=category, name=f"Item {i}", description='', price=Decimal(100 + i))
+            for i in range(lines)
+        ])
+        customer = Customer.objects.create(user=User.objects.create(username=f"{PREFIX}customer"))
+        return store, customer, products
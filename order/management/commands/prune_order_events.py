@@ -0,0 +1,25 @@
+"""Delete order stream events older than the retention window."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from order.models import OrderStreamEvent
+
+
+class Command(BaseCommand):
+    help = "Prune old store order stream events (clients further behind get a fresh snapshot)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=getattr(settings, 'ORDER_STREAM_RETENTION_DAYS', 7),
+            help="Keep events newer than this many days",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = OrderStreamEvent.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} order events older than {cutoff:%Y-%m-%d %H:%M}"))
@@ -0,0 +1,26 @@
+"""Re-enqueue orders whose background side effects are still pending."""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from order.models import OrderSideEffect
+from order.tasks import enqueue
+
+
+class Command(BaseCommand):
+    help = "Enqueue pending order side effects older than --minutes (e.g. after a broker outage)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=15)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(minutes=options['minutes'])
+        order_ids = set(
+            OrderSideEffect.objects.filter(
+                status=OrderSideEffect.PENDING, updated_at__lt=cutoff,
+            ).values_list('order_id', flat=True)
+        )
+        for order_id in order_ids:
+            enqueue(order_id)
+        self.stdout.write(self.style.SUCCESS(f"Enqueued side effects for {len(order_ids)} orders"))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0001_initial'),
+        ('stores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStreamEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(choices=[('created', 'Criado'), ('status', 'Estado alterado')], max_length=10)),
+                ('status', models.IntegerField(choices=[(1, 'PROCESSANDO'), (2, 'Pedido Pronto'), (3, 'A caminho'), (4, 'Entregue'), (5, 'Rejeitado'), (6, 'Verificado')])),
+                ('payload', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stream_events', to='order.order', verbose_name='Pedido')),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_events', to='stores.store', verbose_name='store')),
+            ],
+            options={
+                'verbose_name': 'Evento de pedido',
+                'verbose_name_plural': 'Eventos de pedidos',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['store', 'id'], name='order_order_store_i_0d5692_idx')],
+            },
+        ),
+    ]
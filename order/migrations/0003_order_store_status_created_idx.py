@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+        ('drivers', '0004_driverlocation_recorded_at_default'),
+        ('order', '0002_orderstreamevent'),
+        ('stores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['store', 'status', 'created_at'], name='order_order_store_i_2225f3_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0001_initial'),
+        ('drivers', '0004_driverlocation_recorded_at_default'),
+        ('order', '0003_order_store_status_created_idx'),
+        ('stores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['driver', 'status', 'created_at'], name='order_order_driver__c8b2c7_idx'),
+        ),
+    ]
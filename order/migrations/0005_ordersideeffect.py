@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0004_order_driver_status_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSideEffect',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('invoice', 'Fatura PDF'), ('customer_email', 'Email ao cliente'), ('store_email', 'Email à loja')], max_length=30)),
+                ('key', models.CharField(max_length=120, unique=True)),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('done', 'Concluído'), ('failed', 'Falhou')], db_index=True, default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='side_effects', to='order.order', verbose_name='Pedido')),
+            ],
+            options={
+                'verbose_name': 'Efeito do pedido',
+                'verbose_name_plural': 'Efeitos dos pedidos',
+                'ordering': ['id'],
+            },
+        ),
+    ]
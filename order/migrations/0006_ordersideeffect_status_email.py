@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0005_ordersideeffect'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ordersideeffect',
+            name='kind',
+            field=models.CharField(choices=[('invoice', 'Fatura PDF'), ('customer_email', 'Email ao cliente'), ('store_email', 'Email à loja'), ('status_email', 'Email de estado')], max_length=30),
+        ),
+    ]
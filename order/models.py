@@ -1,17 +1,14 @@
-import threading
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from customers.models import Customer
 from drivers.models import Driver
 
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
-from django.core.files.base import ContentFile
 import random
 import string
 
 
-from .utils import generate_invoice
 from django.conf import settings
 import logging
 
@@ -122,6 +119,13 @@ class Order(models.Model):
     driver_commission = models.DecimalField(
         max_digits=10, decimal_places=2, default=0.0
     )
+
+    class Meta:
+        indexes = [
+            # Store dashboards and reports filter by store and status over a date range
+            models.Index(fields=["store", "status", "created_at"]),
+            models.Index(fields=["driver", "status", "created_at"]),
+        ]
 ##########################################################################################
     def apply_coupon(self):
         print("Applying coupon...")
@@ -177,6 +181,51 @@ class Order(models.Model):
             return total_commission
         return 0
 
+    # Fields whose loaded values are kept to detect changes without a SELECT:
+    # the status and everything the daily rollups are computed from
+    TRACKED_FIELDS = (
+        "status",
+        "store_id",
+        "driver_id",
+        "customer_id",
+        "created_at",
+        "total",
+        "driver_commission",
+        "delivery_fee",
+        "original_price",
+        "payment_status_store",
+        "payment_status_driver",
+    )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_tracked()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_tracked()
+
+    def _remember_tracked(self, fields=None):
+        tracked = getattr(self, "_tracked", {})
+        for name in fields or self.TRACKED_FIELDS:
+            if name in self.__dict__:
+                tracked[name] = self.__dict__[name]
+        self._tracked = tracked
+
+    def _original(self):
+        """Unsaved copy of the order as it was loaded (None if new)."""
+        if self._state.adding or not self.pk:
+            return None
+        tracked = getattr(self, "_tracked", {})
+        if len(tracked) < len(self.TRACKED_FIELDS):
+            # Deferred fields, or an instance not loaded from the database
+            tracked = Order.objects.filter(pk=self.pk).values(*self.TRACKED_FIELDS).first()
+            if tracked is None:
+                return None
+        return Order(pk=self.pk, **tracked)
+
     def save(self, *args, **kwargs):
         if not self.pk:
             self.driver_commission_percentage = (
@@ -184,14 +233,33 @@ class Order(models.Model):
             )
         if not self.secret_pin:
             self.secret_pin = "".join(random.choices(string.digits, k=6))
-        if self.pk:
-            old_status = Order.objects.get(pk=self.pk).status
-            if old_status != self.status:
-                logger.info(f"Order status changed from {old_status} to {self.status}")
-                threading.Thread(target=self.send_status_update_email).start()
+        stream_event = OrderStreamEvent.CREATED if self._state.adding else None
+        previous = self._original()
+        status_changed = previous is not None and previous.status != self.status
+        if status_changed:
+            logger.info(f"Order status changed from {previous.status} to {self.status}")
+            stream_event = OrderStreamEvent.STATUS_CHANGED
         super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        self._remember_tracked(
+            [field.attname for field in map(self._meta.get_field, update_fields)] if update_fields else None
+        )
+        from report.rollups import track_order_change
+        track_order_change(previous, self)
+        if status_changed:
+            from .tasks import schedule_status_change
+            schedule_status_change(self)
+        if stream_event:
+            from .streams import record_order_event
+            order_id = self.pk
+            transaction.on_commit(lambda: record_order_event(order_id, stream_event), robust=True)
 
     def send_status_update_email(self):
+        """Email the customer and the store about the current status.
+
+        Runs from the side-effect pipeline after the status invoice was
+        rendered; attaches that invoice when there is one.
+        """
         logger.info(f"Sending status update email for order {self.id}")
         customer_email = self.customer.user.email
         store_email = self.store.user.email
@@ -206,11 +274,6 @@ class Order(models.Model):
         }
         subject = "Atualização de Status do Pedido"
         message = render_to_string("email_templates/order_status_update.html", context)
-        pdf_path, pdf_content = generate_invoice(self)
-        self.invoice_pdf.save(
-            f"order_{self.id}.pdf", ContentFile(pdf_content), save=False
-        )
-        self.save()
 
         email = EmailMessage(
             subject,
@@ -218,7 +281,9 @@ class Order(models.Model):
             settings.DEFAULT_FROM_EMAIL,
             [customer_email, store_email],
         )
-        email.attach(f"order_{self.id}.pdf", pdf_content, "application/pdf")
+        if self.invoice_pdf:
+            with self.invoice_pdf.open("rb") as invoice:
+                email.attach(f"order_{self.id}.pdf", invoice.read(), "application/pdf")
         email.content_subtype = "html"
         email.send()
         logger.info(f"Status update email sent for order {self.id}")
@@ -246,3 +311,87 @@ class OrderDetails(models.Model):
 
 
 
+
+
+class OrderStreamEvent(models.Model):
+    """Append-only log of order deltas pushed to store dashboards.
+
+    The auto-increment id is the resume cursor clients send back on
+    reconnect (``Last-Event-ID``).
+    """
+    CREATED = "created"
+    STATUS_CHANGED = "status"
+
+    EVENT_CHOICES = (
+        (CREATED, "Criado"),
+        (STATUS_CHANGED, "Estado alterado"),
+    )
+
+    store = models.ForeignKey(
+        "stores.Store", on_delete=models.CASCADE, related_name="order_events", verbose_name="store"
+    )
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="stream_events", verbose_name="Pedido"
+    )
+    event = models.CharField(max_length=10, choices=EVENT_CHOICES)
+    status = models.IntegerField(choices=Order.STATUS_CHOICES)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["store", "id"])]
+        verbose_name = "Evento de pedido"
+        verbose_name_plural = "Eventos de pedidos"
+
+    def __str__(self):
+        return f"{self.event} #{self.order_id} ({self.id})"
+
+
+class OrderSideEffect(models.Model):
+    """One background side effect of an order (invoice, email, ...).
+
+    ``key`` is the idempotency key: the pipeline creates each effect once
+    and skips it on retries or re-deliveries once it is ``done``.
+    """
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
+
+    STATUS_CHOICES = (
+        (PENDING, "Pendente"),
+        (DONE, "Concluído"),
+        (FAILED, "Falhou"),
+    )
+
+    INVOICE = "invoice"
+    CUSTOMER_EMAIL = "customer_email"
+    STORE_EMAIL = "store_email"
+    STATUS_EMAIL = "status_email"
+
+    KIND_CHOICES = (
+        (INVOICE, "Fatura PDF"),
+        (CUSTOMER_EMAIL, "Email ao cliente"),
+        (STORE_EMAIL, "Email à loja"),
+        (STATUS_EMAIL, "Email de estado"),
+    )
+
+    order = models.ForeignKey(
+        Order, on_delete=models.CASCADE, related_name="side_effects", verbose_name="Pedido"
+    )
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    key = models.CharField(max_length=120, unique=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        verbose_name = "Efeito do pedido"
+        verbose_name_plural = "Efeitos dos pedidos"
+
+    def __str__(self):
+        return f"{self.key} ({self.status})"
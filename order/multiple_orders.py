@@ -2,12 +2,10 @@ from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from contas.auth_helpers import AccessTokenError, user_from_access_token
 from customers.models import Customer
-from order.models import Order, OrderDetails
-from order.utils import generate_invoice
-from order.email_utils import send_order_email
-from stores.models.product import Product
+from order.builder import Cart, OrderBuildError, create_orders
+from order.models import Order
 from decimal import Decimal
-from django.core.files.base import ContentFile
+import urllib.parse
 
 @api_view(["POST"])
 def customer_add_multiple_orders(request):
@@ -22,19 +20,13 @@ def customer_add_multiple_orders(request):
     except Customer.DoesNotExist:
         return Response({"status": "failed", "error": "Customer profile not found."})
 
-    created_orders = []
-    order_pins = []
-    whatsapp_urls = []
+    # Validate every store first: a multi-store checkout is created in one
+    # transaction, so either all of its orders are placed or none is
+    carts = []
     errors = []
-
     for order_data in data.get("orders", []):
         store_id = order_data["store_id"]
-        address = order_data.get("address", "")
-        location = order_data.get("location", "")
         use_current_location = order_data.get("use_current_location", False)
-        delivery_fee = Decimal(order_data.get("delivery_fee", "0"))
-        payment_method = order_data["payment_method"]
-        delivery_notes = order_data.get("delivery_notes", "")
 
         existing_orders = Order.objects.filter(
             customer=customer, store_id=store_id
@@ -47,83 +39,46 @@ def customer_add_multiple_orders(request):
             })
             continue
 
-        order_total = 0
-        original_total = 0
-        order_details_data = order_data["order_details"]
-
-        try:
-            for item in order_details_data:
-                product = Product.objects.get(id=item["product_id"])
-                order_total += product.price_with_markup * item["quantity"]
-                original_total += product.price * item["quantity"]
-        except Product.DoesNotExist:
-            errors.append({
-                "store_id": store_id,
-                "error": f"Product with ID {item['product_id']} not found."
-            })
-            continue
-
-        driver_commission_percentage = Order.DRIVER_COMMISSION_PERCENTAGE_DEFAULT
-        driver_commission = (order_total * driver_commission_percentage) / 100
-        final_total = order_total + delivery_fee
-
+        carts.append(Cart(
+            store_id=store_id,
+            lines=order_data["order_details"],
+            delivery_fee=Decimal(order_data.get("delivery_fee", "0")),
+            fields={
+                "address": order_data.get("address", "") if not use_current_location else "",
+                "location": order_data.get("location", ""),
+                "use_current_location": use_current_location,
+                "payment_method": order_data["payment_method"],
+                "delivery_notes": order_data.get("delivery_notes", ""),
+            },
+        ))
+
+    if not errors:
         try:
-            order = Order.objects.create(
-                customer=customer,
-                store_id=store_id,
-                total=final_total,
-                status=Order.PROCESSING,
-                address=address if not use_current_location else "",
-                location=location,
-                use_current_location=use_current_location,
-                payment_method=payment_method,
-                original_price=original_total,
-                driver_commission=driver_commission,
-                delivery_fee=delivery_fee,
-                delivery_notes=delivery_notes,
-            )
-
-            for item in order_details_data:
-                product = Product.objects.get(id=item["product_id"])
-                OrderDetails.objects.create(
-                    order=order,
-                    product_id=product.id,
-                    quantity=item["quantity"],
-                    sub_total=product.price_with_markup * item["quantity"]
-                )
-
-            pdf_path, pdf_content = generate_invoice(order)
-            order.invoice_pdf.save(f"order_{order.id}.pdf", ContentFile(pdf_content), save=True)
-
-            send_order_email(to_email=customer.user.email, order=order, pdf_path=pdf_path, pdf_content=pdf_content)
-            send_order_email(to_email=order.store.user.email, order=order, pdf_path=pdf_path, pdf_content=pdf_content, is_store=True)
-
-            # WhatsApp integration (replace placeholder number)
-            phone_number = "customer_phone_number"
-            message = f"Olá {customer.user.get_full_name()}, pedido {order.id} recebido com sucesso. PIN: {order.secret_pin}."
-            whatsapp_url = f"https://wa.me/{phone_number}?text={urllib.parse.quote(message)}"
-
-            created_orders.append(order.id)
-            order_pins.append({"order_id": order.id, "pin": order.secret_pin})
-            whatsapp_urls.append(whatsapp_url)
+            orders = create_orders(customer, carts)
+        except OrderBuildError as e:
+            errors.append({"store_id": e.store_id, "error": str(e)})
         except Exception as e:
-            errors.append({
-                "store_id": store_id,
-                "error": str(e)
-            })
+            errors.append({"store_id": None, "error": str(e)})
 
     if errors:
         return Response({
-            "status": "partial_success",
-            "created_orders": created_orders,
-            "order_pins": order_pins,
-            "whatsapp_urls": whatsapp_urls,
+            "status": "failed",
+            "created_orders": [],
+            "order_pins": [],
+            "whatsapp_urls": [],
             "errors": errors
         })
 
+    whatsapp_urls = []
+    for order in orders:
+        # WhatsApp integration (replace placeholder number)
+        phone_number = "customer_phone_number"
+        message = f"Olá {customer.user.get_full_name()}, pedido {order.id} recebido com sucesso. PIN: {order.secret_pin}."
+        whatsapp_urls.append(f"https://wa.me/{phone_number}?text={urllib.parse.quote(message)}")
+
     return Response({
         "status": "success",
-        "created_orders": created_orders,
-        "order_pins": order_pins,
+        "created_orders": [order.id for order in orders],
+        "order_pins": [{"order_id": order.id, "pin": order.secret_pin} for order in orders],
         "whatsapp_urls": whatsapp_urls,
     })
@@ -0,0 +1,87 @@
+"""Bounded worker pool for order notifications.
+
+Status-change notifications used to start one thread per change. They now go
+through a fixed number of worker threads (``ORDER_NOTIFICATION_WORKERS``)
+fed by a bounded queue (``ORDER_NOTIFICATION_QUEUE_SIZE``). When the queue is
+full, ``submit`` waits up to ``ORDER_NOTIFICATION_SUBMIT_TIMEOUT`` seconds and
+then runs the job on the caller's thread, so bursts slow the producers down
+instead of piling up threads or dropping work. Set
+``ORDER_NOTIFICATIONS_SYNC = True`` to run jobs inline (used in tests).
+"""
+import logging
+import queue
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationPool:
+    """Fixed-size worker pool over a bounded job queue."""
+
+    def __init__(self, workers: int = None, queue_size: int = None, submit_timeout: float = None):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.submit_timeout = submit_timeout
+        self._queue = None
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _setting(self, value, name, default):
+        return value if value is not None else getattr(settings, name, default)
+
+    def submit(self, job, *args) -> bool:
+        """Queue ``job(*args)``; returns False if it had to run inline."""
+        if getattr(settings, 'ORDER_NOTIFICATIONS_SYNC', False):
+            self._run(job, args)
+            return False
+        jobs = self._ensure_workers()
+        timeout = self._setting(self.submit_timeout, 'ORDER_NOTIFICATION_SUBMIT_TIMEOUT', 2.0)
+        try:
+            jobs.put((job, args), timeout=timeout)
+        except queue.Full:
+            logger.warning("Notification queue full; running %s on the caller thread", job.__name__)
+            self._run(job, args)
+            return False
+        return True
+
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def join(self) -> None:
+        """Block until every queued job has run."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def _run(self, job, args) -> None:
+        try:
+            job(*args)
+        except Exception:
+            logger.exception("Order notification %s%r failed", job.__name__, args)
+
+    def _work(self) -> None:
+        while True:
+            job, args = self._queue.get()
+            try:
+                self._run(job, args)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._queue is None:
+                self._queue = queue.Queue(
+                    maxsize=self._setting(self.queue_size, 'ORDER_NOTIFICATION_QUEUE_SIZE', 100)
+                )
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for index in range(len(self._threads), self._setting(self.workers, 'ORDER_NOTIFICATION_WORKERS', 4)):
+                thread = threading.Thread(target=self._work, name=f'order-notifications-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            return self._queue
+
+
+pool = NotificationPool()
@@ -1,18 +1,15 @@
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 from customers.models import Customer
-from order.email_utils import send_order_email
-from order.models import Coupon, Order, OrderDetails
-from order.utils import generate_invoice
+from order.builder import Cart, OrderBuildError, create_orders
+from order.models import Coupon, Order
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from contas.auth_helpers import AccessTokenError, user_from_access_token
-from django.core.files.base import ContentFile
 from decimal import Decimal
 import urllib.parse
 import logging
 
-from stores.models.product import Product
 logger = logging.getLogger(__name__)
 
 @csrf_exempt
@@ -89,137 +86,36 @@ def customer_add_order(request):
     else:
         print("STEP 8: No coupon code provided")
 
-    # Calculate order totals
-    order_total = 0
-    original_total = 0
-    for item in order_details:
-        try:
-            product_obj = Product.objects.get(id=item["product_id"])
-            product_price_with_markup = product_obj.price_with_markup
-            order_total += product_price_with_markup * item["quantity"]
-            original_total += product_obj.price * item["quantity"]
-            print(f"STEP 9: Found product {product_obj}, subtotal={product_price_with_markup * item['quantity']}")
-        except Product.DoesNotExist:
-            print(f"STEP 9: Product with ID {item['product_id']} not found")
-            return Response(
-                {
-                    "status": "failed",
-                    "error": f"product with ID {item['product_id']} not found.",
-                }
-            )
-    print("STEP 9: Calculated totals - order_total:", order_total, "original_total:", original_total)
-
-    # Calculate driver commission
-    driver_commission_percentage = Order.DRIVER_COMMISSION_PERCENTAGE_DEFAULT
-    driver_commission = (order_total * driver_commission_percentage) / 100
-    print("STEP 10: Driver commission calculated:", driver_commission)
-
-    # Apply discount
-    discount_amount = Decimal(0)
-    if coupon:
-        discount_amount = (order_total * Decimal(coupon.discount_percentage)) / 100
-        print("STEP 11: Discount amount calculated:", discount_amount)
-    else:
-        print("STEP 11: No discount applied")
-
-    # Convert delivery fee to Decimal
-    delivery_fee = Decimal(data["delivery_fee"])
-    print("STEP 12: Delivery fee is:", delivery_fee)
-
-    # Final order total
-    final_total = order_total + delivery_fee - discount_amount
-    print("STEP 13: Final total (products + delivery fee - discount):", final_total)
-
-    # Create Order
+    # Price the cart from one product fetch and create the order and its
+    # details in one transaction; invoice and emails are queued after commit
+    cart = Cart(
+        store_id=data["store_id"],
+        lines=order_details,
+        delivery_fee=Decimal(data["delivery_fee"]),
+        coupon=coupon,
+        fields={
+            "address": address if not use_current_location else "",
+            "location": data["location"],
+            "use_current_location": data["use_current_location"],
+            "payment_method": data["payment_method"],
+            "delivery_notes": data.get("delivery_notes", ""),
+        },
+    )
     try:
-        order = Order.objects.create(
-            customer=customer,
-            store_id=data["store_id"],
-            total=final_total,
-            status=Order.PROCESSING,
-            address=address if not use_current_location else "",
-            location=data["location"],
-            use_current_location=data["use_current_location"],
-            payment_method=data["payment_method"],
-            original_price=original_total,
-            driver_commission=driver_commission,
-            delivery_fee=data["delivery_fee"],
-            discount_amount=discount_amount,
-            coupon=coupon,
-            delivery_notes=data.get("delivery_notes", ""),
-        )
-        print("STEP 14: Order object created:", order)
+        order, = create_orders(customer, [cart])
+        logger.info("Order %s created", order.id)
+    except OrderBuildError as e:
+        logger.info("Invalid cart: %s", e)
+        return Response({"status": "failed", "error": str(e)})
     except Exception as e:
-        print("STEP 14: Error creating order:", e)
-        logger.error(f"Error creating order: {e}")
+        logger.exception("Error creating order")
         return Response({"status": "failed", "error": "Error creating order."})
 
-    # Create Order details
-    for item in order_details:
-        try:
-            product_obj = Product.objects.get(id=item["product_id"])
-            product_price_with_markup = product_obj.price_with_markup
-            OrderDetails.objects.create(
-                order=order,
-                product_id=item["product_id"],
-                quantity=item["quantity"],
-                sub_total=product_price_with_markup * item["quantity"],
-            )
-            print(f"STEP 15: OrderDetails created for product {product_obj}")
-        except Exception as e:
-            print("STEP 15: Error creating order details:", e)
-            logger.error(f"Error creating order details: {e}")
-            return Response(
-                {"status": "failed", "error": "Error creating order details."}
-            )
-
-    # Generate invoice
-    try:
-        pdf_path, pdf_content = generate_invoice(order)
-        order.invoice_pdf.save(
-            f"order_{order.id}.pdf", ContentFile(pdf_content), save=False
-        )
-        order.save()
-        print("STEP 16: Invoice generated and saved")
-    except Exception as e:
-        print("STEP 16: Error generating invoice:", e)
-        logger.error(f"Error generating invoice: {e}")
-        return Response({"status": "failed", "error": "Error generating invoice."})
-
-    # Send email notifications
-    try:
-        send_order_email(
-            to_email=customer.user.email,
-            order=order,
-            pdf_path=pdf_path,
-            pdf_content=pdf_content,
-        )
-        store_email = order.store.user.email
-        send_order_email(
-            to_email=store_email,
-            order=order,
-            pdf_path=pdf_path,
-            pdf_content=pdf_content,
-            is_store=True,
-        )
-        print("STEP 17: Emails sent to customer and store")
-    except Exception as e:
-        print("STEP 17: Error sending email:", e)
-        logger.error(f"Error sending email: {e}")
-        return Response(
-            {
-                "status": "failed",
-                "error": "Erro ao enviar email. Por favor, tente novamente.",
-            }
-        )
-
     # Generate WhatsApp URL
     phone_number = "customer_phone_number"  # Replace with the actual phone number
     message = f"Olá {customer.user.get_full_name()}, seu pedido foi recebido com sucesso. Seu PIN secreto é {order.secret_pin}."
     whatsapp_url = f"https://wa.me/{phone_number}?text={urllib.parse.quote(message)}"
-    print("STEP 18: WhatsApp URL generated:", whatsapp_url)
-
-    print("STEP 19: Order creation complete. Returning success response.")
+    logger.info("Order %s creation complete", order.id)
     return Response(
         {
             "status": "success",
@@ -3,7 +3,7 @@ from rest_framework import serializers
 from customers.models import Customer
 from drivers.models import Driver
 from order.models import Order, OrderDetails
-from stores.models import product, store
+from stores.models import Product, Store
 
 
 class OrderCustomerSerializer(serializers.ModelSerializer):
@@ -24,13 +24,13 @@ class OrderDriverSerializer(serializers.ModelSerializer):
 
 class OrderstoreSerializer(serializers.ModelSerializer):
     class Meta:
-        model = store
+        model = Store
         fields = ("id", "name", "phone", "address", "location", "logo")
 
 
 class OrderproductSerializer(serializers.ModelSerializer):
     class Meta:
-        model = product
+        model = Product
         fields = ("id", "name", "price")
 
 
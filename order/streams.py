@@ -0,0 +1,98 @@
+"""Push-based order stream for store dashboards.
+
+``Order.save`` records an ``OrderStreamEvent`` when an order is created or
+changes status (after the transaction commits) and pushes it to the store's
+channel-layer group. The SSE view in ``stores.views`` subscribes to that group
+and only sends these deltas; the event id doubles as the resume cursor, so a
+reconnecting client (``Last-Event-ID`` / ``?cursor=``) is replayed what it
+missed instead of reloading every order.
+"""
+import json
+import logging
+
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+
+from realtime.broadcast import broadcast_store_orders
+
+from .models import Order, OrderStreamEvent
+from .serializers import OrderSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def store_orders_group(store_id: int) -> str:
+    return f'store_orders_{store_id}'
+
+
+def replay_limit() -> int:
+    return int(getattr(settings, 'ORDER_STREAM_REPLAY_LIMIT', 500))
+
+
+def stream_orders():
+    """Orders with everything ``OrderSerializer`` touches loaded up front."""
+    return (
+        Order.objects.select_related('customer__user', 'driver__user', 'store')
+        .prefetch_related('order_details__product')
+    )
+
+
+def serialize_orders(orders) -> list:
+    """JSON-safe ``OrderSerializer`` output (decimals, dates and files as strings)."""
+    return json.loads(JSONRenderer().render(OrderSerializer(orders, many=True).data))
+
+
+def record_order_event(order_id: int, event: str):
+    """Persist an order delta and push it to the store's subscribers."""
+    order = stream_orders().filter(pk=order_id).first()
+    if order is None:
+        return None
+    try:
+        payload = serialize_orders([order])[0]
+        stream_event = OrderStreamEvent.objects.create(
+            store_id=order.store_id,
+            order=order,
+            event=event,
+            status=order.status,
+            payload=payload,
+        )
+        broadcast_store_orders(order.store_id, event_message(stream_event))
+    except Exception:
+        # The order itself is saved; a lost delta is recovered on the next snapshot
+        logger.exception("Failed to record %s event for order %s", event, order_id)
+        return None
+    return stream_event
+
+
+def event_message(stream_event) -> dict:
+    return {
+        'type': 'order.event',
+        'id': stream_event.id,
+        'event': stream_event.event,
+        'order': stream_event.payload,
+    }
+
+
+def latest_cursor(store_id: int) -> int:
+    return (
+        OrderStreamEvent.objects.filter(store_id=store_id)
+        .order_by('-id').values_list('id', flat=True).first()
+    ) or 0
+
+
+def events_since(store_id: int, cursor: int):
+    """Messages after ``cursor`` in order, or None if too many to replay."""
+    limit = replay_limit()
+    events = list(
+        OrderStreamEvent.objects.filter(store_id=store_id, id__gt=cursor)
+        .order_by('id')[:limit + 1]
+    )
+    if len(events) > limit:
+        return None
+    return [event_message(stream_event) for stream_event in events]
+
+
+def snapshot(store_id: int):
+    """``(cursor, orders)`` for a client starting without a cursor."""
+    cursor = latest_cursor(store_id)
+    return cursor, serialize_orders(stream_orders().filter(store_id=store_id).order_by('-id'))
@@ -0,0 +1,155 @@
+"""Background side effects of orders (invoice PDF and emails).
+
+``schedule_order_created`` records one ``OrderSideEffect`` per effect, keyed
+by an idempotency key, and enqueues ``process_order_side_effects`` once the
+order has committed. The task runs the pending effects in order (the
+invoice first, so the emails can attach it), records attempts and errors
+per effect, and retries with exponential backoff. Effects that already
+completed are skipped, so retries and duplicate deliveries never render or
+send twice. Status changes are handled the same way by
+``schedule_status_change``, one invoice and one email per order/status pair.
+"""
+import logging
+
+from celery import shared_task
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from .email_utils import send_order_email
+from .models import Order, OrderSideEffect
+from .notifications import pool as notifications
+from .utils import generate_invoice
+
+logger = logging.getLogger(__name__)
+
+ORDER_CREATED_EFFECTS = (
+    OrderSideEffect.INVOICE,
+    OrderSideEffect.CUSTOMER_EMAIL,
+    OrderSideEffect.STORE_EMAIL,
+)
+STATUS_CHANGED_EFFECTS = (
+    OrderSideEffect.INVOICE,
+    OrderSideEffect.STATUS_EMAIL,
+)
+MAX_RETRIES = 5
+
+
+def schedule_order_created(order) -> None:
+    """Record the checkout side effects of ``order`` and enqueue them after commit."""
+    for kind in ORDER_CREATED_EFFECTS:
+        OrderSideEffect.objects.get_or_create(
+            key=f"order:{order.pk}:{kind}", defaults={"order": order, "kind": kind}
+        )
+    transaction.on_commit(lambda: enqueue(order.pk), robust=True)
+
+
+def schedule_status_change(order) -> None:
+    """Record the invoice and email for the order's new status and dispatch them.
+
+    Keys include the status, so each order/status pair renders at most one
+    invoice and sends at most one email, however often the status is saved.
+    Dispatch goes through the bounded notification pool after commit.
+    """
+    created = False
+    for kind in STATUS_CHANGED_EFFECTS:
+        created |= OrderSideEffect.objects.get_or_create(
+            key=f"order:{order.pk}:status:{order.status}:{kind}",
+            defaults={"order": order, "kind": kind},
+        )[1]
+    if created:
+        order_id = order.pk
+        transaction.on_commit(lambda: notifications.submit(enqueue, order_id), robust=True)
+
+
+def enqueue(order_id: int) -> None:
+    try:
+        process_order_side_effects.delay(order_id)
+    except Exception:
+        # Broker unavailable: the effects stay pending for the sweep command
+        logger.exception("Could not enqueue side effects for order %s", order_id)
+
+
+def _invoice_pdf(order):
+    if not order.invoice_pdf:
+        return None
+    with order.invoice_pdf.open("rb") as invoice:
+        return invoice.read()
+
+
+def _render_invoice(order) -> None:
+    invoice = generate_invoice(order)
+    if invoice is None:
+        return  # PDF rendering unavailable; emails go out without an attachment
+    name, pdf_content = invoice
+    if order.invoice_pdf and order.invoice_pdf.name.endswith(f"/{name}"):
+        return  # unchanged invoice (e.g. a status change) is already stored
+    order.invoice_pdf.save(name, ContentFile(pdf_content), save=False)
+    # update() rather than save(): the invoice is not an order change
+    Order.objects.filter(pk=order.pk).update(invoice_pdf=order.invoice_pdf.name)
+
+
+def _send_email(order, is_store: bool) -> None:
+    to_email = order.store.user.email if is_store else order.customer.user.email
+    send_order_email(
+        to_email=to_email,
+        order=order,
+        pdf_path=None,
+        pdf_content=_invoice_pdf(order),
+        is_store=is_store,
+    )
+
+
+HANDLERS = {
+    OrderSideEffect.INVOICE: _render_invoice,
+    OrderSideEffect.CUSTOMER_EMAIL: lambda order: _send_email(order, is_store=False),
+    OrderSideEffect.STORE_EMAIL: lambda order: _send_email(order, is_store=True),
+    OrderSideEffect.STATUS_EMAIL: lambda order: order.send_status_update_email(),
+}
+
+
+@shared_task(bind=True, max_retries=MAX_RETRIES, acks_late=True)
+def process_order_side_effects(self, order_id: int) -> dict:
+    """Run every pending side effect of an order; returns ``{key: status}``."""
+    order = (
+        Order.objects.select_related("customer__user", "store__user")
+        .filter(pk=order_id)
+        .first()
+    )
+    if order is None:
+        return {}
+    results, failed = {}, None
+    pending = order.side_effects.filter(status=OrderSideEffect.PENDING).order_by("id")
+    for effect_id in pending.values_list("id", flat=True):
+        with transaction.atomic():
+            # Row lock so a duplicate delivery of this task cannot run the same effect
+            effect = (
+                OrderSideEffect.objects.select_for_update(skip_locked=True)
+                .filter(pk=effect_id, status=OrderSideEffect.PENDING)
+                .first()
+            )
+            if effect is None:
+                continue
+            effect.attempts += 1
+            try:
+                with transaction.atomic():
+                    HANDLERS[effect.kind](order)
+            except Exception as exc:
+                logger.warning("Side effect %s failed (attempt %s)", effect.key, effect.attempts, exc_info=True)
+                effect.last_error = f"{type(exc).__name__}: {exc}"
+                if self.request.retries >= self.max_retries:
+                    effect.status = OrderSideEffect.FAILED
+                effect.save(update_fields=["attempts", "last_error", "status", "updated_at"])
+                results[effect.key] = effect.status
+                failed = exc
+                if effect.kind == OrderSideEffect.INVOICE:
+                    break  # the emails attach the invoice
+                continue
+            effect.status = OrderSideEffect.DONE
+            effect.last_error = ""
+            effect.completed_at = timezone.now()
+            effect.save(update_fields=["attempts", "last_error", "status", "completed_at", "updated_at"])
+            results[effect.key] = effect.status
+    if failed is not None and self.request.retries < self.max_retries:
+        raise self.retry(exc=failed, countdown=2 ** self.request.retries * 30)
+    return results
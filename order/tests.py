@@ -1,3 +1,341 @@
-from django.test import TestCase
+import json
+import threading
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from customers.models import Customer
+from order.builder import Cart, OrderBuildError, create_orders
+from order.models import Order, OrderDetails, OrderSideEffect, OrderStreamEvent
+from order.notifications import NotificationPool
+from order.streams import events_since
+from order.tasks import process_order_side_effects
+from order.utils import InvoiceRenderer, generate_invoice
+from stores.models import Product, ProductCategory, Store
+
+
+User = get_user_model()
+
+
+@override_settings(REALTIME_BROADCAST_SYNC=True, ORDER_NOTIFICATIONS_SYNC=True)
+class OrderStreamTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='store@example.com', password='StrongPass123!')
+        self.store = Store.objects.create(
+            user=owner, name='Loja', phone='900000000', address='Luanda', logo='store_logos/logo.png',
+        )
+        buyer = User.objects.create_user(username='buyer@example.com', password='StrongPass123!')
+        self.customer = Customer.objects.create(user=buyer)
+
+    def _create_order(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Order.objects.create(
+                customer=self.customer, store=self.store, total='100.00',
+                status=Order.PROCESSING, payment_method='cash',
+            )
+
+    @mock.patch.object(Order, 'send_status_update_email')
+    def test_created_and_status_changes_are_recorded_as_deltas(self, _):
+        order = self._create_order()
+        order.status = Order.READY
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        order.total = order.total
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+
+        events = list(OrderStreamEvent.objects.filter(store=self.store).values_list('event', 'status'))
+        self.assertEqual(events, [('created', Order.PROCESSING), ('status', Order.READY)])
+        self.assertEqual(OrderStreamEvent.objects.last().payload['id'], order.id)
+
+    def test_resume_replays_only_missed_events(self):
+        first = self._create_order()
+        cursor = OrderStreamEvent.objects.get(order=first).id
+        second = self._create_order()
+
+        replay = events_since(self.store.id, cursor)
+
+        self.assertEqual([message['order']['id'] for message in replay], [second.id])
+
+    @override_settings(ORDER_STREAM_REPLAY_LIMIT=1)
+    def test_resume_too_far_behind_falls_back_to_snapshot(self):
+        self._create_order()
+        self._create_order()
+
+        self.assertIsNone(events_since(self.store.id, 0))
+
+    async def test_stream_resumes_from_last_event_id(self):
+        first = await self._acreate_order()
+        second = await self._acreate_order()
+        cursor = await OrderStreamEvent.objects.filter(order=first).values_list('id', flat=True).afirst()
+
+        response = await self.async_client.get(
+            '/store/sse/', {'user_id': self.store.user_id}, headers={'Last-Event-ID': str(cursor)},
+        )
+        stream = response.streaming_content
+        try:
+            frame = (await anext(stream)).decode()
+        finally:
+            await stream.aclose()
+
+        self.assertIn('event: order', frame)
+        data = json.loads(frame.split('data: ', 1)[1])
+        self.assertEqual(data['order']['id'], second.id)
+
+    async def _acreate_order(self):
+        from asgiref.sync import sync_to_async
+        return await sync_to_async(self._create_order)()
+
+
+class CheckoutSideEffectTests(APITestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='store@example.com', email='store@example.com', password='x')
+        self.store = Store.objects.create(
+            user=owner, name='Loja', phone='900000000', address='Luanda', logo='store_logos/logo.png',
+        )
+        buyer = User.objects.create_user(username='buyer@example.com', email='buyer@example.com', password='x')
+        self.customer = Customer.objects.create(user=buyer)
+        self.token = Token.objects.get_or_create(user=buyer)[0].key
+        category = ProductCategory.objects.create(name='Comida')
+        self.product = Product.objects.create(
+            store=self.store, name='Prato', description='', price='10.00', category=category,
+        )
+        mail.outbox = []  # drop the store welcome email
+
+    def _checkout(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/order/orders/add/', {
+                'access_token': self.token,
+                'store_id': self.store.id,
+                'address': 'Rua 1',
+                'location': '',
+                'use_current_location': False,
+                'payment_method': 'cash',
+                'delivery_fee': '5.00',
+                'order_details': [{'product_id': self.product.id, 'quantity': 2}],
+            }, format='json')
+
+    def test_checkout_queues_invoice_and_emails_once(self):
+        response = self._checkout()
+
+        self.assertEqual(response.data['status'], 'success')
+        order = Order.objects.get()
+        self.assertEqual(
+            set(order.side_effects.values_list('kind', 'status')),
+            {('invoice', 'done'), ('customer_email', 'done'), ('store_email', 'done')},
+        )
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['buyer@example.com', 'store@example.com'])
+
+        process_order_side_effects.delay(order.id)
+
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_smtp_failure_does_not_fail_checkout_and_is_tracked(self):
+        with mock.patch('order.tasks.send_order_email', side_effect=OSError('smtp down')), \
+                self.assertLogs('order.tasks', level='WARNING'):
+            response = self._checkout()
+
+        self.assertEqual(response.data['status'], 'success')
+        effect = OrderSideEffect.objects.get(kind=OrderSideEffect.CUSTOMER_EMAIL)
+        self.assertEqual(effect.status, OrderSideEffect.FAILED)
+        self.assertEqual(effect.attempts, 6)
+        self.assertIn('smtp down', effect.last_error)
+
+
+@override_settings(ORDER_NOTIFICATIONS_SYNC=True)
+class StatusNotificationTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='store@example.com', email='store@example.com', password='x')
+        self.store = Store.objects.create(
+            user=owner, name='Loja', phone='900000000', address='Luanda', logo='store_logos/logo.png',
+        )
+        buyer = User.objects.create_user(username='buyer@example.com', email='buyer@example.com', password='x')
+        self.customer = Customer.objects.create(user=buyer)
+        with self.captureOnCommitCallbacks(execute=True):
+            Order.objects.create(
+                customer=self.customer, store=self.store, total='100.00',
+                status=Order.PROCESSING, payment_method='cash',
+            )
+        self.order = Order.objects.get()
+        mail.outbox = []
+
+    def _set_status(self, status):
+        self.order.status = status
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.save()
+
+    def test_status_change_is_detected_without_reloading_the_order(self):
+        self.order.status = Order.READY
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                self.order.save()
+
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT "order_order"')])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(sorted(mail.outbox[0].to), ['buyer@example.com', 'store@example.com'])
+
+    def test_each_order_status_pair_is_notified_once(self):
+        for status in (Order.READY, Order.ONTHEWAY, Order.READY, Order.ONTHEWAY):
+            self._set_status(status)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.order.save()  # no status change
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            sorted(self.order.side_effects.filter(kind=OrderSideEffect.STATUS_EMAIL).values_list('key', flat=True)),
+            [f'order:{self.order.pk}:status:{Order.READY}:status_email',
+             f'order:{self.order.pk}:status:{Order.ONTHEWAY}:status_email'],
+        )
+        self.assertEqual(self.order.side_effects.filter(kind=OrderSideEffect.INVOICE).count(), 2)
+
+
+class NotificationPoolTests(TestCase):
+    def test_full_queue_runs_jobs_on_the_caller_thread(self):
+        release, ran = threading.Event(), []
+        pool = NotificationPool(workers=1, queue_size=1, submit_timeout=0)
+
+        self.assertTrue(pool.submit(release.wait))  # occupies the only worker
+        while pool.pending():
+            time.sleep(0.001)
+        self.assertTrue(pool.submit(ran.append, 'queued'))
+        self.assertFalse(pool.submit(ran.append, 'inline'))
+        self.assertEqual(ran, ['inline'])
+
+        release.set()
+        pool.join()
+        self.assertEqual(ran, ['inline', 'queued'])
+
+
+class InvoiceCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        owner = User.objects.create_user(username='store@example.com', password='x')
+        store = Store.objects.create(
+            user=owner, name='Loja', phone='900000000', address='Luanda', logo='store_logos/logo.png',
+        )
+        buyer = User.objects.create_user(username='buyer@example.com', password='x')
+        self.order = Order.objects.create(
+            customer=Customer.objects.create(user=buyer), store=store, total='100.00',
+            status=Order.PROCESSING, payment_method='cash',
+        )
+
+    @mock.patch.object(InvoiceRenderer, 'render_pdf', return_value=b'%PDF-1.7')
+    def test_unchanged_invoice_is_rendered_once(self, render_pdf):
+        first = generate_invoice(self.order)
+        self.order.status = Order.READY  # not part of the invoice
+        second = generate_invoice(self.order)
+
+        self.assertEqual(first, second)
+        self.assertEqual(render_pdf.call_count, 1)
+
+        self.order.total = Decimal('120.00')
+        third = generate_invoice(self.order)
+
+        self.assertNotEqual(third[0], first[0])
+        self.assertEqual(render_pdf.call_count, 2)
+
+
+class OrderBuilderTests(APITestCase):
+    def setUp(self):
+        category = ProductCategory.objects.create(name='Comida')
+        self.stores, self.products = [], []
+        for name in ('a', 'b'):
+            owner = User.objects.create_user(username=f'{name}@example.com', email=f'{name}@example.com', password='x')
+            store = Store.objects.create(
+                user=owner, name=name, phone='900000000', address='Luanda', logo='store_logos/logo.png',
+            )
+            self.stores.append(store)
+            self.products.append([
+                Product.objects.create(store=store, name=f'{name}{i}', description='', price=Decimal(10 + i), category=category)
+                for i in range(20)
+            ])
+        buyer = User.objects.create_user(username='buyer@example.com', email='buyer@example.com', password='x')
+        self.customer = Customer.objects.create(user=buyer)
+        self.token = Token.objects.get_or_create(user=buyer)[0].key
+
+    def _cart(self, store_index, size):
+        return Cart(
+            store_id=self.stores[store_index].id,
+            lines=[{'product_id': product.id, 'quantity': 2} for product in self.products[store_index][:size]],
+            delivery_fee=Decimal('5.00'),
+            fields={'payment_method': 'cash'},
+        )
+
+    @mock.patch('order.builder.schedule_order_created')
+    def test_query_count_does_not_grow_with_cart_lines(self, _):
+        with CaptureQueriesContext(connection) as small:
+            create_orders(self.customer, [self._cart(0, 1)])
+        with CaptureQueriesContext(connection) as large:
+            order, = create_orders(self.customer, [self._cart(1, 20)])
+
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(order.order_details.count(), 20)
+        products = Product.objects.filter(store=self.stores[1])
+        order.refresh_from_db()
+        self.assertEqual(order.original_price, sum(product.price * 2 for product in products))
+        expected = sum(product.price_with_markup * 2 for product in products) + Decimal('5.00')
+        self.assertEqual(order.total, expected.quantize(Decimal('0.01')))
+
+    def test_missing_product_rolls_back_every_store(self):
+        cart = self._cart(1, 3)
+        cart.lines.append({'product_id': 999999, 'quantity': 1})
+
+        with self.assertRaises(OrderBuildError) as raised:
+            create_orders(self.customer, [self._cart(0, 3), cart])
+
+        self.assertEqual(raised.exception.store_id, self.stores[1].id)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderSideEffect.objects.exists())
+
+    @mock.patch('order.builder.schedule_order_created')
+    def test_product_ids_posted_as_strings_are_found(self, _):
+        cart = self._cart(0, 2)
+        cart.lines = [dict(line, product_id=str(line['product_id'])) for line in cart.lines]
+
+        order, = create_orders(self.customer, [cart])
+
+        self.assertEqual(order.order_details.count(), 2)
+        cart.lines.append({'product_id': 'abc', 'quantity': 1})
+        with self.assertRaises(OrderBuildError) as raised:
+            create_orders(self.customer, [cart])
+        self.assertEqual(str(raised.exception), 'Invalid product.')
+
+    def test_multi_store_checkout_is_all_or_nothing(self):
+        orders = [
+            {
+                'store_id': store.id,
+                'payment_method': 'cash',
+                'delivery_fee': '5.00',
+                'order_details': [{'product_id': products[0].id, 'quantity': 1}],
+            }
+            for store, products in zip(self.stores, self.products)
+        ]
+        orders[1]['order_details'].append({'product_id': 999999, 'quantity': 1})
+
+        response = self.client.post(
+            '/order/orders/add-multiple/', {'access_token': self.token, 'orders': orders}, format='json',
+        )
+
+        self.assertEqual(response.data['status'], 'failed')
+        self.assertEqual(response.data['errors'][0]['store_id'], self.stores[1].id)
+        self.assertFalse(Order.objects.exists())
+
+        orders[1]['order_details'].pop()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/order/orders/add-multiple/', {'access_token': self.token, 'orders': orders}, format='json',
+            )
+
+        self.assertEqual(response.data['status'], 'success')
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(OrderDetails.objects.count(), 2)
@@ -1,16 +1,109 @@
-from django.template.loader import render_to_string, get_template
-import tempfile
-from django.core.files.base import ContentFile
-from io import BytesIO
+"""Invoice PDF rendering.
 
+``generate_invoice`` renders an order's invoice through a warm
+``InvoiceRenderer``. The renderer keeps the compiled template, the WeasyPrint
+font configuration and fetched images (the logo) across calls. It renders
+into memory with no temporary files. PDFs are cached under a hash of the
+template source and the invoice context (``INVOICE_CACHE_TIMEOUT`` seconds,
+default 7 days). Re-rendering an unchanged invoice, e.g. on a status change,
+is therefore a cache hit.
+"""
+import hashlib
+import json
 import logging
+import threading
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.template.loader import get_template
 
 logger = logging.getLogger(__name__)
 
+INVOICE_TEMPLATE = "email_templates/order_invoice.html"
 
-def generate_invoice(order):
-    logger.info(f"Generating invoice for order {order.id}")
-    context = {
+
+@lru_cache(maxsize=1)
+def _weasyprint():
+    """``(HTML, FontConfiguration, default_url_fetcher)``, or None if unavailable."""
+    try:
+        from weasyprint import HTML, default_url_fetcher
+        from weasyprint.text.fonts import FontConfiguration
+    except (ImportError, OSError) as e:
+        logger.warning("WeasyPrint unavailable, skipping PDF rendering: %s", e)
+        return None
+    return HTML, FontConfiguration, default_url_fetcher
+
+
+class InvoiceRenderer:
+    """Renders templates to PDF bytes, reusing parsed state across calls."""
+
+    def __init__(self, max_resources: int = 64):
+        self.max_resources = max_resources
+        self._templates = {}  # name -> (template, source digest)
+        self._resources = {}  # url -> fetched resource
+        self._local = threading.local()  # FontConfiguration is not shared between threads
+        self._lock = threading.Lock()
+
+    def template(self, name):
+        """``(template, digest of its source)``, loaded once."""
+        if name not in self._templates:
+            template = get_template(name)
+            source = getattr(getattr(template, "template", None), "source", name)
+            self._templates[name] = (template, hashlib.sha256(source.encode()).hexdigest())
+        return self._templates[name]
+
+    def _fetch(self, url):
+        with self._lock:
+            resource = self._resources.get(url)
+        if resource is None:
+            fetched = _weasyprint()[2](url)
+            resource = {key: value for key, value in fetched.items() if key != "file_obj"}
+            if "file_obj" in fetched:
+                resource["string"] = fetched["file_obj"].read()
+            with self._lock:
+                if len(self._resources) < self.max_resources:
+                    self._resources[url] = resource
+        return dict(resource)
+
+    def render_pdf(self, template_name, context):
+        """PDF bytes of ``template_name`` rendered with ``context``, or None."""
+        weasyprint = _weasyprint()
+        if weasyprint is None:
+            return None
+        HTML, FontConfiguration, _ = weasyprint
+        template, _ = self.template(template_name)
+        if getattr(self._local, "font_config", None) is None:
+            self._local.font_config = FontConfiguration()
+        buffer = BytesIO()
+        HTML(string=template.render(context), url_fetcher=self._fetch).write_pdf(
+            buffer, font_config=self._local.font_config
+        )
+        return buffer.getvalue()
+
+    def cache_key(self, template_name, context):
+        _, source_digest = self.template(template_name)
+        payload = json.dumps(context, sort_keys=True, default=str)
+        return "invoice:" + hashlib.sha256(f"{source_digest}:{payload}".encode()).hexdigest()
+
+    def cached_pdf(self, template_name, context):
+        """``(cache key, PDF bytes or None)``, rendering only on a cache miss."""
+        key = self.cache_key(template_name, context)
+        pdf = cache.get(key)
+        if pdf is None:
+            pdf = self.render_pdf(template_name, context)
+            if pdf is not None:
+                cache.set(key, pdf, getattr(settings, "INVOICE_CACHE_TIMEOUT", 7 * 24 * 3600))
+        return key, pdf
+
+
+renderer = InvoiceRenderer()
+
+
+def invoice_context(order):
+    return {
         "order_id": order.id,
         "customer_name": order.customer.user.get_full_name(),
         "address": order.address,
@@ -20,27 +113,27 @@ def generate_invoice(order):
                 "quantity": detail.quantity,
                 "sub_total": detail.sub_total,
             }
-            for detail in order.order_details.all()
+            for detail in order.order_details.select_related("product")
         ],
         "order_total": order.total,
     }
-    html_string = render_to_string("email_templates/order_invoice.html", context)
-    try:
-        from weasyprint import HTML
-    except (ImportError, OSError) as e:
-        logger.warning("WeasyPrint unavailable, skipping PDF invoice: %s", e)
+
+
+def generate_invoice(order):
+    """``(file name, PDF bytes)`` for the order's invoice, or None without WeasyPrint.
+
+    The file name embeds the content hash, so an unchanged invoice keeps its name.
+    """
+    logger.info(f"Generating invoice for order {order.id}")
+    key, pdf_content = renderer.cached_pdf(INVOICE_TEMPLATE, invoice_context(order))
+    if pdf_content is None:
         return None
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
-        HTML(string=html_string).write_pdf(temp_pdf.name)
-        temp_pdf.seek(0)
-        pdf_content = temp_pdf.read()
     logger.info(f"Invoice generated for order {order.id}")
-    return temp_pdf.name, pdf_content
+    return f"order_{order.id}_{key.rsplit(':', 1)[1][:12]}.pdf", pdf_content
 
 
 def generate_pdf(template_src, context_dict):
-    template = get_template(template_src)
-    html = template.render(context_dict)
-    result = BytesIO()
-    pdf = HTML(string=html).write_pdf(result)
-    return ContentFile(result.getvalue(), "invoice.pdf")
+    pdf = renderer.render_pdf(template_src, context_dict)
+    if pdf is None:
+        return None
+    return ContentFile(pdf, "invoice.pdf")
@@ -1,7 +1,4 @@
-from datetime import timedelta
-from django.utils import timezone
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.http import FileResponse
 from order.email_utils import send_order_email
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -16,38 +13,38 @@ from stores.serializers import StoreSerializer
 from django.template.loader import render_to_string
 from django.core.files.base import ContentFile
 from django.shortcuts import get_object_or_404
-from .utils import generate_invoice, generate_pdf
+from report.models import StoreStatement
+from report.statements import PERIOD_LABELS, store_statement
+from .utils import generate_invoice
 
 
 @api_view(["GET"])
 def generate_store_invoices(request):
+    """Serve the store's last weekly/monthly statement from media storage."""
     if "store_id" not in request.GET:
         return Response({"error": "store ID is required."})
 
-    store_id = request.GET["store_id"]
-    store = Store.objects.get(id=store_id)
-
-    period = request.GET.get("period", "weekly")  # 'weekly' or 'monthly'
-
-    if period == "weekly":
-        start_date = timezone.now() - timedelta(days=7)
-    else:
-        start_date = timezone.now() - timedelta(days=30)
-
-    orders = Order.objects.filter(
-        store=store, created_at__gte=start_date
-    ).annotate(order_total=Sum("order_details__sub_total"))
-
-    context = {
-        "store_name": store.name,
-        "orders": orders,
-        "period": "Semana" if period == "weekly" else "Mês",
-    }
-
-    pdf = generate_pdf("email_templates/store_invoice.html", context)
-    response = HttpResponse(pdf, content_type="application/pdf")
-    response["Content-Disposition"] = f'attachment; filename="invoice_{period}.pdf"'
-    return response
+    store = Store.objects.filter(id=request.GET["store_id"]).first()
+    if store is None:
+        return Response({"error": "store not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    period = request.GET.get("period", StoreStatement.WEEKLY)
+    if period not in PERIOD_LABELS:
+        return Response(
+            {"error": "period must be 'weekly' or 'monthly'."}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    statement = store_statement(store, period)
+    if not statement.pdf:
+        return Response(
+            {"error": "Statement PDF unavailable."}, status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return FileResponse(
+        statement.pdf.open("rb"),
+        as_attachment=True,
+        filename=f"invoice_{period}.pdf",
+        content_type="application/pdf",
+    )
 
 
 @api_view(["GET"])
@@ -1,4 +1,23 @@
-"""Channel layer helpers for live ride and driver updates."""
+"""Channel layer helpers for live ride and driver updates.
+
+Messages are handed to a background dispatcher instead of being sent on the
+request thread. Status events are queued in order and retried up to
+``REALTIME_STATUS_MAX_ATTEMPTS`` times (default 5), then logged and dropped
+so one undeliverable message cannot hold back the rest; location events are coalesced per group (latest wins) and sent at
+most ``REALTIME_LOCATION_MAX_RATE`` times per second per group. Set
+``REALTIME_BROADCAST_SYNC = True`` to send inline (used in tests).
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LOCATION_TYPES = ('location', 'driver_location')
 
 
 def _get_channel_layer():
@@ -9,23 +28,187 @@ def _get_channel_layer():
         return None
 
 
-def broadcast_ride(ride_id: int, payload: dict) -> None:
-    layer = _get_channel_layer()
-    if not layer:
+class BroadcastDispatcher:
+    """Background sender with ordered status events and rate-limited locations."""
+
+    def __init__(self, location_max_rate: float = None, retry_seconds: float = 1.0, max_attempts: int = None):
+        self.location_max_rate = location_max_rate
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self._status = deque()        # (group, message, failed attempts) in arrival order
+        self._locations = {}          # group -> latest message
+        self._last_location = {}      # group -> monotonic time of last send
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def _location_interval(self) -> float:
+        rate = self.location_max_rate or getattr(settings, 'REALTIME_LOCATION_MAX_RATE', 1.0)
+        return 1.0 / rate if rate else 0.0
+
+    def _max_attempts(self) -> int:
+        return self.max_attempts or getattr(settings, 'REALTIME_STATUS_MAX_ATTEMPTS', 5)
+
+    def send_status(self, group: str, message: dict) -> None:
+        with self._cond:
+            self._status.append((group, message, 0))
+            self._cond.notify()
+        self._ensure_worker()
+
+    def send_location(self, group: str, message: dict) -> None:
+        with self._cond:
+            self._locations[group] = message
+            self._cond.notify()
+        self._ensure_worker()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._status) + len(self._locations)
+
+    def _take_batch(self):
+        """Wait for work, then pop all status events and every due location."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                interval = self._location_interval()
+                due, next_due = [], None
+                for group in self._locations:
+                    ready_at = self._last_location.get(group, 0.0) + interval
+                    if ready_at <= now:
+                        due.append(group)
+                    elif next_due is None or ready_at < next_due:
+                        next_due = ready_at
+                if len(self._last_location) > 10000:
+                    stale = now - max(interval, 60.0)
+                    self._last_location = {
+                        group: sent for group, sent in self._last_location.items() if sent > stale
+                    }
+                if self._status or due:
+                    statuses = list(self._status)
+                    self._status.clear()
+                    locations = [(group, self._locations.pop(group)) for group in due]
+                    for group in due:
+                        self._last_location[group] = now
+                    return statuses, locations
+                self._cond.wait(None if next_due is None else next_due - now)
+
+    def _requeue_statuses(self, statuses) -> None:
+        with self._cond:
+            self._status.extendleft(reversed(statuses))
+
+    def _send_statuses(self, loop, layer, statuses) -> bool:
+        """Send ``statuses`` in order; False when the rest was requeued for a retry."""
+        # One at a time so subscribers see status transitions in order
+        for index, (group, message, attempts) in enumerate(statuses):
+            try:
+                loop.run_until_complete(layer.group_send(group, message))
+            except Exception:
+                attempts += 1
+                if attempts >= self._max_attempts():
+                    logger.exception("Status broadcast to %s failed %s times; dropped", group, attempts)
+                    continue
+                logger.exception("Status broadcast to %s failed; retrying in %ss", group, self.retry_seconds)
+                self._requeue_statuses([(group, message, attempts)] + statuses[index + 1:])
+                return False
+        return True
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        while True:
+            statuses, locations = self._take_batch()
+            layer = _get_channel_layer()
+            if layer is None:
+                continue
+            delivered = self._send_statuses(loop, layer, statuses)
+            if locations:
+                try:
+                    loop.run_until_complete(
+                        asyncio.gather(*(layer.group_send(group, message) for group, message in locations))
+                    )
+                except Exception:
+                    logger.warning("Location broadcast failed", exc_info=True)
+            if not delivered:
+                time.sleep(self.retry_seconds)
+
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='realtime-broadcast', daemon=True)
+            self._thread.start()
+
+
+dispatcher = BroadcastDispatcher()
+
+
+def _send(group: str, message: dict, coalesce: bool) -> None:
+    if getattr(settings, 'REALTIME_BROADCAST_SYNC', False):
+        layer = _get_channel_layer()
+        if not layer:
+            return
+        from asgiref.sync import async_to_sync
+        async_to_sync(layer.group_send)(group, message)
         return
-    from asgiref.sync import async_to_sync
-    async_to_sync(layer.group_send)(
+    if coalesce:
+        dispatcher.send_location(group, message)
+    else:
+        dispatcher.send_status(group, message)
+
+
+def broadcast_ride(ride_id: int, payload: dict) -> None:
+    _send(
         f'ride_{ride_id}',
         {'type': 'ride_update', 'data': payload},
+        coalesce=payload.get('type') in LOCATION_TYPES,
     )
 
 
 def broadcast_driver(driver_id: int, payload: dict) -> None:
-    layer = _get_channel_layer()
-    if not layer:
-        return
-    from asgiref.sync import async_to_sync
-    async_to_sync(layer.group_send)(
+    _send(
         f'driver_{driver_id}',
         {'type': 'driver_location', 'data': payload},
+        coalesce=payload.get('type') in LOCATION_TYPES,
     )
+
+
+def broadcast_store_orders(store_id: int, message: dict) -> None:
+    """Queue an order event for the store's dashboard stream (never coalesced)."""
+    _send(f'store_orders_{store_id}', message, coalesce=False)
+
+
+def location_messages(driver_id: int, latitude, longitude, ride_id: int = None):
+    """``(group, message, ...)`` pairs for one driver position fan-out."""
+    messages = [(
+        f'driver_{driver_id}',
+        {'type': 'driver_location', 'data': {
+            'type': 'location',
+            'driver_id': driver_id,
+            'latitude': str(latitude),
+            'longitude': str(longitude),
+        }},
+    )]
+    if ride_id:
+        messages.append((
+            f'ride_{ride_id}',
+            {'type': 'ride_update', 'data': {
+                'type': 'driver_location',
+                'latitude': str(latitude),
+                'longitude': str(longitude),
+                'driver_id': driver_id,
+            }},
+        ))
+    return messages
+
+
+def broadcast_driver_location(driver_id: int, latitude, longitude) -> None:
+    """Fan a GPS position out to the driver's group and their active ride.
+
+    The active ride comes from the per-driver assignment cache, so this does
+    no database reads in steady state.
+    """
+    from drivers.assignments import get_active_assignment
+    ride_id = get_active_assignment(driver_id).get('ride')
+    for group, message in location_messages(driver_id, latitude, longitude, ride_id):
+        _send(group, message, coalesce=True)
@@ -1,5 +1,11 @@
+import asyncio
 import json
+import time
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
 
 
 class RideTrackingConsumer(AsyncJsonWebsocketConsumer):
@@ -33,3 +39,118 @@ class DriverLocationConsumer(AsyncJsonWebsocketConsumer):
 
     async def driver_location(self, event):
         await self.send_json(event['data'])
+
+
+def _handshake_token(scope):
+    """Access token from ``?token=`` / ``?access_token=`` or a Bearer header."""
+    query = parse_qs(scope.get('query_string', b'').decode())
+    for key in ('token', 'access_token'):
+        if query.get(key):
+            return query[key][0]
+    for name, value in scope.get('headers', []):
+        if name == b'authorization':
+            scheme, _, token = value.decode().partition(' ')
+            if scheme.lower() in ('bearer', 'token') and token:
+                return token
+    return None
+
+
+@database_sync_to_async
+def _driver_id_for_token(token):
+    from contas.auth_helpers import AccessTokenError, user_from_access_token
+    from drivers.models import Driver
+    try:
+        user = user_from_access_token(token)
+    except AccessTokenError:
+        return None
+    return Driver.objects.filter(user=user).values_list('id', flat=True).first()
+
+
+@database_sync_to_async
+def _ingest(driver_id, points):
+    """Buffer pings for bulk persistence and return the driver's active ride."""
+    from drivers.assignments import get_active_assignment
+    from drivers.location_ingest import location_buffer
+    location_buffer.add(driver_id, points)
+    return get_active_assignment(driver_id).get('ride')
+
+
+class DriverGpsConsumer(AsyncJsonWebsocketConsumer):
+    """Driver app streams its GPS over one socket authenticated at handshake.
+
+    Frames are ``{"latitude", "longitude", ...}`` or ``{"points": [...]}``.
+    Pings go through the same buffered writer as the HTTP ingest endpoint and
+    are fanned out to ``DriverLocationConsumer``/``RideTrackingConsumer``
+    subscribers, throttled to ``REALTIME_LOCATION_MAX_RATE`` per connection
+    (latest position wins).
+    """
+
+    async def connect(self):
+        self.driver_id = None
+        token = _handshake_token(self.scope)
+        driver_id = await _driver_id_for_token(token) if token else None
+        if not driver_id:
+            await self.close(code=4401)
+            return
+        self.driver_id = driver_id
+        rate = getattr(settings, 'REALTIME_LOCATION_MAX_RATE', 1.0)
+        self.min_interval = 1.0 / rate if rate else 0.0
+        self._last_sent = 0.0
+        self._pending = None
+        self._flush_task = None
+        await self.accept()
+        await self.send_json({'type': 'connected', 'driver_id': driver_id})
+
+    async def disconnect(self, close_code):
+        if getattr(self, '_flush_task', None):
+            self._flush_task.cancel()
+            self._flush_task = None
+        if self.driver_id:
+            await self._send_pending()  # the last throttled position
+
+    async def receive_json(self, content, **kwargs):
+        from drivers.location_ingest import latest_point
+        from drivers.serializers import LocationBatchSerializer
+        if not isinstance(content, dict):
+            await self.send_json({'type': 'error', 'errors': 'Expected a JSON object'})
+            return
+        points = content['points'] if 'points' in content else [content]
+        serializer = LocationBatchSerializer(data={'points': points})
+        if not serializer.is_valid():
+            await self.send_json({'type': 'error', 'errors': serializer.errors})
+            return
+        points = serializer.validated_data['points']
+        ride_id = await _ingest(self.driver_id, points)
+        latest = latest_point(points)
+        self._pending = (latest['latitude'], latest['longitude'], ride_id)
+        await self._fan_out()
+        await self.send_json({'type': 'ack', 'accepted': len(points)})
+
+    async def _fan_out(self):
+        wait = self._last_sent + self.min_interval - time.monotonic()
+        if wait <= 0:
+            await self._send_pending()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._send_later(wait))
+
+    async def _send_later(self, wait):
+        await asyncio.sleep(wait)
+        self._flush_task = None
+        await self._send_pending()
+
+    async def _send_pending(self):
+        from .broadcast import location_messages
+        if self._pending is None:
+            return
+        latitude, longitude, ride_id = self._pending
+        self._pending = None
+        self._last_sent = time.monotonic()
+        for group, message in location_messages(self.driver_id, latitude, longitude, ride_id):
+            await self.channel_layer.group_send(group, message)
+
+    @classmethod
+    async def decode_json(cls, text_data):
+        try:
+            return json.loads(text_data)
+        except ValueError:
+            return None
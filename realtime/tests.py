@@ -0,0 +1,153 @@
+import threading
+import time
+
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from drivers.models import Driver, DriverLocation
+from .broadcast import BroadcastDispatcher
+from .routing import websocket_urlpatterns
+
+
+User = get_user_model()
+
+
+class RecordingLayer:
+    def __init__(self, fail_times=0):
+        self.sent = []
+        self.fail_times = fail_times
+        self.event = threading.Event()
+
+    async def group_send(self, group, message):
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError('layer down')
+        self.sent.append((group, message))
+        self.event.set()
+
+
+class PoisonLayer(RecordingLayer):
+    """Never delivers message ``{'n': 0}``."""
+    attempts = 0
+
+    async def group_send(self, group, message):
+        if message.get('n') == 0:
+            self.attempts += 1
+            raise ValueError('unserialisable')
+        await super().group_send(group, message)
+
+
+class BroadcastDispatcherTests(SimpleTestCase):
+    def _wait_for(self, layer, count, timeout=2.0):
+        deadline = time.monotonic() + timeout
+        while len(layer.sent) < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def _dispatcher(self, layer, **kwargs):
+        from unittest import mock
+        patcher = mock.patch('realtime.broadcast._get_channel_layer', return_value=layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return BroadcastDispatcher(**kwargs)
+
+    def test_locations_are_coalesced_latest_wins(self):
+        layer = RecordingLayer()
+        dispatcher = self._dispatcher(layer, location_max_rate=0.5)
+
+        dispatcher.send_location('driver_1', {'n': 1})
+        self._wait_for(layer, 1)
+        for n in range(2, 10):
+            dispatcher.send_location('driver_1', {'n': n})
+        time.sleep(0.2)
+
+        self.assertEqual(layer.sent, [('driver_1', {'n': 1})])
+        self.assertEqual(dispatcher.pending(), 1)
+
+    def test_status_events_are_kept_in_order_and_retried(self):
+        layer = RecordingLayer(fail_times=1)
+        dispatcher = self._dispatcher(layer, retry_seconds=0.01)
+
+        with self.assertLogs('realtime.broadcast', level='ERROR'):
+            for n in range(3):
+                dispatcher.send_status('ride_1', {'n': n})
+            self._wait_for(layer, 3)
+
+        self.assertEqual([message['n'] for _, message in layer.sent], [0, 1, 2])
+
+    def test_undeliverable_status_is_dropped_without_holding_back_the_rest(self):
+        layer = PoisonLayer()
+        dispatcher = self._dispatcher(layer, retry_seconds=0.01, max_attempts=3)
+
+        with self.assertLogs('realtime.broadcast', level='ERROR') as logs:
+            dispatcher.send_status('ride_1', {'n': 0})
+            dispatcher.send_status('ride_1', {'n': 1})
+            dispatcher.send_location('driver_1', {'n': 'gps'})
+            self._wait_for(layer, 2)
+
+        self.assertEqual(layer.attempts, 3)
+        self.assertIn('dropped', logs.output[-1])
+        self.assertCountEqual(layer.sent, [('driver_1', {'n': 'gps'}), ('ride_1', {'n': 1})])
+        self.assertEqual(dispatcher.pending(), 0)
+
+
+@override_settings(
+    DRIVER_LOCATION_FLUSH_SECONDS=0,
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+)
+class DriverGpsConsumerTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='gps@example.com', password='StrongPass123!', role='driver')
+        self.driver = Driver.objects.create(user=user)
+        self.token = str(RefreshToken.for_user(user).access_token)
+        self.application = URLRouter(websocket_urlpatterns)
+
+    async def test_rejects_handshake_without_a_valid_token(self):
+        communicator = WebsocketCommunicator(self.application, '/ws/driver/gps/?token=nope')
+        connected, _ = await communicator.connect()
+
+        self.assertFalse(connected)
+
+    async def test_frames_are_persisted_and_pushed_to_subscribers(self):
+        subscriber = WebsocketCommunicator(self.application, f'/ws/drivers/{self.driver.id}/')
+        self.assertTrue((await subscriber.connect())[0])
+        driver = WebsocketCommunicator(self.application, f'/ws/driver/gps/?token={self.token}')
+        self.assertTrue((await driver.connect())[0])
+        self.assertEqual((await driver.receive_json_from())['type'], 'connected')
+
+        await driver.send_json_to({'latitude': '-8.8383', 'longitude': '13.2344'})
+
+        self.assertEqual(await driver.receive_json_from(), {'type': 'ack', 'accepted': 1})
+        update = await subscriber.receive_json_from()
+        self.assertEqual(update['latitude'], '-8.8383000')
+        self.assertEqual(await database_sync_to_async(DriverLocation.objects.filter(driver=self.driver).count)(), 1)
+
+        await driver.disconnect()
+        await subscriber.disconnect()
+
+    @override_settings(REALTIME_LOCATION_MAX_RATE=0.01)
+    async def test_newest_throttled_position_is_pushed_on_disconnect(self):
+        subscriber = WebsocketCommunicator(self.application, f'/ws/drivers/{self.driver.id}/')
+        self.assertTrue((await subscriber.connect())[0])
+        driver = WebsocketCommunicator(self.application, f'/ws/driver/gps/?token={self.token}')
+        self.assertTrue((await driver.connect())[0])
+        await driver.receive_json_from()
+        await driver.send_json_to({'latitude': '-8.8383', 'longitude': '13.2344'})
+        await driver.receive_json_from()
+        self.assertEqual((await subscriber.receive_json_from())['latitude'], '-8.8383000')
+
+        await driver.send_json_to({'points': [
+            {'latitude': '-8.8400', 'longitude': '13.2350', 'recorded_at': '2026-01-01T10:00:05Z'},
+            {'latitude': '-8.8390', 'longitude': '13.2345', 'recorded_at': '2026-01-01T10:00:00Z'},
+        ]})
+        self.assertEqual(await driver.receive_json_from(), {'type': 'ack', 'accepted': 2})
+        self.assertTrue(await subscriber.receive_nothing())
+        await driver.disconnect()
+
+        self.assertEqual((await subscriber.receive_json_from())['latitude'], '-8.8400000')
+        await subscriber.disconnect()
@@ -0,0 +1,118 @@
+"""Time-bucketed aggregates computed in a single grouped query.
+
+A ``Period`` describes a reporting window (the current day by hour, the
+current week or month by day, or a custom range of days) in the current
+timezone (``TIME_ZONE``, Africa/Luanda). ``bucket_totals`` runs one
+``GROUP BY Trunc*`` query over a queryset for that window and returns one row
+per bucket, with empty buckets filled in, instead of issuing a query per hour
+or day. ``window_totals`` sums several trailing windows in one aggregate.
+Shared by the store report, the driver revenue endpoints and
+``Driver.calculate_earnings``.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from django.db.models import Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+
+@dataclass(frozen=True)
+class Period:
+    start: datetime
+    end: datetime
+    unit: str  # "hour" or "day"
+    timeframe: str = "custom"
+
+    @property
+    def buckets(self):
+        """Aware start of every bucket in the window, oldest first."""
+        step = timedelta(hours=1) if self.unit == "hour" else timedelta(days=1)
+        tz = self.start.tzinfo
+        naive, end = self.start.replace(tzinfo=None), self.end.replace(tzinfo=None)
+        buckets = []
+        while naive < end:
+            buckets.append(timezone.make_aware(naive, tz))
+            naive += step
+        return buckets
+
+    @property
+    def labels(self):
+        """Display label per bucket, e.g. ``08:00``, ``Mon``, ``03/07``, ``2026-07-03``."""
+        label_format = LABEL_FORMATS.get(self.timeframe, LABEL_FORMATS["custom"])
+        return [bucket.strftime(label_format) for bucket in self.buckets]
+
+
+LABEL_FORMATS = {
+    "day": "%H:%M",
+    "week": "%a",
+    "month": "%d/%m",
+    "custom": "%Y-%m-%d",
+}
+
+
+def _midnight(moment):
+    return timezone.make_aware(
+        moment.replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0),
+        timezone.get_current_timezone(),
+    )
+
+
+def period_for(timeframe, start_date=None, end_date=None, now=None):
+    """Window for ``day``/``week``/``month``/``custom``; None if not resolvable.
+
+    Custom ranges take ISO dates and include ``end_date``.
+    """
+    today = _midnight(timezone.localtime(now or timezone.now()))
+    if timeframe == "day":
+        return Period(today, today + timedelta(days=1), "hour", "day")
+    if timeframe == "week":
+        start = today - timedelta(days=today.weekday())
+        return Period(start, start + timedelta(days=7), "day", "week")
+    if timeframe == "month":
+        start = today.replace(day=1)
+        end = (start.replace(tzinfo=None) + timedelta(days=32)).replace(day=1)
+        return Period(start, _midnight(end), "day", "month")
+    if timeframe == "custom" and start_date and end_date:
+        start = _midnight(datetime.fromisoformat(str(start_date)))
+        end = _midnight(datetime.fromisoformat(str(end_date))) + timedelta(days=1)
+        return Period(start, end, "day") if start < end else None
+    return None
+
+
+def bucket_totals(queryset, period, field="created_at", **aggregates):
+    """One dict of ``aggregates`` per bucket of ``period`` (missing buckets are 0)."""
+    tz = period.start.tzinfo
+    rows = (
+        queryset.filter(**{f"{field}__gte": period.start, f"{field}__lt": period.end})
+        .annotate(bucket=Trunc(field, period.unit, tzinfo=tz))
+        .order_by()
+        .values("bucket")
+        .annotate(**aggregates)
+    )
+    by_bucket = {
+        timezone.localtime(row.pop("bucket"), tz).replace(tzinfo=None): row for row in rows
+    }
+    empty = dict.fromkeys(aggregates, 0)
+    return [
+        {name: value or 0 for name, value in by_bucket.get(bucket.replace(tzinfo=None), empty).items()}
+        for bucket in period.buckets
+    ]
+
+
+def labelled_totals(queryset, period, expression, field="created_at"):
+    """``{label: sum of expression}`` for every bucket of ``period``, in order."""
+    totals = bucket_totals(queryset, period, field, total=Sum(expression))
+    return {label: bucket["total"] for label, bucket in zip(period.labels, totals)}
+
+
+def window_totals(queryset, expression, windows, field="created_at"):
+    """Sum ``expression`` over several trailing windows in one aggregate.
+
+    ``windows`` maps a name to the window start, or to None for all time.
+    """
+    totals = queryset.aggregate(**{
+        name: Sum(expression, filter=Q(**{f"{field}__gte": start}) if start else None)
+        for name, start in windows.items()
+    })
+    return {name: value or 0 for name, value in totals.items()}
@@ -0,0 +1,144 @@
+"""Benchmark: per-bucket store report queries vs the grouped report.
+
+Seeds one throwaway store with ``--orders`` orders spread over the last year
+(default 1M; bulk inserted, so ``Order.save`` side effects do not run), then
+times both implementations of ``store_report`` for each timeframe and
+reports query counts. Seeded rows are deleted afterwards unless ``--keep``.
+"""
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Case, Count, Sum, When
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.timezone import make_aware
+from rest_framework.test import APIRequestFactory
+
+from customers.models import Customer
+from drivers.models import Driver
+from order.models import Order
+from report.store_view import store_report
+from stores.models import Product, Store
+
+User = get_user_model()
+PREFIX = 'bench-report-'
+
+
+def legacy_report(store, timeframe):
+    """The previous implementation: one query per bucket plus full-table top-N."""
+    today = datetime.now()
+    if timeframe == 'day':
+        days = None
+        hours = [today.replace(hour=i, minute=0, second=0, microsecond=0) for i in range(24)]
+    elif timeframe == 'week':
+        days = [today + timedelta(days=i) for i in range(0 - today.weekday(), 7 - today.weekday())]
+    else:
+        days = [today.replace(day=i) for i in range(1, 32) if (today.replace(day=i)).month == today.month]
+    revenue, orders = [], []
+    if days is None:
+        for hour in hours:
+            delivered = Order.objects.filter(
+                store=store, status=Order.DELIVERED,
+                created_at__gte=make_aware(hour), created_at__lt=make_aware(hour + timedelta(hours=1)),
+            )
+            revenue.append(sum(order.total for order in delivered))
+            orders.append(delivered.count())
+    else:
+        for day in days:
+            delivered = Order.objects.filter(
+                store=store, status=Order.DELIVERED,
+                created_at__year=day.year, created_at__month=day.month, created_at__day=day.day,
+            )
+            revenue.append(sum(order.total for order in delivered))
+            orders.append(delivered.count())
+    list(Product.objects.filter(store=store).annotate(total_order=Sum("orderdetails__quantity")).order_by("-total_order")[:3])
+    [d.user.get_full_name() for d in Driver.objects.annotate(
+        total_order=Count(Case(When(order__store=store, then=1)))).order_by("-total_order")[:3]]
+    [c.user.get_full_name() for c in Customer.objects.annotate(
+        total_order=Count(Case(When(order__store=store, then=1)))).order_by("-total_order")[:3]]
+    sum(o.original_price for o in Order.objects.filter(store=store, status=Order.DELIVERED, payment_status_store=Order.UNPAID))
+    sum(o.original_price for o in Order.objects.filter(store=store, payment_status_store=Order.PAID))
+    return revenue, orders
+
+
+class Command(BaseCommand):
+    help = "Compare query count and wall time of the old and grouped store report"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1_000_000)
+        parser.add_argument('--drivers', type=int, default=200)
+        parser.add_argument('--customers', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded rows")
+
+    def handle(self, *args, **options):
+        owner = self._seed(options)
+        store = owner.store
+        request_factory = APIRequestFactory()
+        try:
+            self.stdout.write(f"database={connection.vendor} orders={options['orders']:,}")
+            for timeframe in ('day', 'week', 'month'):
+                legacy_seconds, legacy_queries = self._measure(
+                    lambda: legacy_report(store, timeframe), options['repeat'])
+                new_seconds, new_queries = self._measure(
+                    lambda: store_report(
+                        request_factory.get('/', {'timeframe': timeframe}), user_id=owner.id
+                    ).render(),
+                    options['repeat'],
+                )
+                self.stdout.write(
+                    f"{timeframe:>5}: legacy {legacy_queries:>3} queries {legacy_seconds * 1000:9.1f} ms | "
+                    f"grouped {new_queries:>3} queries {new_seconds * 1000:9.1f} ms"
+                )
+        finally:
+            if not options['keep']:
+                User.objects.filter(username__startswith=PREFIX).delete()
+
+    def _measure(self, run, repeat):
+        best = None
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, len(queries)
+
+    def _seed(self, options):
+        User.objects.filter(username__startswith=PREFIX).delete()
+        rng = random.Random(8)
+        owner = User.objects.create(username=f"{PREFIX}owner")
+        store = Store.objects.create(user=owner, name='Bench', phone='0', address='Luanda', logo='x.png')
+        driver_users = User.objects.bulk_create(
+            [User(username=f"{PREFIX}d{i}", role='driver') for i in range(options['drivers'])])
+        drivers = Driver.objects.bulk_create([Driver(user=user) for user in driver_users])
+        customer_users = User.objects.bulk_create(
+            [User(username=f"{PREFIX}c{i}") for i in range(options['customers'])])
+        customers = Customer.objects.bulk_create([Customer(user=user) for user in customer_users])
+
+        now = timezone.now()
+        batch = []
+        for i in range(options['orders']):
+            total = Decimal(rng.randint(500, 50000)) / 100
+            batch.append(Order(
+                store=store,
+                customer=rng.choice(customers),
+                driver=rng.choice(drivers),
+                total=total,
+                original_price=total,
+                status=rng.choice((Order.DELIVERED, Order.DELIVERED, Order.DELIVERED, Order.READY)),
+                payment_method='cash',
+                payment_status_store=rng.choice((Order.PAID, Order.UNPAID)),
+                created_at=now - timedelta(seconds=rng.randint(0, 365 * 86400)),
+                secret_pin='000000',
+            ))
+            if len(batch) == 10_000:
+                Order.objects.bulk_create(batch)
+                batch = []
+        Order.objects.bulk_create(batch)
+        return owner
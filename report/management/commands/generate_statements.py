@@ -0,0 +1,31 @@
+"""Render the weekly/monthly store statements of the last closed period (cron)."""
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from report.statements import PERIOD_LABELS, closed_period, generate_statements
+
+
+class Command(BaseCommand):
+    help = "Render and store the statements of every store for the last closed week/month"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--period', choices=(*PERIOD_LABELS, 'all'), default='all',
+        )
+        parser.add_argument('--date', help="Pretend today is YYYY-MM-DD (backfill an older period)")
+        parser.add_argument('--workers', type=int, help="Worker processes (default STORE_STATEMENT_WORKERS or CPUs)")
+
+    def handle(self, *args, **options):
+        try:
+            today = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError as exc:
+            raise CommandError(f"Invalid date: {exc}")
+        periods = (
+            tuple(PERIOD_LABELS) if options['period'] == 'all' else (options['period'],)
+        )
+        for period in periods:
+            start, end = closed_period(period, today)
+            built = generate_statements(period, today=today, workers=options['workers'])
+            self.stdout.write(f"{period} {start}..{end}: {len(built)} statements")
+        self.stdout.write(self.style.SUCCESS("Statements generated"))
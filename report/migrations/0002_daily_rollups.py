@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drivers', '0004_driverlocation_recorded_at_default'),
+        ('kudya_platform', '0003_auditevent'),
+        ('report', '0001_initial'),
+        ('services', '0002_country_currency_country_timezone'),
+        ('stores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CityDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='dia')),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('delivered', models.PositiveIntegerField(default=0)),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('driver_commission', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('delivery_fee', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('store_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('store_unpaid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('driver_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('driver_unpaid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('city', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='kudya_platform.city')),
+                ('country', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='services.country')),
+            ],
+            options={
+                'verbose_name': 'Resumo diário da cidade',
+                'verbose_name_plural': 'Resumos diários das cidades',
+                'unique_together': {('country', 'city', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DriverDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='dia')),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('delivered', models.PositiveIntegerField(default=0)),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('driver_commission', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('delivery_fee', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('store_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('store_unpaid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('driver_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('driver_unpaid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('driver', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='drivers.driver', verbose_name='motorista')),
+            ],
+            options={
+                'verbose_name': 'Resumo diário do motorista',
+                'verbose_name_plural': 'Resumos diários dos motoristas',
+                'unique_together': {('driver', 'day')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StoreDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='dia')),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('delivered', models.PositiveIntegerField(default=0)),
+                ('gross', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('driver_commission', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('delivery_fee', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('store_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('store_unpaid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('driver_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('driver_unpaid', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='stores.store', verbose_name='loja')),
+            ],
+            options={
+                'verbose_name': 'Resumo diário da loja',
+                'verbose_name_plural': 'Resumos diários das lojas',
+                'unique_together': {('store', 'day')},
+            },
+        ),
+    ]
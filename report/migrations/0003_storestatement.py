@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('report', '0002_daily_rollups'),
+        ('stores', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoreStatement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('weekly', 'Semanal'), ('monthly', 'Mensal')], max_length=10, verbose_name='período')),
+                ('start', models.DateField(verbose_name='início')),
+                ('end', models.DateField(verbose_name='fim')),
+                ('orders', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('pdf', models.FileField(blank=True, upload_to='statements/', verbose_name='PDF')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('store', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='statements', to='stores.store', verbose_name='loja')),
+            ],
+            options={
+                'verbose_name': 'Extrato da loja',
+                'verbose_name_plural': 'Extratos das lojas',
+                'ordering': ('-start',),
+                'unique_together': {('store', 'period', 'start')},
+            },
+        ),
+    ]
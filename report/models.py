@@ -26,3 +26,87 @@ class Invoice(models.Model):
         return f"Invoice for Order {self.order.id}"
 
 
+class DailyOrderMetrics(models.Model):
+    """Order aggregates for one day (in ``TIME_ZONE``), maintained by ``report.rollups``.
+
+    Counts cover every order; money columns cover delivered orders, except
+    ``store_paid`` which mirrors the store report and counts any paid order.
+    """
+    day = models.DateField(verbose_name="dia")
+    orders = models.PositiveIntegerField(default=0)
+    delivered = models.PositiveIntegerField(default=0)
+    gross = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    driver_commission = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    delivery_fee = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    store_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    store_unpaid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    driver_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    driver_unpaid = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class StoreDailyRollup(DailyOrderMetrics):
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name="daily_rollups", verbose_name="loja")
+
+    class Meta:
+        unique_together = ("store", "day")
+        verbose_name = "Resumo diário da loja"
+        verbose_name_plural = "Resumos diários das lojas"
+
+
+class DriverDailyRollup(DailyOrderMetrics):
+    driver = models.ForeignKey(
+        "drivers.Driver", on_delete=models.CASCADE, related_name="daily_rollups", verbose_name="motorista"
+    )
+
+    class Meta:
+        unique_together = ("driver", "day")
+        verbose_name = "Resumo diário do motorista"
+        verbose_name_plural = "Resumos diários dos motoristas"
+
+
+class CityDailyRollup(DailyOrderMetrics):
+    """Per customer city; orders from customers without a city roll up under null."""
+    country = models.ForeignKey(
+        "services.Country", on_delete=models.CASCADE, null=True, blank=True, related_name="+"
+    )
+    city = models.ForeignKey(
+        "kudya_platform.City", on_delete=models.CASCADE, null=True, blank=True, related_name="+"
+    )
+
+    class Meta:
+        unique_together = ("country", "city", "day")
+        verbose_name = "Resumo diário da cidade"
+        verbose_name_plural = "Resumos diários das cidades"
+
+
+class StoreStatement(models.Model):
+    """A store's weekly or monthly statement, rendered once by ``report.statements``."""
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+
+    PERIOD_CHOICES = (
+        (WEEKLY, "Semanal"),
+        (MONTHLY, "Mensal"),
+    )
+
+    store = models.ForeignKey(Store, on_delete=models.CASCADE, related_name="statements", verbose_name="loja")
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES, verbose_name="período")
+    start = models.DateField(verbose_name="início")
+    end = models.DateField(verbose_name="fim")  # inclusive
+    orders = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    pdf = models.FileField(upload_to="statements/", blank=True, verbose_name="PDF")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("store", "period", "start")
+        ordering = ("-start",)
+        verbose_name = "Extrato da loja"
+        verbose_name_plural = "Extratos das lojas"
+
+    def __str__(self):
+        return f"{self.store} {self.period} {self.start}"
@@ -0,0 +1,279 @@
+"""Daily order rollups per store, driver and customer city.
+
+``Order.save`` hands the order's contribution before and after the save to
+``track_order_change``, which applies the difference to the affected
+``StoreDailyRollup``, ``DriverDailyRollup`` and ``CityDailyRollup`` rows with
+``F()`` updates once the transaction commits. Writes that bypass
+``Order.save`` (``bulk_create``, ``QuerySet.update``, raw SQL) are picked up
+by ``rebuild_rollups`` (``manage.py rollup_orders``), which recomputes a range
+of days from the raw orders and reports how many rows had drifted.
+
+Dashboards read closed days from the rollups and only aggregate today's raw
+orders ("today so far"), so their cost no longer grows with order history.
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import CityDailyRollup, DriverDailyRollup, StoreDailyRollup
+
+logger = logging.getLogger(__name__)
+
+METRICS = (
+    "orders",
+    "delivered",
+    "gross",
+    "driver_commission",
+    "delivery_fee",
+    "store_paid",
+    "store_unpaid",
+    "driver_paid",
+    "driver_unpaid",
+)
+
+# Rollup key columns and the Order lookups they are grouped by
+DIMENSIONS = {
+    StoreDailyRollup: {"store": "store"},
+    DriverDailyRollup: {"driver": "driver"},
+    CityDailyRollup: {"country": "customer__user__country", "city": "customer__user__city"},
+}
+
+
+def metric_aggregates(names=METRICS):
+    """ORM aggregates computing each metric from ``Order`` rows.
+
+    Keys are prefixed with ``metric_`` so they cannot shadow the ``Order``
+    columns they are computed from.
+    """
+    from order.models import Order
+
+    delivered = Q(status=Order.DELIVERED)
+    driver_paid = Q(payment_status_driver=Order.PAID)
+    aggregates = {
+        "orders": Count("id"),
+        "delivered": Count("id", filter=delivered),
+        "gross": Sum("total", filter=delivered),
+        "driver_commission": Sum("driver_commission", filter=delivered),
+        "delivery_fee": Sum("delivery_fee", filter=delivered),
+        "store_paid": Sum("original_price", filter=Q(payment_status_store=Order.PAID)),
+        "store_unpaid": Sum("original_price", filter=delivered & Q(payment_status_store=Order.UNPAID)),
+        "driver_paid": _earnings(delivered & driver_paid),
+        "driver_unpaid": _earnings(delivered & ~driver_paid),
+    }
+    return {f"metric_{name}": aggregates[name] for name in names}
+
+
+def _metrics(row, names=METRICS):
+    return {name: row[f"metric_{name}"] or 0 for name in names}
+
+
+def _earnings(condition):
+    return Sum(
+        F("driver_commission") + F("delivery_fee"),
+        filter=condition,
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+
+
+def _decimal(value):
+    return Decimal(str(value or 0))
+
+
+def order_metrics(order) -> dict:
+    """The contribution of one order to its rollup rows (mirrors ``metric_aggregates``)."""
+    from order.models import Order
+
+    delivered = order.status == Order.DELIVERED
+    zero = Decimal(0)
+    earnings = _decimal(order.driver_commission) + _decimal(order.delivery_fee)
+    driver_paid = order.payment_status_driver == Order.PAID
+    return {
+        "orders": 1,
+        "delivered": int(delivered),
+        "gross": _decimal(order.total) if delivered else zero,
+        "driver_commission": _decimal(order.driver_commission) if delivered else zero,
+        "delivery_fee": _decimal(order.delivery_fee) if delivered else zero,
+        "store_paid": _decimal(order.original_price) if order.payment_status_store == Order.PAID else zero,
+        "store_unpaid": (
+            _decimal(order.original_price)
+            if delivered and order.payment_status_store == Order.UNPAID else zero
+        ),
+        "driver_paid": earnings if delivered and driver_paid else zero,
+        "driver_unpaid": earnings if delivered and not driver_paid else zero,
+    }
+
+
+def snapshot(order):
+    """``(day, store_id, driver_id, customer_id, metrics)`` for a saved order."""
+    if order is None:
+        return None
+    day = timezone.localdate(order.created_at)
+    return day, order.store_id, order.driver_id, order.customer_id, order_metrics(order)
+
+
+def track_order_change(previous, order) -> None:
+    """Schedule the rollup delta between ``previous`` (None if new) and ``order``."""
+    before, after = snapshot(previous), snapshot(order)
+    if before == after:
+        return
+    transaction.on_commit(lambda: apply_change(before, after), robust=True)
+
+
+def apply_change(before, after) -> None:
+    deltas = defaultdict(lambda: dict.fromkeys(METRICS, 0))  # (model, key, day) -> delta
+    by_customer = []
+    for sign, snap in ((-1, before), (1, after)):
+        if snap is None:
+            continue
+        day, store_id, driver_id, customer_id, metrics = snap
+        signed = {name: sign * value for name, value in metrics.items()}
+        _add(deltas[(StoreDailyRollup, (("store_id", store_id),), day)], signed)
+        if driver_id:
+            _add(deltas[(DriverDailyRollup, (("driver_id", driver_id),), day)], signed)
+        by_customer.append((customer_id, day, signed))
+
+    from customers.models import Customer
+    cities = {
+        pk: (("country_id", country_id), ("city_id", city_id))
+        for pk, country_id, city_id in Customer.objects.filter(
+            pk__in={customer_id for customer_id, _, _ in by_customer},
+        ).values_list("pk", "user__country_id", "user__city_id")
+    }
+    for customer_id, day, signed in by_customer:
+        key = cities.get(customer_id, (("country_id", None), ("city_id", None)))
+        _add(deltas[(CityDailyRollup, key, day)], signed)
+
+    for (model, key, day), delta in deltas.items():
+        _bump(model, dict(key, day=day), delta)
+
+
+def _add(total, delta) -> None:
+    for name, value in delta.items():
+        total[name] += value
+
+
+def _bump(model, lookup, delta) -> None:
+    changes = {name: F(name) + value for name, value in delta.items() if value}
+    if not changes:
+        return
+    changes["updated_at"] = timezone.now()
+    try:
+        if model.objects.filter(**lookup).update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, **delta)
+        except IntegrityError:
+            # Created concurrently, or a negative delta on a day that was never
+            # backfilled; the latter is repaired by rebuild_rollups
+            model.objects.filter(**lookup).update(**changes)
+    except Exception:
+        logger.exception("Failed to update %s for %s", model.__name__, lookup)
+
+
+def day_start(day):
+    """Aware start of ``day`` in the current time zone."""
+    return timezone.make_aware(datetime.combine(day, time.min), timezone.get_current_timezone())
+
+
+def rebuild_rollups(start_day=None, end_day=None, dry_run=False) -> dict:
+    """Recompute rollups for ``[start_day, end_day]`` (all history by default).
+
+    Returns ``{model name: (rows, drifted)}`` where ``drifted`` counts rows
+    that were missing, stale or orphaned before the rebuild.
+    """
+    from order.models import Order
+
+    orders = Order.objects.all()
+    if start_day:
+        orders = orders.filter(created_at__gte=day_start(start_day))
+    if end_day:
+        orders = orders.filter(created_at__lt=day_start(end_day + timedelta(days=1)))
+    day = TruncDate("created_at", tzinfo=timezone.get_current_timezone())
+
+    summary = {}
+    for model, keys in DIMENSIONS.items():
+        source = orders.filter(driver__isnull=False) if model is DriverDailyRollup else orders
+        rows = (
+            source.annotate(rollup_day=day)
+            .order_by()
+            .values("rollup_day", **{f"key_{name}": F(lookup) for name, lookup in keys.items()})
+            .annotate(**metric_aggregates())
+        )
+        fresh = {}
+        for row in rows:
+            key = tuple(row.pop(f"key_{name}") for name in keys) + (row.pop("rollup_day"),)
+            fresh[key] = _metrics(row)
+
+        existing_rows = model.objects.all()
+        if start_day:
+            existing_rows = existing_rows.filter(day__gte=start_day)
+        if end_day:
+            existing_rows = existing_rows.filter(day__lte=end_day)
+        existing = {}
+        for row in existing_rows.values(*[f"{name}_id" for name in keys], "day", *METRICS):
+            key = tuple(row.pop(f"{name}_id") for name in keys) + (row.pop("day"),)
+            current = existing.setdefault(key, dict.fromkeys(METRICS, 0))
+            for name in METRICS:
+                current[name] += row[name]
+
+        drifted = sum(
+            1 for key in fresh.keys() | existing.keys()
+            if fresh.get(key) != existing.get(key)
+        )
+        if not dry_run:
+            with transaction.atomic():
+                existing_rows.delete()
+                model.objects.bulk_create(
+                    [
+                        model(day=key[-1], **{f"{name}_id": value for name, value in zip(keys, key)}, **metrics)
+                        for key, metrics in fresh.items()
+                    ],
+                    batch_size=1000,
+                )
+        summary[model.__name__] = (len(fresh), drifted)
+    return summary
+
+
+def _today():
+    today = timezone.localdate()
+    return today, day_start(today)
+
+
+def daily_series(rollups, orders, period, fields):
+    """Per-day ``fields`` over ``period``: closed days from ``rollups``, today from ``orders``.
+
+    ``rollups`` and ``orders`` must be scoped to the same store/driver/city.
+    """
+    today, today_start = _today()
+    first, last = period.start.date(), period.end.date()
+    by_day = {
+        row.pop("day"): row
+        for row in rollups.filter(day__gte=first, day__lt=min(last, today))
+        .order_by()
+        .values("day")
+        .annotate(**{name: Sum(name) for name in fields})
+    }
+    if period.start <= today_start < period.end:
+        by_day[today] = _metrics(orders.filter(
+            created_at__gte=today_start, created_at__lt=today_start + timedelta(days=1),
+        ).aggregate(**metric_aggregates(fields)), fields)
+    empty = dict.fromkeys(fields, 0)
+    return [
+        {name: value or 0 for name, value in by_day.get(bucket.date(), empty).items()}
+        for bucket in period.buckets
+    ]
+
+
+def rollup_totals(rollups, orders, fields):
+    """All-time ``fields``: every closed day from ``rollups`` plus today from ``orders``."""
+    today, today_start = _today()
+    closed = rollups.filter(day__lt=today).aggregate(**{name: Sum(name) for name in fields})
+    live = _metrics(orders.filter(created_at__gte=today_start).aggregate(**metric_aggregates(fields)), fields)
+    return {name: (closed[name] or 0) + live[name] for name in fields}
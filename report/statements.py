@@ -0,0 +1,168 @@
+"""Weekly and monthly store statements.
+
+``generate_statements`` produces the statement of every store with orders in
+the last closed week (Monday to Sunday) or month. The PDFs are rendered in
+parallel in a process pool (``STORE_STATEMENT_WORKERS``, default: one per
+CPU). Each worker streams its store's orders with their details prefetched
+and renders the PDF once; the parent stores it in media storage on a
+``StoreStatement``. The statement endpoint and ``Store.generate_invoice``
+serve the stored file instead of rendering per request. Run it from cron with
+``manage.py generate_statements``.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from order.models import Order, OrderDetails
+from order.utils import renderer
+from stores.models import Store
+
+from .models import StoreStatement
+from .rollups import day_start
+
+logger = logging.getLogger(__name__)
+
+STATEMENT_TEMPLATE = "email_templates/store_statement.html"
+PERIOD_LABELS = {StoreStatement.WEEKLY: "Semana", StoreStatement.MONTHLY: "Mês"}
+
+
+def closed_period(period, today=None):
+    """``(first day, last day)`` of the last complete week or month before ``today``.
+
+    Raises ValueError for a period other than weekly or monthly.
+    """
+    if period not in PERIOD_LABELS:
+        raise ValueError(f"Unknown statement period {period!r}")
+    today = today or timezone.localdate()
+    if period == StoreStatement.WEEKLY:
+        end = today - timedelta(days=today.weekday() + 1)
+        return end - timedelta(days=6), end
+    end = today.replace(day=1) - timedelta(days=1)
+    return end.replace(day=1), end
+
+
+def period_orders(start, end):
+    return Order.objects.filter(
+        created_at__gte=day_start(start), created_at__lt=day_start(end + timedelta(days=1)),
+    )
+
+
+def statement_context(store, period, start, end):
+    """Template context for one statement, streaming the orders in chunks."""
+    orders = (
+        period_orders(start, end)
+        .filter(store=store)
+        .prefetch_related(Prefetch("order_details", queryset=OrderDetails.objects.select_related("product")))
+        .order_by("created_at", "id")
+    )
+    rows, total = [], Decimal(0)
+    for order in orders.iterator(chunk_size=getattr(settings, "STORE_STATEMENT_CHUNK_SIZE", 500)):
+        details = order.order_details.all()
+        order_total = sum((detail.sub_total for detail in details), Decimal(0))
+        rows.append({
+            "id": order.id,
+            "created_at": timezone.localtime(order.created_at),
+            "order_total": order_total,
+            "items": [
+                {"product_name": detail.product.name, "quantity": detail.quantity}
+                for detail in details
+            ],
+        })
+        total += order_total
+    return {
+        "store_name": store.name,
+        "period": PERIOD_LABELS[period],
+        "start": start,
+        "end": end,
+        "orders": rows,
+        "total": total,
+    }
+
+
+def render_statement(store_id, period, start, end):
+    """``(store_id, period, start, end, orders, total, PDF bytes or None)``.
+
+    Only reads, so it can run in a pool worker; takes and returns plain values.
+    """
+    store = Store.objects.get(pk=store_id)
+    context = statement_context(store, period, start, end)
+    pdf = renderer.render_pdf(STATEMENT_TEMPLATE, context)
+    return store_id, period, start, end, len(context["orders"]), context["total"], pdf
+
+
+def save_statement(store_id, period, start, end, orders, total, pdf):
+    """Store a rendered statement (PDF in media storage); returns its id."""
+    statement, _ = StoreStatement.objects.update_or_create(
+        store_id=store_id, period=period, start=start,
+        defaults={"end": end, "orders": orders, "total": total},
+    )
+    if pdf is not None:
+        if statement.pdf:
+            statement.pdf.delete(save=False)
+        statement.pdf.save(f"{store_id}_{period}_{start:%Y%m%d}.pdf", ContentFile(pdf))
+    return statement.pk
+
+
+def build_statement(store_id, period, start, end):
+    return save_statement(*render_statement(store_id, period, start, end))
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+    connections.close_all()  # never share the parent's connections
+
+
+def generate_statements(period, today=None, workers=None):
+    """Build the missing statements of the last closed ``period``; returns their ids.
+
+    Workers render; this process writes the rows and files, so the database
+    only sees writes from one connection. A store that fails is logged and
+    retried on the next run.
+    """
+    start, end = closed_period(period, today)
+    done = StoreStatement.objects.filter(period=period, start=start).exclude(pdf="").values("store_id")
+    store_ids = list(
+        period_orders(start, end).exclude(store_id__in=done)
+        .order_by("store_id").values_list("store_id", flat=True).distinct()
+    )
+    if workers is None:
+        workers = getattr(settings, "STORE_STATEMENT_WORKERS", None) or os.cpu_count() or 1
+    workers = min(workers, len(store_ids))
+    built = []
+    if workers <= 1:
+        for store_id in store_ids:
+            try:
+                built.append(build_statement(store_id, period, start, end))
+            except Exception:
+                logger.exception("Statement %s %s failed for store %s", period, start, store_id)
+        return built
+    connections.close_all()  # forked workers must not inherit open connections
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {
+            pool.submit(render_statement, store_id, period, start, end): store_id for store_id in store_ids
+        }
+        for future in as_completed(futures):
+            try:
+                built.append(save_statement(*future.result()))
+            except Exception:
+                logger.exception("Statement %s %s failed for store %s", period, start, futures[future])
+    return built
+
+
+def store_statement(store, period, today=None):
+    """The stored statement of ``store`` for the last closed ``period``, built if missing."""
+    start, end = closed_period(period, today)
+    statement = StoreStatement.objects.filter(store=store, period=period, start=start).first()
+    if statement is None or not statement.pdf:
+        statement = StoreStatement.objects.get(pk=build_statement(store.pk, period, start, end))
+    return statement
@@ -1,18 +1,35 @@
 from django.contrib.auth import get_user_model
-from customers.models import Customer
-from customers.serializers import CustomerSerializer
-from drivers.models import Driver
-from drivers.serializers import DriverSerializer
 from order.models import Order
 from stores.models import Product
 
 User = get_user_model()
 
-from django.db.models import Sum, Count, Case, When
+from django.db.models import Sum, Count
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
-from datetime import datetime, timedelta
-from django.utils.timezone import make_aware, get_current_timezone
+
+from report.buckets import bucket_totals, period_for
+from report.models import StoreDailyRollup
+from report.rollups import daily_series, rollup_totals
+
+
+def _top3(orders, relation):
+    """``{"labels", "data"}`` for the three drivers/customers with most orders."""
+    rows = list(
+        orders.values(relation).annotate(total_order=Count("id")).order_by("-total_order")[:3]
+    )
+    model = orders.model._meta.get_field(relation).related_model
+    names = {
+        pk: f"{first_name} {last_name}".strip()
+        for pk, first_name, last_name in model.objects.filter(
+            pk__in=[row[relation] for row in rows]
+        ).values_list("pk", "user__first_name", "user__last_name")
+    }
+    return {
+        "labels": [names.get(row[relation], "") for row in rows],
+        "data": [row["total_order"] for row in rows],
+    }
+
 
 @api_view(["GET"])
 def store_report(request, user_id):
@@ -23,78 +40,30 @@ def store_report(request, user_id):
 
         # Get the timeframe parameter
         timeframe = request.GET.get('timeframe', 'week')
-        start_date = request.GET.get('start_date')
-        end_date = request.GET.get('end_date')
-
-        # Initialize the revenue and orders lists
-        revenue = []
-        orders = []
-
-        if timeframe == 'day':
-            # Calculate hourly data for the current day
-            today = datetime.now()
-            current_day_hours = [today.replace(hour=i, minute=0, second=0, microsecond=0) for i in range(24)]
-
-            for hour in current_day_hours:
-                next_hour = hour + timedelta(hours=1)
-                delivered_orders = Order.objects.filter(
-                    store=store,
-                    status=Order.DELIVERED,
-                    created_at__gte=make_aware(hour),
-                    created_at__lt=make_aware(next_hour)
-                )
-                revenue.append(sum(order.total for order in delivered_orders))
-                orders.append(delivered_orders.count())
-
-        elif timeframe == 'week':
-            # Calculate daily data for the current week
-            today = datetime.now()
-            current_weekdays = [today + timedelta(days=i) for i in range(0 - today.weekday(), 7 - today.weekday())]
-
-            for day in current_weekdays:
-                delivered_orders = Order.objects.filter(
-                    store=store,
-                    status=Order.DELIVERED,
-                    created_at__year=day.year,
-                    created_at__month=day.month,
-                    created_at__day=day.day
-                )
-                revenue.append(sum(order.total for order in delivered_orders))
-                orders.append(delivered_orders.count())
-
-        elif timeframe == 'month':
-            # Calculate daily data for the current month
-            today = datetime.now()
-            current_month_days = [today.replace(day=i) for i in range(1, 32) if (today.replace(day=i)).month == today.month]
-
-            for day in current_month_days:
-                delivered_orders = Order.objects.filter(
-                    store=store,
-                    status=Order.DELIVERED,
-                    created_at__year=day.year,
-                    created_at__month=day.month,
-                    created_at__day=day.day
-                )
-                revenue.append(sum(order.total for order in delivered_orders))
-                orders.append(delivered_orders.count())
-
-        elif timeframe == 'custom' and start_date and end_date:
-            # Calculate daily data for the custom date range
-            start_date = make_aware(datetime.fromisoformat(start_date))
-            end_date = make_aware(datetime.fromisoformat(end_date))
-
-            current_range_days = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
-
-            for day in current_range_days:
-                delivered_orders = Order.objects.filter(
-                    store=store,
-                    status=Order.DELIVERED,
-                    created_at__year=day.year,
-                    created_at__month=day.month,
-                    created_at__day=day.day
-                )
-                revenue.append(sum(order.total for order in delivered_orders))
-                orders.append(delivered_orders.count())
+        period = period_for(
+            timeframe, request.GET.get('start_date'), request.GET.get('end_date')
+        )
+
+        # Revenue and delivered orders per bucket: closed days from the daily
+        # rollups, today's hours/day from the raw orders
+        if period is None:
+            buckets = []
+        elif period.unit == "day":
+            buckets = daily_series(
+                StoreDailyRollup.objects.filter(store=store),
+                Order.objects.filter(store=store),
+                period,
+                ("gross", "delivered"),
+            )
+        else:
+            buckets = bucket_totals(
+                Order.objects.filter(store=store, status=Order.DELIVERED),
+                period,
+                gross=Sum("total"),
+                delivered=Count("id"),
+            )
+        revenue = [bucket["gross"] for bucket in buckets]
+        orders = [bucket["delivered"] for bucket in buckets]
 
         # Top 3 products
         top3_products = (
@@ -108,39 +77,19 @@ def store_report(request, user_id):
             "data": [product.total_order or 0 for product in top3_products],
         }
 
-        # Top 3 Drivers
-        top3_drivers = Driver.objects.annotate(
-            total_order=Count(Case(When(order__store=store, then=1)))
-        ).order_by("-total_order")[:3]
-
-        drivers_data = {
-            "labels": [driver.user.get_full_name() for driver in top3_drivers],
-            "data": [driver.total_order for driver in top3_drivers],
-        }
-
-        # Top 3 Customers
-        top3_customers = Customer.objects.annotate(
-            total_order=Count(Case(When(order__store=store, then=1)))
-        ).order_by("-total_order")[:3]
-
-        customers_data = {
-            "labels": [customer.user.get_full_name() for customer in top3_customers],
-            "data": [customer.total_order for customer in top3_customers],
-        }
+        # Top 3 drivers and customers, counted over this store's orders only
+        store_orders = Order.objects.filter(store=store).order_by()
+        drivers_data = _top3(store_orders.filter(driver__isnull=False), "driver")
+        customers_data = _top3(store_orders, "customer")
 
-        # Calculate total store amount excluding paid orders
-        total_store_amount = sum(
-            order.original_price for order in Order.objects.filter(
-                store=store,
-                status=Order.DELIVERED,
-                payment_status_store=Order.UNPAID
-            )
+        # Unpaid delivered and paid amounts
+        totals = rollup_totals(
+            StoreDailyRollup.objects.filter(store=store),
+            Order.objects.filter(store=store),
+            ("store_unpaid", "store_paid"),
         )
-
-        total_paid_amount = sum(order.original_price for order in Order.objects.filter(
-            store=store,
-            payment_status_store=Order.PAID,
-        ))
+        total_store_amount = totals["store_unpaid"]
+        total_paid_amount = totals["store_paid"]
 
         proof_of_payment = ""
         if total_paid_amount > 0:
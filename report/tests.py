@@ -1,3 +1,267 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from customers.models import Customer
+from drivers.models import Driver
+from order.models import Order, OrderDetails
+from order.utils import InvoiceRenderer
+from report.buckets import period_for
+from report.models import DriverDailyRollup, StoreDailyRollup, StoreStatement
+from report.rollups import day_start, rebuild_rollups
+from report.statements import closed_period, generate_statements, statement_context
+from stores.models import Product, ProductCategory, Store
+
+
+User = get_user_model()
+
+
+class StoreReportTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username='store@example.com', password='StrongPass123!')
+        self.store = Store.objects.create(
+            user=self.owner, name='Loja', phone='900000000', address='Luanda', logo='store_logos/logo.png',
+        )
+        buyer = User.objects.create_user(
+            username='buyer@example.com', password='StrongPass123!', first_name='Ana', last_name='Silva',
+        )
+        self.customer = Customer.objects.create(user=buyer)
+        courier = User.objects.create_user(
+            username='courier@example.com', password='StrongPass123!', role='driver', first_name='Rui',
+        )
+        self.driver = Driver.objects.create(user=courier)
+
+    def _order(self, created_at, total, status=Order.DELIVERED, paid=False):
+        return Order.objects.bulk_create([Order(
+            store=self.store, customer=self.customer, driver=self.driver,
+            total=Decimal(total), original_price=Decimal(total), status=status, payment_method='cash',
+            payment_status_store=Order.PAID if paid else Order.UNPAID, created_at=created_at,
+        )])[0]
+
+    def test_week_buckets_totals_and_top_lists(self):
+        monday = period_for('week').start
+        self._order(monday + timedelta(hours=9), '10.00')
+        self._order(monday + timedelta(hours=20), '5.50', paid=True)
+        self._order(monday + timedelta(days=2, hours=1), '7.00')
+        self._order(monday + timedelta(days=2, hours=2), '99.00', status=Order.READY)
+        self._order(monday - timedelta(hours=1), '1.00')
+        rebuild_rollups()
+
+        with self.assertNumQueries(12):
+            response = self.client.get(f'/report/store/{self.owner.id}/', {'timeframe': 'week'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['revenue'], [Decimal('15.50'), 0, Decimal('7.00'), 0, 0, 0, 0])
+        self.assertEqual(response.data['orders'], [2, 0, 1, 0, 0, 0, 0])
+        self.assertEqual(response.data['drivers'], {'labels': ['Rui'], 'data': [5]})
+        self.assertEqual(response.data['customers'], {'labels': ['Ana Silva'], 'data': [5]})
+        self.assertEqual(response.data['total_store_amount'], Decimal('18.00'))
+        self.assertEqual(response.data['total_paid_amount'], Decimal('5.50'))
+
+    def test_day_has_24_hourly_buckets_and_custom_range_is_inclusive(self):
+        today = period_for('day').start
+        self._order(today + timedelta(hours=13, minutes=30), '3.00')
+
+        day = self.client.get(f'/report/store/{self.owner.id}/', {'timeframe': 'day'}).data
+        custom = self.client.get(f'/report/store/{self.owner.id}/', {
+            'timeframe': 'custom',
+            'start_date': (today - timedelta(days=2)).date().isoformat(),
+            'end_date': today.date().isoformat(),
+        }).data
+
+        self.assertEqual(len(day['orders']), 24)
+        self.assertEqual(day['orders'][13], 1)
+        self.assertEqual(custom['orders'], [0, 0, 1])
+
+
+class DriverRevenueTests(APITestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='store@example.com', password='StrongPass123!')
+        self.store = Store.objects.create(
+            user=owner, name='Loja', phone='900000000', address='Luanda', logo='store_logos/logo.png',
+        )
+        buyer = User.objects.create_user(username='buyer@example.com', password='StrongPass123!')
+        self.customer = Customer.objects.create(user=buyer)
+        courier = User.objects.create_user(username='courier@example.com', password='StrongPass123!', role='driver')
+        self.driver = Driver.objects.create(user=courier)
+        self.token = Token.objects.get_or_create(user=courier)[0].key
+
+    def _order(self, created_at, total, commission, fee, paid=False):
+        Order.objects.bulk_create([Order(
+            store=self.store, customer=self.customer, driver=self.driver, status=Order.DELIVERED,
+            total=Decimal(total), driver_commission=Decimal(commission), delivery_fee=Decimal(fee),
+            payment_method='cash', created_at=created_at,
+            payment_status_driver=Order.PAID if paid else Order.UNPAID,
+        )])
+
+    def test_revenue_endpoints_share_local_time_buckets(self):
+        today = period_for('day').start
+        self._order(today + timedelta(minutes=30), '20.00', '2.00', '1.00')
+        self._order(today + timedelta(hours=13), '30.00', '3.00', '1.50', paid=True)
+        self._order(today - timedelta(minutes=30), '99.00', '9.00', '9.00')
+
+        revenue = self.client.post(
+            '/drivers/revenue/', {'access_token': self.token, 'filter_type': 'day'}, format='json',
+        ).json()['revenue']
+        commission = self.client.post(
+            '/report/driver-commission-revenue/', {'access_token': self.token, 'filter_type': 'day'}, format='json',
+        ).json()
+
+        self.assertEqual(len(revenue), 24)
+        self.assertEqual(Decimal(revenue['00:00']), Decimal('20.00'))
+        self.assertEqual(Decimal(revenue['13:00']), Decimal('30.00'))
+        self.assertEqual(revenue['12:00'], 0)
+        self.assertEqual(Decimal(commission['revenue']['00:00']), Decimal('3.00'))
+        self.assertEqual(Decimal(commission['revenue']['13:00']), Decimal('4.50'))
+        self.assertEqual(len(commission['paid_orders']), 1)
+        self.assertEqual(len(commission['unpaid_orders']), 1)
+
+    def test_earnings_summary_is_one_query(self):
+        now = timezone.localtime()
+        self._order(now, '10.00', '2.00', '0')
+        self._order(now - timedelta(days=10), '10.00', '3.00', '0')
+        self._order(now - timedelta(days=100), '10.00', '4.00', '0')
+
+        with self.assertNumQueries(1):
+            earnings = self.driver.earnings_summary()
+
+        self.assertEqual(
+            earnings,
+            {'today': Decimal('2.00'), 'week': Decimal('2.00'), 'month': Decimal('5.00'), 'all': Decimal('9.00')},
+        )
+
+
+@override_settings(ORDER_NOTIFICATIONS_SYNC=True)
+class DailyRollupTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='store@example.com', password='StrongPass123!')
+        self.store = Store.objects.create(
+            user=owner, name='Loja', phone='900000000', address='Luanda', logo='store_logos/logo.png',
+        )
+        buyer = User.objects.create_user(username='buyer@example.com', password='StrongPass123!')
+        self.customer = Customer.objects.create(user=buyer)
+        courier = User.objects.create_user(username='courier@example.com', password='StrongPass123!', role='driver')
+        self.driver = Driver.objects.create(user=courier)
+
+    def _save(self, order):
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+        return order
+
+    @mock.patch.object(Order, 'send_status_update_email')
+    def test_status_changes_update_rollups_incrementally(self, _):
+        yesterday = timezone.now() - timedelta(days=1)
+        first = self._save(Order(
+            store=self.store, customer=self.customer, driver=self.driver, total='40.00', original_price='40.00',
+            driver_commission='4.00', delivery_fee='2.00', status=Order.PROCESSING, payment_method='cash',
+            created_at=yesterday,
+        ))
+        second = self._save(Order(
+            store=self.store, customer=self.customer, total='10.00', original_price='10.00',
+            status=Order.PROCESSING, payment_method='cash', created_at=yesterday,
+        ))
+        first.status = Order.DELIVERED
+        self._save(first)
+        second.status = Order.DELIVERED
+        self._save(second)
+        second.status = Order.REJECTED
+        self._save(second)
+
+        store_day = StoreDailyRollup.objects.get(store=self.store)
+        self.assertEqual((store_day.orders, store_day.delivered), (2, 1))
+        self.assertEqual(store_day.gross, Decimal('40.00'))
+        self.assertEqual(store_day.store_unpaid, Decimal('40.00'))
+        self.assertEqual(DriverDailyRollup.objects.get(driver=self.driver).driver_unpaid, Decimal('6.00'))
+        self.assertTrue(all(drifted == 0 for _, drifted in rebuild_rollups(dry_run=True).values()))
+
+    def test_rebuild_repairs_orders_written_around_save(self):
+        Order.objects.bulk_create([Order(
+            store=self.store, customer=self.customer, total='5.00', status=Order.DELIVERED, payment_method='cash',
+        )])
+
+        summary = rebuild_rollups()
+
+        self.assertEqual(summary['StoreDailyRollup'], (1, 1))
+        self.assertEqual(StoreDailyRollup.objects.get(store=self.store).gross, Decimal('5.00'))
+        self.assertTrue(all(drifted == 0 for _, drifted in rebuild_rollups(dry_run=True).values()))
+
+
+class StoreStatementTests(APITestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        owner = User.objects.create_user(username='store@example.com', password='StrongPass123!')
+        self.store = Store.objects.create(
+            user=owner, name='Loja', phone='900000000', address='Luanda', logo='store_logos/logo.png',
+        )
+        buyer = User.objects.create_user(username='buyer@example.com', password='StrongPass123!')
+        self.customer = Customer.objects.create(user=buyer)
+        category = ProductCategory.objects.create(name='Comida')
+        self.product = Product.objects.create(
+            store=self.store, name='Prato', description='', price=Decimal('10.00'), category=category,
+        )
+        self.start, self.end = closed_period(StoreStatement.WEEKLY)
+
+    def _order(self, day, sub_totals):
+        order = Order.objects.create(
+            customer=self.customer, store=self.store, total='0.00', status=Order.DELIVERED,
+            payment_method='cash', created_at=day_start(day) + timedelta(hours=12),
+        )
+        for sub_total in sub_totals:
+            OrderDetails.objects.create(order=order, product=self.product, quantity=1, sub_total=sub_total)
+        return order
+
+    def test_closed_periods(self):
+        today = date(2026, 10, 15)  # Thursday
+
+        self.assertEqual(closed_period(StoreStatement.WEEKLY, today), (date(2026, 10, 5), date(2026, 10, 11)))
+        self.assertEqual(closed_period(StoreStatement.MONTHLY, today), (date(2026, 9, 1), date(2026, 9, 30)))
+        with self.assertRaises(ValueError):
+            closed_period('yearly', today)
+
+    def test_context_streams_orders_with_prefetched_details(self):
+        for offset in range(6):
+            self._order(self.start + timedelta(days=offset), ['10.00', '5.50'])
+        self._order(self.end + timedelta(days=1), ['99.00'])  # next period
+
+        with self.assertNumQueries(2):
+            context = statement_context(self.store, StoreStatement.WEEKLY, self.start, self.end)
+
+        self.assertEqual(len(context['orders']), 6)
+        self.assertEqual(context['orders'][0]['order_total'], Decimal('15.50'))
+        self.assertEqual(context['total'], Decimal('93.00'))
+
+    @mock.patch.object(InvoiceRenderer, 'render_pdf', return_value=b'%PDF-1.7 statement')
+    def test_statements_are_rendered_once_and_served_from_storage(self, render_pdf):
+        self._order(self.start, ['10.00'])
+
+        built = generate_statements(StoreStatement.WEEKLY, workers=1)
+
+        self.assertEqual(len(built), 1)
+        statement = StoreStatement.objects.get(pk=built[0])
+        self.assertEqual((statement.orders, statement.total), (1, Decimal('10.00')))
+        self.assertEqual(generate_statements(StoreStatement.WEEKLY, workers=1), [])
+
+        response = self.client.get('/order/stores/generate_invoices/', {'store_id': self.store.id})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.7 statement')
+        self.assertEqual(render_pdf.call_count, 1)
+
+    def test_unknown_period_is_a_bad_request(self):
+        response = self.client.get('/order/stores/generate_invoices/', {'store_id': self.store.id, 'period': 'daily'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(StoreStatement.objects.exists())
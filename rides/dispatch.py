@@ -0,0 +1,120 @@
+"""Batch dispatcher that matches searching rides to nearby free drivers.
+
+Each round takes the whole pool of ``searching`` rides and dispatchable
+drivers, builds candidate (ride, driver) edges from a grid index of the
+driver pool (k nearest drivers per ride within ``RIDE_DISPATCH_MAX_PICKUP_KM``)
+and solves the assignment greedily over the edges sorted by pickup distance.
+Rides are then claimed with a conditional UPDATE so a ride can only ever be
+taken once, whether by the dispatcher or by a driver calling ``accept``.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from drivers.assignments import ACTIVE_RIDE_STATUSES, set_active_ride
+from drivers.geo_index import DriverGeoIndex
+from drivers.models import Driver
+from realtime.broadcast import broadcast_ride
+from .models import Ride
+
+logger = logging.getLogger(__name__)
+
+
+def _max_pickup_km() -> float:
+    return float(getattr(settings, 'RIDE_DISPATCH_MAX_PICKUP_KM', 10))
+
+
+def _candidates_per_ride() -> int:
+    return int(getattr(settings, 'RIDE_DISPATCH_CANDIDATES', 8))
+
+
+def match_rides(rides, drivers, k: int = None, max_pickup_km: float = None):
+    """Assign rides to drivers, nearest pickups first.
+
+    ``rides`` are ``(ride_id, lat, lng)`` and ``drivers`` are
+    ``(driver_id, lat, lng, service_radius_km)`` tuples. Returns a list of
+    ``(ride_id, driver_id, pickup_km)`` with each ride and driver used at most
+    once.
+    """
+    k = k or _candidates_per_ride()
+    max_pickup_km = max_pickup_km or _max_pickup_km()
+    index = DriverGeoIndex()
+    index.load(drivers)
+
+    edges = []
+    for ride_id, lat, lng in rides:
+        for driver_id, distance in index.nearest(lat, lng, k=k, max_radius_km=max_pickup_km):
+            edges.append((distance, ride_id, driver_id))
+    edges.sort()
+
+    matched_rides, matched_drivers, assignments = set(), set(), []
+    for distance, ride_id, driver_id in edges:
+        if ride_id in matched_rides or driver_id in matched_drivers:
+            continue
+        matched_rides.add(ride_id)
+        matched_drivers.add(driver_id)
+        assignments.append((ride_id, driver_id, distance))
+    return assignments
+
+
+def claim_ride(ride_id: int, driver) -> bool:
+    """Atomically hand a searching ride to ``driver``; False if already taken."""
+    claimed = Ride.objects.filter(
+        pk=ride_id, status='searching', driver__isnull=True,
+    ).update(
+        driver=driver,
+        status='accepted',
+        accepted_at=timezone.now(),
+    ) == 1
+    if claimed:
+        set_active_ride(driver.pk, ride_id)
+    return claimed
+
+
+def free_driver_pool():
+    """Dispatchable drivers that are not already on a ride."""
+    return list(
+        Driver.objects.filter(
+            is_online=True,
+            is_available=True,
+            is_verified=True,
+            current_latitude__isnull=False,
+            current_longitude__isnull=False,
+        ).exclude(
+            rides__status__in=ACTIVE_RIDE_STATUSES,
+        ).values_list('id', 'current_latitude', 'current_longitude', 'service_radius_km')
+    )
+
+
+def dispatch_pending_rides() -> dict:
+    """Run one dispatch round and return a summary of what was assigned."""
+    started = time.perf_counter()
+    rides = list(
+        Ride.objects.filter(status='searching', driver__isnull=True)
+        .values_list('id', 'pickup_lat', 'pickup_lng')
+    )
+    drivers = free_driver_pool() if rides else []
+    assignments = match_rides(rides, drivers) if drivers else []
+
+    claimed = []
+    for ride_id, driver_id, _ in assignments:
+        if claim_ride(ride_id, Driver(pk=driver_id)):
+            claimed.append(ride_id)
+
+    if claimed:
+        from .views import _ride_payload
+        for ride in Ride.objects.filter(pk__in=claimed).select_related('driver__user'):
+            broadcast_ride(ride.id, {'type': 'ride_status', 'ride': _ride_payload(ride)})
+
+    summary = {
+        'pending': len(rides),
+        'drivers': len(drivers),
+        'matched': len(assignments),
+        'claimed': len(claimed),
+        'seconds': round(time.perf_counter() - started, 4),
+    }
+    if rides:
+        logger.info("Ride dispatch round: %s", summary)
+    return summary
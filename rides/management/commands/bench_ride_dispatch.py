@@ -0,0 +1,54 @@
+"""Simulate a city-wide dispatch round and report pickup distance and solver time."""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from drivers.geo_index import haversine
+from rides.dispatch import match_rides
+
+LAT_RANGE = (-9.10, -8.70)
+LNG_RANGE = (13.10, 13.50)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the batch ride matcher against first-come assignment"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--riders', type=int, default=10000)
+        parser.add_argument('--drivers', type=int, default=10000)
+        parser.add_argument('--k', type=int, default=8)
+        parser.add_argument('--max-pickup-km', type=float, default=10.0)
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        rides = [
+            (i, rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE))
+            for i in range(options['riders'])
+        ]
+        drivers = [
+            (i, rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE), 15)
+            for i in range(options['drivers'])
+        ]
+
+        # Baseline: what driver_available_rides + first accept amounts to
+        baseline = [
+            haversine(r_lat, r_lng, d_lat, d_lng)
+            for (_, r_lat, r_lng), (_, d_lat, d_lng, _) in zip(rides, drivers)
+        ]
+
+        start = time.perf_counter()
+        assignments = match_rides(rides, drivers, k=options['k'], max_pickup_km=options['max_pickup_km'])
+        elapsed = time.perf_counter() - start
+        distances = [distance for _, _, distance in assignments]
+
+        self.stdout.write(f"riders={len(rides)} drivers={len(drivers)} k={options['k']}")
+        self.stdout.write(
+            f"first-come: matched={len(baseline)} mean pickup={sum(baseline) / len(baseline):.2f} km"
+        )
+        self.stdout.write(
+            f"batch:      matched={len(assignments)} "
+            f"mean pickup={(sum(distances) / len(distances)) if distances else 0:.2f} km "
+            f"solver={elapsed * 1000:.0f} ms"
+        )
@@ -0,0 +1,24 @@
+"""Run the batch ride dispatcher, once or every few seconds."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from rides.dispatch import dispatch_pending_rides
+
+
+class Command(BaseCommand):
+    help = "Match searching rides to the nearest free drivers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=3.0, help="Seconds between rounds")
+        parser.add_argument('--once', action='store_true', help="Run a single round and exit")
+
+    def handle(self, *args, **options):
+        while True:
+            summary = dispatch_pending_rides()
+            if options['once']:
+                self.stdout.write(self.style.SUCCESS(f"Dispatch round: {summary}"))
+                return
+            if summary['pending']:
+                self.stdout.write(f"Dispatch round: {summary}")
+            time.sleep(options['interval'])
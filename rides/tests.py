@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from drivers.models import Driver
+from .dispatch import claim_ride, dispatch_pending_rides, match_rides
+from .models import Ride
+
+
+User = get_user_model()
+
+
+class RideDispatchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create_user(username='rider@example.com', password='StrongPass123!')
+
+    def _driver(self, username, lat, lng):
+        user = User.objects.create_user(username=username, password='StrongPass123!', role='driver')
+        return Driver.objects.create(
+            user=user,
+            is_online=True,
+            is_available=True,
+            is_verified=True,
+            current_latitude=Decimal(str(lat)),
+            current_longitude=Decimal(str(lng)),
+        )
+
+    def _ride(self, lat, lng):
+        return Ride.objects.create(
+            customer=self.customer,
+            status='searching',
+            pickup_address='Pickup',
+            pickup_lat=Decimal(str(lat)),
+            pickup_lng=Decimal(str(lng)),
+            destination_address='Destination',
+            destination_lat=Decimal('-8.8000'),
+            destination_lng=Decimal('13.2300'),
+        )
+
+    def test_match_rides_pairs_each_ride_with_a_distinct_nearest_driver(self):
+        rides = [(1, -8.8383, 13.2344), (2, -8.9000, 13.2344)]
+        drivers = [(10, -8.8390, 13.2344, 10), (20, -8.8990, 13.2344, 10), (30, -8.8385, 13.2344, 10)]
+
+        assignments = {ride_id: driver_id for ride_id, driver_id, _ in match_rides(rides, drivers)}
+
+        self.assertEqual(assignments, {1: 30, 2: 20})
+
+    def test_ride_can_only_be_claimed_once(self):
+        ride = self._ride(-8.8383, 13.2344)
+        first = self._driver('d1@example.com', -8.8390, 13.2344)
+        second = self._driver('d2@example.com', -8.8390, 13.2345)
+
+        self.assertTrue(claim_ride(ride.id, first))
+        self.assertFalse(claim_ride(ride.id, second))
+
+        ride.refresh_from_db()
+        self.assertEqual(ride.driver_id, first.id)
+        self.assertEqual(ride.status, 'accepted')
+
+    def test_other_driver_cannot_accept_a_dispatched_ride(self):
+        ride = self._ride(-8.8383, 13.2344)
+        near = self._driver('near@example.com', -8.8390, 13.2344)
+        far = self._driver('far@example.com', -8.8800, 13.2344)
+
+        summary = dispatch_pending_rides()
+        self.assertEqual(summary['claimed'], 1)
+        ride.refresh_from_db()
+        self.assertEqual(ride.driver_id, near.id)
+
+        self.client.force_authenticate(far.user)
+        response = self.client.post(f'/api/rides/{ride.id}/accept/')
+
+        self.assertEqual(response.status_code, 404)
@@ -1,3 +1,5 @@
+import math
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
@@ -6,10 +8,13 @@ from django.utils import timezone
 from django.db.models import Q
 
 from drivers.models import Driver
+from drivers.assignments import clear_active_ride
+from drivers.geo_index import KM_PER_DEGREE, haversine
 from contas.permissions import scope_queryset_for_user
 from .models import Ride
 from .serializers import RideSerializer, RideEstimateSerializer, RideRequestSerializer
 from .pricing import haversine_km, estimate_duration_minutes, estimate_ride_price
+from .dispatch import claim_ride
 from realtime.broadcast import broadcast_ride
 
 
@@ -90,10 +95,11 @@ class RideViewSet(viewsets.ModelViewSet):
         driver = request.user.driver
         if not driver.is_online:
             return Response({'detail': 'Go online first.'}, status=status.HTTP_400_BAD_REQUEST)
-        ride.driver = driver
-        ride.status = 'accepted'
-        ride.accepted_at = timezone.now()
-        ride.save()
+        if ride.driver_id == driver.id and ride.status == 'accepted':
+            return Response(RideSerializer(ride).data)
+        if not claim_ride(ride.id, driver):
+            return Response({'detail': 'Ride already taken.'}, status=status.HTTP_409_CONFLICT)
+        ride.refresh_from_db()
         broadcast_ride(ride.id, {'type': 'ride_status', 'ride': _ride_payload(ride)})
         return Response(RideSerializer(ride).data)
 
@@ -123,6 +129,7 @@ class RideViewSet(viewsets.ModelViewSet):
         ride.final_price = request.data.get('final_price', ride.estimated_price)
         ride.payment_status = 'paid'
         ride.save()
+        clear_active_ride(ride.driver_id, ride.id)
         if ride.driver:
             ride.driver.completed_deliveries += 1
             ride.driver.save(update_fields=['completed_deliveries'])
@@ -140,6 +147,7 @@ class RideViewSet(viewsets.ModelViewSet):
         ride.cancelled_at = timezone.now()
         ride.cancellation_reason = request.data.get('reason', '')
         ride.save()
+        clear_active_ride(ride.driver_id, ride.id)
         broadcast_ride(ride.id, {'type': 'ride_status', 'ride': _ride_payload(ride)})
         return Response(RideSerializer(ride).data)
 
@@ -157,5 +165,22 @@ def driver_available_rides(request):
     """Rides searching for a driver near driver location."""
     if not hasattr(request.user, 'driver'):
         return Response({'detail': 'Driver only.'}, status=status.HTTP_403_FORBIDDEN)
-    qs = Ride.objects.filter(status='searching', driver__isnull=True).order_by('-created_at')[:20]
-    return Response(RideSerializer(qs, many=True).data)
+    driver = request.user.driver
+    qs = Ride.objects.filter(status='searching', driver__isnull=True).order_by('-created_at')
+    if driver.current_latitude is None or driver.current_longitude is None:
+        return Response(RideSerializer(qs[:20], many=True).data)
+    lat, lng = float(driver.current_latitude), float(driver.current_longitude)
+    radius = float(driver.service_radius_km or 10)
+    dlat = radius / KM_PER_DEGREE
+    dlng = radius / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    qs = qs.filter(
+        pickup_lat__range=(lat - dlat, lat + dlat),
+        pickup_lng__range=(lng - dlng, lng + dlng),
+    )
+    nearby = []
+    for ride in qs:
+        distance = haversine(lat, lng, float(ride.pickup_lat), float(ride.pickup_lng))
+        if distance <= radius:
+            nearby.append((distance, ride))
+    nearby.sort(key=lambda item: item[0])
+    return Response(RideSerializer([ride for _, ride in nearby[:20]], many=True).data)
@@ -0,0 +1,140 @@
+"""Free booking slots of a service over a date range.
+
+``available_slots`` loads everything it needs for the whole window in three
+queries: blackouts, availability rules and active bookings. It then computes
+the slots with interval arithmetic. A slot is free unless it overlaps an
+active booking, the same rule ``Booking.check_time_conflict`` applies when
+booking. Slots are cached per service and day
+(``SERVICE_AVAILABILITY_CACHE_TIMEOUT``, default 1 day with a shared cache,
+else ``CATALOG_LOCAL_TIMEOUT``). The cache is versioned per service, and
+receivers in ``services.models`` bump the version on booking, blackout,
+availability rule and service writes.
+"""
+import bisect
+from datetime import date, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from kudya_platform import versions
+
+ACTIVE_STATUSES = ('pending', 'confirmed', 'in_progress')
+DAY = 24 * 3600
+
+
+def scope(service_id) -> str:
+    return f"availability:{service_id}"
+
+
+def invalidate(service_id) -> None:
+    versions.invalidate(scope(service_id))
+
+
+def _seconds(value: time) -> int:
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+def _merge(intervals) -> tuple:
+    """Sorted, disjoint ``(starts, ends)`` covering ``intervals``."""
+    starts, ends = [], []
+    for start, end in sorted(intervals):
+        if ends and start < ends[-1]:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def _overlaps(busy, start, end) -> bool:
+    starts, ends = busy
+    # The first busy interval ending after ``start`` is the only candidate
+    index = bisect.bisect_right(ends, start)
+    return index < len(starts) and starts[index] < end
+
+
+def day_slots(rules, busy, offset, duration) -> list:
+    """Free slot start times of one day.
+
+    ``rules``: ``(start, end)`` times of the day's availability rules;
+    ``busy``: merged booking intervals in seconds from the window's first
+    midnight; ``offset``: the day's midnight on that scale.
+    """
+    step = duration * 60
+    if step <= 0:
+        return []
+    free = set()
+    for rule_start, rule_end in rules:
+        start, end = _seconds(rule_start), _seconds(rule_end)
+        while start + step <= end:
+            if not _overlaps(busy, offset + start, offset + start + step):
+                free.add(start)
+            start += step
+    return [time(start // 3600, start // 60 % 60, start % 60) for start in sorted(free)]
+
+
+def compute(service, start_date: date, end_date: date) -> dict:
+    """``{day: [free slot times]}`` for every day of the range, in three queries."""
+    from .models import Booking
+
+    blackouts = list(
+        service.blackout_dates.filter(start_date__lte=end_date, end_date__gte=start_date)
+        .values_list('start_date', 'end_date')
+    )
+    rules = list(
+        service.availability_slots.filter(is_active=True)
+        .filter(Q(is_recurring=True) | Q(is_recurring=False, specific_date__range=(start_date, end_date)))
+        .values_list('is_recurring', 'day_of_week', 'specific_date', 'start_time', 'end_time')
+    )
+    # Bookings of the day before may run past midnight
+    bookings = Booking.objects.filter(
+        service=service, status__in=ACTIVE_STATUSES,
+        booking_date__range=(start_date - timedelta(days=1), end_date),
+    ).values_list('booking_date', 'booking_time', 'duration_minutes')
+    # Intervals in seconds from the first day's midnight
+    busy = _merge(
+        (
+            (booking_date - start_date).days * DAY + _seconds(booking_time),
+            (booking_date - start_date).days * DAY + _seconds(booking_time) + duration * 60,
+        )
+        for booking_date, booking_time, duration in bookings
+    )
+
+    slots = {}
+    day = start_date
+    while day <= end_date:
+        if any(first <= day <= last for first, last in blackouts):
+            slots[day] = []
+        else:
+            day_rules = [
+                (rule_start, rule_end)
+                for recurring, weekday, specific_date, rule_start, rule_end in rules
+                if (weekday == day.isoweekday() if recurring else specific_date == day)
+            ]
+            slots[day] = day_slots(day_rules, busy, (day - start_date).days * DAY, service.duration_minutes)
+        day += timedelta(days=1)
+    return slots
+
+
+def available_slots(service, start_date: date, end_date: date) -> dict:
+    """``{"YYYY-MM-DD": [{"time": "HH:MM", "available": True}, ...]}`` of the days with free slots."""
+    version = versions.version(scope(service.pk))
+    keys = {}
+    day = start_date
+    while day <= end_date:
+        keys[day] = f"services:availability:{service.pk}:{version}:{day.isoformat()}"
+        day += timedelta(days=1)
+    cached = cache.get_many(list(keys.values()))
+    missing = [day for day, key in keys.items() if key not in cached]
+    if missing:
+        computed = compute(service, missing[0], missing[-1])
+        fresh = {
+            keys[day]: [slot.strftime('%H:%M') for slot in computed[day]] for day in missing
+        }
+        cache.set_many(fresh, versions.timeout("SERVICE_AVAILABILITY_CACHE_TIMEOUT", DAY))
+        cached.update(fresh)
+    return {
+        day.isoformat(): [{'time': slot, 'available': True} for slot in cached[key]]
+        for day, key in keys.items()
+        if cached[key]
+    }
@@ -0,0 +1,132 @@
+"""Benchmark: ``get_available_slots`` over 7, 30 and 90-day windows.
+
+Seeds one service with 15-minute slots, weekday rules (08:00-12:00 and
+13:00-18:00, Saturday mornings), a blackout week and ``--bookings`` bookings
+(a third of them cancelled), then computes the window three ways: the former per-day, per-slot
+queries, ``services.availability`` with an empty cache, and again with the
+cache filled. Prints queries and milliseconds of each. Seeded rows are deleted
+afterwards.
+"""
+import random
+import time as timer
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+
+from customers.models import Customer
+from services import availability
+from services.models import BlackoutDate, Booking, Service, ServiceAvailability, ServiceCategory
+from stores.models import Store
+
+User = get_user_model()
+PREFIX = 'bench-availability-'
+
+
+def legacy_slots(service, start_date, end_date):
+    """The per-slot implementation ``get_available_slots`` replaced."""
+    slots_by_date = {}
+    current_date = start_date
+    while current_date <= end_date:
+        day_of_week = current_date.isoweekday()
+        is_blackout = service.blackout_dates.filter(
+            start_date__lte=current_date, end_date__gte=current_date
+        ).exists()
+        if not is_blackout:
+            availabilities = service.availability_slots.filter(
+                Q(is_recurring=True, day_of_week=day_of_week, is_active=True) |
+                Q(is_recurring=False, specific_date=current_date, is_active=True)
+            )
+            day_slots = []
+            for rule in availabilities:
+                for time_slot in rule.generate_time_slots(current_date, service.duration_minutes):
+                    is_booked = Booking.objects.filter(
+                        service=service, booking_date=current_date, booking_time=time_slot,
+                        status__in=['pending', 'confirmed', 'in_progress'],
+                    ).exists()
+                    if not is_booked:
+                        day_slots.append({'time': time_slot.strftime('%H:%M'), 'available': True})
+            if day_slots:
+                slots_by_date[current_date.isoformat()] = day_slots
+        current_date += timedelta(days=1)
+    return slots_by_date
+
+
+class Command(BaseCommand):
+    help = "Compare per-slot and interval-based availability over 7, 30 and 90 days"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=400)
+
+    def handle(self, *args, **options):
+        self._cleanup()
+        try:
+            service = self._seed(options['bookings'])
+            self.stdout.write(f"database={connection.vendor} bookings={options['bookings']} slot=15 min")
+            start = date.today() + timedelta(days=1)
+            for days in (7, 30, 90):
+                end = start + timedelta(days=days - 1)
+                cache.clear()
+                self._report(days, "per-slot", lambda: legacy_slots(service, start, end))
+                self._report(days, "cold", lambda: availability.available_slots(service, start, end))
+                self._report(days, "warm", lambda: availability.available_slots(service, start, end))
+        finally:
+            self._cleanup()
+
+    def _report(self, days, label, run):
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            started = timer.perf_counter()
+            slots = run()
+            elapsed = timer.perf_counter() - started
+        self.stdout.write(
+            f"{days:>3} days {label:>9}: {len(queries):6} queries {elapsed * 1000:10.2f} ms  "
+            f"({sum(map(len, slots.values()))} free slots)"
+        )
+
+    def _cleanup(self):
+        Service.objects.filter(parceiro__user__username__startswith=PREFIX).delete()
+        Customer.objects.filter(user__username__startswith=PREFIX).delete()
+        Store.objects.filter(user__username__startswith=PREFIX).delete()
+        User.objects.filter(username__startswith=PREFIX).delete()
+        ServiceCategory.objects.filter(slug__startswith=PREFIX).delete()
+
+    def _seed(self, count):
+        rng = random.Random(42)
+        owner = User.objects.create(username=f"{PREFIX}store")
+        store = Store.objects.bulk_create([
+            Store(user=owner, name='Bench', phone='0', address='Luanda', logo='x.png')
+        ])[0]
+        customer = Customer.objects.create(user=User.objects.create(username=f"{PREFIX}customer"))
+        category = ServiceCategory.objects.create(name='Bench', slug=f"{PREFIX}category")
+        service = Service.objects.create(
+            parceiro=store, category=category, title='Bench', description='', price=Decimal('1000'),
+            duration_minutes=15,
+        )
+        rules = [
+            ServiceAvailability(service=service, day_of_week=weekday, start_time=start, end_time=end)
+            for weekday in range(1, 6)
+            for start, end in ((time(8), time(12)), (time(13), time(18)))
+        ]
+        rules.append(ServiceAvailability(service=service, day_of_week=6, start_time=time(8), end_time=time(12)))
+        ServiceAvailability.objects.bulk_create(rules)
+        first = date.today() + timedelta(days=1)
+        BlackoutDate.objects.create(
+            service=service, start_date=first + timedelta(days=40), end_date=first + timedelta(days=46),
+        )
+        Booking.objects.bulk_create([
+            Booking(
+                booking_number=f"BENCH{i:06}", service=service, customer=customer,
+                booking_date=first + timedelta(days=rng.randrange(90)),
+                booking_time=(datetime.min + timedelta(minutes=rng.randrange(32, 72) * 15)).time(),
+                duration_minutes=rng.choice((15, 30, 60)), price=Decimal('1000'),
+                status=rng.choice(('pending', 'confirmed', 'cancelled')),
+            )
+            for i in range(count)
+        ])
+        return service
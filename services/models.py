@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -568,3 +570,40 @@ class ParceiroEarnings(models.Model):
 
     def __str__(self):
         return f"{self.parceiro.name} - {self.net_amount} {self.currency}"
+
+
+# The service search index (services.search) is rebuilt when these change
+
+@receiver([post_save, post_delete], sender=Service)
+@receiver([post_save, post_delete], sender=ServiceReview)
+@receiver([post_save, post_delete], sender=ParceirKYC)
+def invalidate_service_search(sender, **kwargs):
+    from services import search
+
+    transaction.on_commit(search.invalidate)
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def invalidate_service_search_bookings(sender, instance, **kwargs):
+    # Only completed bookings count towards the ranking
+    if instance.status == 'completed':
+        invalidate_service_search(sender)
+
+
+# Cached free slots (services.availability) are versioned per service
+
+@receiver([post_save, post_delete], sender=Booking)
+@receiver([post_save, post_delete], sender=BlackoutDate)
+@receiver([post_save, post_delete], sender=ServiceAvailability)
+def invalidate_service_availability(sender, instance, **kwargs):
+    from services import availability
+
+    transaction.on_commit(lambda: availability.invalidate(instance.service_id))
+
+
+@receiver([post_save, post_delete], sender=Service)
+def invalidate_service_slots(sender, instance, **kwargs):
+    from services import availability
+
+    # The slot length is the service's duration
+    transaction.on_commit(lambda: availability.invalidate(instance.pk))
@@ -0,0 +1,259 @@
+"""In-memory inverted index behind ``service_search``.
+
+The index holds every active service. Its title, description (English and
+Portuguese) and comma-separated tags are split into stems with the product
+search analyzer (``stores.search``): accents, case and PT/EN stopwords are
+dropped, and plurals and gender forms share a stem. Each service also keeps
+its category, price, delivery type, KYC verification, average rating and
+completed bookings. The facet filters are evaluated on those values, so a
+search never touches the ``Service`` table.
+
+Every query word must match; the last one also as a prefix, and a word that
+matches nothing is corrected to the closest indexed terms. The relevance of a
+match (title and tags above descriptions, rare words above common ones) is
+multiplied by a popularity factor made of rating and bookings
+(``SERVICE_SEARCH_RATING_WEIGHT`` and ``SERVICE_SEARCH_BOOKINGS_WEIGHT``,
+default 0.5 each). Results are paginated by an opaque cursor holding the
+score and id of the last one returned.
+
+Each process builds the index once and rebuilds it when the ``services``
+version (``kudya_platform.versions``) changes. Receivers in
+``services.models`` bump the version on service, review, completed booking
+and KYC writes. Rebuilds after the first run in a background thread, and
+searches use the previous index meanwhile.
+"""
+import base64
+import binascii
+import bisect
+import heapq
+import math
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+from os.path import commonprefix
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Avg, Count, OuterRef, Subquery
+
+from kudya_platform import versions
+from stores.search import distance, stem, words
+
+SCOPE = "services"
+FIELD_WEIGHTS = (("title", 3.0), ("title_pt", 3.0), ("tags", 2.5), ("description", 1.0), ("description_pt", 1.0))
+SATURATION = 1.2  # BM25 k1: repeating a word adds less and less
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class IndexedService:
+    id: int
+    category_id: int
+    price: Decimal
+    delivery_type: str
+    verified: bool
+    rating: float
+    bookings: int
+
+
+def parse_tags(tags) -> list:
+    return [tag.strip() for tag in (tags or "").split(",") if tag.strip()]
+
+
+def encode_cursor(score, service_id) -> str:
+    return base64.urlsafe_b64encode(f"{score!r}:{service_id}".encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        score, service_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(score), int(service_id)
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+class ServiceIndex:
+    def __init__(self, services, version=None):
+        """``services``: dicts with the ``IndexedService`` fields plus the text fields."""
+        self.version = version
+        self.services = {}
+        frequencies = defaultdict(lambda: defaultdict(float))
+        for service in services:
+            indexed = IndexedService(**{name: service[name] for name in IndexedService.__dataclass_fields__})
+            self.services[indexed.id] = indexed
+            texts = dict(service, tags=" ".join(parse_tags(service["tags"])))
+            for field, weight in FIELD_WEIGHTS:
+                for term in map(stem, words(texts[field])):
+                    frequencies[term][indexed.id] += weight
+        total = len(self.services)
+        # term -> {service id: relevance of the term for that service}
+        self.postings = {}
+        for term, services_tf in frequencies.items():
+            idf = math.log(1 + (total - len(services_tf) + 0.5) / (len(services_tf) + 0.5))
+            self.postings[term] = {
+                service_id: idf * tf * (SATURATION + 1) / (tf + SATURATION) for service_id, tf in services_tf.items()
+            }
+        self.terms = sorted(self.postings)
+        self.max_bookings = max((service.bookings for service in self.services.values()), default=0)
+        self.boost = {service_id: self.popularity(service) for service_id, service in self.services.items()}
+
+    def _prefixed(self, prefix) -> dict:
+        matches = {}
+        for term in self.terms[bisect.bisect_left(self.terms, prefix):]:
+            if not term.startswith(prefix):
+                break
+            for service_id, relevance in self.postings[term].items():
+                matches[service_id] = max(matches.get(service_id, 0), relevance)
+        return matches
+
+    def _corrected(self, term) -> dict:
+        limit = 1 if len(term) <= 5 else 2
+        candidates = sorted(
+            (distance(term, candidate, limit), candidate)
+            for candidate in self.terms
+            if candidate[0] == term[0] and abs(len(candidate) - len(term)) <= limit
+        )
+        matches = {}
+        for cost, candidate in candidates[:3]:
+            if cost <= limit:
+                for service_id, relevance in self.postings[candidate].items():
+                    matches[service_id] = max(matches.get(service_id, 0), relevance)
+        return matches
+
+    def relevance(self, query):
+        """``{service id: relevance}`` of the services matching every word, or None without words."""
+        query_words = words(query)
+        scores = None
+        for position, word in enumerate(query_words):
+            term = stem(word)
+            matches = None
+            # The last word may be incomplete unless the user typed a space after it
+            if position == len(query_words) - 1 and query[-1:].isalnum():
+                if len(word) < 2:
+                    continue  # would match almost everything
+                matches = self._prefixed(commonprefix([word, term]))
+            matches = matches or self.postings.get(term) or self._corrected(term)
+            if scores is None:
+                scores = dict(matches)
+            else:
+                scores = {
+                    service_id: score + matches[service_id] for service_id, score in scores.items()
+                    if service_id in matches
+                }
+            if not scores:
+                return {}
+        return scores
+
+    def popularity(self, service) -> float:
+        bookings = math.log1p(service.bookings) / math.log1p(self.max_bookings) if self.max_bookings else 0
+        return (
+            1
+            + getattr(settings, "SERVICE_SEARCH_RATING_WEIGHT", 0.5) * service.rating / 5
+            + getattr(settings, "SERVICE_SEARCH_BOOKINGS_WEIGHT", 0.5) * bookings
+        )
+
+    def search(self, query="", category=None, min_price=None, max_price=None, delivery_type=None,
+               verified=None, limit=20, cursor=None):
+        """``(service ids, next cursor or None, total matches)``, best first."""
+        limit = max(1, limit)
+        relevance = self.relevance(query)
+        if relevance is None:
+            candidates = ((service_id, 1.0) for service_id in self.services)
+        else:
+            candidates = relevance.items()
+        # Sort keys: best first, then newest first
+        ranked = []
+        for service_id, score in candidates:
+            service = self.services[service_id]
+            if category is not None and service.category_id != category:
+                continue
+            if min_price is not None and service.price < min_price:
+                continue
+            if max_price is not None and service.price > max_price:
+                continue
+            if delivery_type and service.delivery_type != delivery_type:
+                continue
+            if verified is not None and service.verified != verified:
+                continue
+            ranked.append((-score * self.boost[service_id], -service_id))
+        after = ranked
+        if cursor:
+            score, service_id = decode_cursor(cursor)
+            after = [key for key in ranked if key > (-score, -service_id)]
+        page = heapq.nsmallest(limit + 1, after)
+        next_cursor = encode_cursor(-page[limit - 1][0], -page[limit - 1][1]) if len(page) > limit else None
+        return [-service_id for _, service_id in page[:limit]], next_cursor, len(ranked)
+
+
+def build_index(version=None) -> ServiceIndex:
+    from .models import Booking, Service, ServiceReview
+
+    rating = (
+        ServiceReview.objects.filter(service=OuterRef("pk")).order_by()
+        .values("service").annotate(value=Avg("rating")).values("value")
+    )
+    bookings = (
+        Booking.objects.filter(service=OuterRef("pk"), status="completed").order_by()
+        .values("service").annotate(value=Count("pk")).values("value")
+    )
+    services = Service.objects.filter(is_active=True).annotate(
+        average=Subquery(rating), completed=Subquery(bookings),
+    ).values(
+        "id", "category_id", "price", "delivery_type", "parceiro__kyc__is_verified", "average", "completed",
+        *[field for field, _ in FIELD_WEIGHTS],
+    )
+    return ServiceIndex(
+        (
+            dict(
+                service,
+                verified=bool(service["parceiro__kyc__is_verified"]),
+                rating=float(service["average"] or 0),
+                bookings=service["completed"] or 0,
+            )
+            for service in services.iterator()
+        ),
+        version,
+    )
+
+
+_index = None
+_lock = threading.Lock()
+_rebuilding = threading.Lock()
+
+
+def _rebuild(version):
+    global _index
+    try:
+        _index = build_index(version)
+    finally:
+        connections.close_all()  # this thread's connections
+        _rebuilding.release()
+
+
+def current_index() -> ServiceIndex:
+    """This process' index, rebuilt if services changed since it was built.
+
+    Only the first build blocks. Later ones run in a background thread while
+    searches keep using the previous index, unless ``SERVICE_SEARCH_SYNC``.
+    """
+    global _index
+    version = versions.version(SCOPE)
+    index = _index
+    if index is not None and index.version != version and not getattr(settings, "SERVICE_SEARCH_SYNC", False):
+        if _rebuilding.acquire(blocking=False):
+            threading.Thread(target=_rebuild, args=(version,), daemon=True, name="service-search").start()
+        return index
+    if index is None or index.version != version:
+        with _lock:
+            if _index is None or _index.version != version:
+                _index = build_index(version)
+            index = _index
+    return index
+
+
+def invalidate() -> None:
+    versions.invalidate(SCOPE)
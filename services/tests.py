@@ -1,3 +1,208 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from customers.models import Customer
+from services import availability, search
+from services.models import BlackoutDate, Booking, ParceirKYC, Service, ServiceAvailability, ServiceCategory, ServiceReview
+from stores.models import Store
+
+User = get_user_model()
+
+
+@override_settings(SERVICE_SEARCH_SYNC=True)
+class ServiceSearchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.home = ServiceCategory.objects.create(name='Home', slug='home')
+        self.health = ServiceCategory.objects.create(name='Health', slug='health')
+        self.store = self._store('casa@example.com')
+        verified_store = self._store('clinica@example.com')
+        ParceirKYC.objects.create(
+            parceiro=verified_store, full_legal_name='Clínica', id_document_number='1', id_document_front='kyc/1.png',
+            bank_name='BAI', account_holder_name='Clínica', account_number='1', is_verified=True,
+        )
+        self.plumber = self._service(
+            self.store, 'Plumbing repairs', title_pt='Canalizador ao domicílio', tags='canos, urgente',
+            price='5000', delivery_type='at_customer',
+        )
+        self.electrician = self._service(
+            self.store, 'Electrician', description='Repairs of sockets and plumbing pumps', price='8000',
+        )
+        self.doctor = self._service(
+            verified_store, 'Medical consultation', title_pt='Consulta médica', category=self.health,
+            price='15000', delivery_type='online',
+        )
+        customer_user = User.objects.create_user(username='cliente@example.com', password='StrongPass123!')
+        self.customer = Customer.objects.create(user=customer_user)
+
+    def _store(self, username):
+        user = User.objects.create_user(username=username, password='StrongPass123!')
+        return Store.objects.create(user=user, name=username, phone='0', address='Luanda', logo='store_logos/x.png')
+
+    def _service(self, store, title, category=None, price='1000', delivery_type='in_person', **fields):
+        fields.setdefault('description', '')
+        return Service.objects.create(
+            parceiro=store, category=category or self.home, title=title, price=Decimal(price),
+            delivery_type=delivery_type, **fields,
+        )
+
+    def _search(self, query='', **filters):
+        return search.current_index().search(query, **filters)[0]
+
+    def test_matches_both_languages_and_tags_ranking_titles_first(self):
+        self.assertEqual(self._search('plumbing '), [self.plumber.id, self.electrician.id])
+        self.assertEqual(self._search('canalizadores'), [self.plumber.id])
+        self.assertEqual(self._search('urgentes '), [self.plumber.id])
+        self.assertEqual(self._search('consulta medica'), [self.doctor.id])
+        self.assertEqual(self._search('electrcian '), [self.electrician.id])
+        self.assertEqual(self._search('cons'), [self.doctor.id])
+        self.assertEqual(self._search('nothing here'), [])
+
+    def test_rating_and_completed_bookings_lift_the_ranking(self):
+        booking = Booking.objects.create(
+            service=self.electrician, customer=self.customer, booking_date=date(2026, 1, 5),
+            booking_time=time(10), duration_minutes=60, price=Decimal('8000'), status='completed',
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            ServiceReview.objects.create(
+                service=self.electrician, booking=booking, customer=self.customer, rating=5, comment='Óptimo',
+            )
+
+        self.assertEqual(self._search(), [self.electrician.id, self.doctor.id, self.plumber.id])
+        entry = search.current_index().services[self.electrician.id]
+        self.assertEqual((entry.rating, entry.bookings), (5.0, 1))
+
+    def test_facets_are_evaluated_on_the_index(self):
+        index = search.current_index()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(index.search(category=self.health.id)[0], [self.doctor.id])
+            self.assertEqual(index.search(min_price=Decimal('6000'), max_price=Decimal('9000'))[0],
+                             [self.electrician.id])
+            self.assertEqual(index.search('repairs', delivery_type='at_customer')[0], [self.plumber.id])
+            self.assertEqual(index.search(verified=True)[0], [self.doctor.id])
+
+    def test_writes_rebuild_the_index(self):
+        self.assertEqual(self._search('tutor'), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tutor = self._service(self.store, 'Math tutor')
+        self.assertEqual(self._search('tutor'), [tutor.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tutor.is_active = False
+            tutor.save()
+        self.assertEqual(self._search('tutor'), [])
+
+    def test_endpoint_pages_by_cursor(self):
+        seen, url = [], '/services/search/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['count'], 3)
+            seen += [service['id'] for service in response.json()['results']]
+            url = response.json()['next']
+
+        self.assertEqual(seen, self._search())
+        self.assertEqual(self.client.get('/services/search/?cursor=bm9wZQ').status_code, 400)
+        verified = self.client.get('/services/search/', {'q': 'consulta', 'verified_only': 'true'}).json()
+        self.assertEqual([service['is_verified'] for service in verified['results']], [True])
+
+    def test_endpoint_ignores_out_of_range_parameters(self):
+        response = self.client.get('/services/search/', {'page_size': -5, 'min_price': 'NaN', 'max_price': 'Infinity'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertEqual(response.json()['count'], 3)
+        self.assertEqual(self._search(limit=0), self._search()[:1])
+
+
+class AvailabilityTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user = User.objects.create_user(username='agenda@example.com', password='StrongPass123!')
+        store = Store.objects.create(user=user, name='Agenda', phone='0', address='Luanda', logo='store_logos/x.png')
+        category = ServiceCategory.objects.create(name='Home', slug='home')
+        self.service = Service.objects.create(
+            parceiro=store, category=category, title='Cleaning', description='', price=Decimal('1000'),
+            duration_minutes=60,
+        )
+        # 2026-01-05 is a Monday
+        self.monday = date(2026, 1, 5)
+        ServiceAvailability.objects.create(
+            service=self.service, day_of_week=1, start_time=time(9), end_time=time(12),
+        )
+        ServiceAvailability.objects.create(
+            service=self.service, is_recurring=False, specific_date=date(2026, 1, 7),
+            start_time=time(14), end_time=time(16),
+        )
+        customer_user = User.objects.create_user(username='cliente@example.com', password='StrongPass123!')
+        self.customer = Customer.objects.create(user=customer_user)
+
+    def _slots(self, days=14):
+        return availability.available_slots(self.service, self.monday, self.monday + timedelta(days=days - 1))
+
+    def _book(self, booking_time, duration=60, status='pending'):
+        return Booking.objects.create(
+            service=self.service, customer=self.customer, booking_date=self.monday, booking_time=booking_time,
+            duration_minutes=duration, price=Decimal('1000'), status=status,
+        )
+
+    def test_window_is_computed_in_three_queries_and_cached_per_day(self):
+        with self.assertNumQueries(3):
+            slots = self._slots()
+        self.assertEqual(list(slots), ['2026-01-05', '2026-01-07', '2026-01-12'])
+        self.assertEqual(slots['2026-01-05'], [
+            {'time': '09:00', 'available': True}, {'time': '10:00', 'available': True},
+            {'time': '11:00', 'available': True},
+        ])
+        self.assertEqual([slot['time'] for slot in slots['2026-01-07']], ['14:00', '15:00'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self._slots(), slots)
+            self.assertEqual(list(self._slots(days=7)), ['2026-01-05', '2026-01-07'])
+
+    def test_cached_days_are_short_lived_without_a_shared_cache(self):
+        with mock.patch.object(availability.cache, 'set_many', wraps=availability.cache.set_many) as set_many:
+            self._slots(days=1)
+        self.assertEqual(set_many.call_args.args[1], 60)
+
+        with self.settings(SERVICE_AVAILABILITY_CACHE_TIMEOUT=600):
+            self.assertEqual(availability.versions.timeout('SERVICE_AVAILABILITY_CACHE_TIMEOUT', availability.DAY), 600)
+
+    def test_slots_overlapping_an_active_booking_are_taken(self):
+        self._book(time(9, 30))
+        self._book(time(11), status='cancelled')
+
+        slots = self._slots(days=1)
+
+        self.assertEqual([slot['time'] for slot in slots['2026-01-05']], ['11:00'])
+
+    def test_blackout_days_have_no_slots(self):
+        BlackoutDate.objects.create(service=self.service, start_date=date(2026, 1, 6), end_date=date(2026, 1, 12))
+
+        self.assertEqual(list(self._slots()), ['2026-01-05'])
+
+    def test_writes_invalidate_the_cached_days(self):
+        self.assertIn('2026-01-05', self._slots())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self._book(time(9), duration=180)
+        self.assertNotIn('2026-01-05', self._slots())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = 'cancelled'
+            booking.save()
+        self.assertIn('2026-01-05', self._slots())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.duration_minutes = 30
+            self.service.save()
+        self.assertEqual(len(self._slots()['2026-01-05']), 6)
@@ -6,6 +6,10 @@ from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q, Avg, Count, Sum, F
 from django.utils import timezone
 from datetime import datetime, timedelta
+from rest_framework.utils.urls import replace_query_param
+
+from kudya_platform.params import decimal_param, int_param
+from . import availability, search
 from .models import (
     Country, Province, ServiceCategory, Service, ServiceAvailability,
     BlackoutDate, Booking, ServiceReview, ParceirKYC, PayoutRequest,
@@ -126,51 +130,7 @@ class ServiceViewSet(viewsets.ModelViewSet):
     
     def get_available_slots(self, service, start_date, end_date):
         """Get available time slots for a date range"""
-        slots_by_date = {}
-        current_date = start_date
-        
-        while current_date <= end_date:
-            day_of_week = current_date.isoweekday()
-            
-            # Check if date is in blackout period
-            is_blackout = service.blackout_dates.filter(
-                start_date__lte=current_date,
-                end_date__gte=current_date
-            ).exists()
-            
-            if not is_blackout:
-                # Get availability for this day
-                availabilities = service.availability_slots.filter(
-                    Q(is_recurring=True, day_of_week=day_of_week, is_active=True) |
-                    Q(is_recurring=False, specific_date=current_date, is_active=True)
-                )
-                
-                day_slots = []
-                for availability in availabilities:
-                    # Generate time slots
-                    time_slots = availability.generate_time_slots(current_date, service.duration_minutes)
-                    
-                    # Check which slots are already booked
-                    for time_slot in time_slots:
-                        is_booked = Booking.objects.filter(
-                            service=service,
-                            booking_date=current_date,
-                            booking_time=time_slot,
-                            status__in=['pending', 'confirmed', 'in_progress']
-                        ).exists()
-                        
-                        if not is_booked:
-                            day_slots.append({
-                                'time': time_slot.strftime('%H:%M'),
-                                'available': True
-                            })
-                
-                if day_slots:
-                    slots_by_date[current_date.isoformat()] = day_slots
-            
-            current_date += timedelta(days=1)
-        
-        return slots_by_date
+        return availability.available_slots(service, start_date, end_date)
     
     @action(detail=True, methods=['get'])
     def reviews(self, request, pk=None):
@@ -560,42 +520,30 @@ class ParceiroEarningsViewSet(viewsets.ReadOnlyModelViewSet):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def service_search(request):
-    """Advanced service search with filters"""
-    query = request.GET.get('q', '')
-    category = request.GET.get('category')
-    min_price = request.GET.get('min_price')
-    max_price = request.GET.get('max_price')
-    delivery_type = request.GET.get('delivery_type')
-    verified_only = request.GET.get('verified_only')
-    
-    services = Service.objects.filter(is_active=True)
-    
-    if query:
-        services = services.filter(
-            Q(title__icontains=query) |
-            Q(title_pt__icontains=query) |
-            Q(description__icontains=query) |
-            Q(description_pt__icontains=query) |
-            Q(tags__icontains=query)
+    """Ranked service search with filters, paginated by cursor (services.search)"""
+    params = request.GET
+    filters = {
+        'category': int_param(params.get('category')),
+        'min_price': decimal_param(params.get('min_price')),
+        'max_price': decimal_param(params.get('max_price')),
+        'delivery_type': params.get('delivery_type') or None,
+        'verified': True if params.get('verified_only') == 'true' else None,
+    }
+    page_size = max(1, min(int_param(params.get('page_size')) or 20, 100))
+    try:
+        ids, next_cursor, count = search.current_index().search(
+            params.get('q', ''), limit=page_size, cursor=params.get('cursor'), **filters
         )
-    
-    if category:
-        services = services.filter(category_id=category)
-    
-    if min_price:
-        services = services.filter(price__gte=min_price)
-    
-    if max_price:
-        services = services.filter(price__lte=max_price)
-    
-    if delivery_type:
-        services = services.filter(delivery_type=delivery_type)
-    
-    if verified_only == 'true':
-        services = services.filter(parceiro__kyc__is_verified=True)
-    
-    serializer = ServiceListSerializer(services, many=True)
-    return Response(serializer.data)
+    except search.InvalidCursor:
+        return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+
+    services = Service.objects.select_related('parceiro__kyc', 'category').in_bulk(ids)
+    serializer = ServiceListSerializer([services[pk] for pk in ids if pk in services], many=True)
+    return Response({
+        'count': count,
+        'next': replace_query_param(request.build_absolute_uri(), 'cursor', next_cursor) if next_cursor else None,
+        'results': serializer.data,
+    })
 
 
 @api_view(['GET'])
@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class storesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "stores"
+
+    def ready(self):
+        from stores import search
+
+        # The search index tables are not models (stores.search)
+        post_migrate.connect(search.install, sender=self)
@@ -0,0 +1,82 @@
+"""Versioned, pre-rendered catalog snapshots for the customer app.
+
+``customer_get_stores`` and ``customer_get_products`` serve JSON bodies that
+are serialized once per catalog version and cached as bytes together with
+their ETag. Clients revalidating with ``If-None-Match`` get a 304 without
+touching the database. Every scope (the store list, each store's products)
+has a version counter in the cache. Signal receivers next to the models bump
+it on writes to stores, opening hours, products and their images, sizes and
+colors. Category, size and color renames bump the ``all`` scope, which is part
+of every snapshot key. Snapshots live ``CATALOG_CACHE_TIMEOUT`` seconds
+(default 1 day).
+
+The counters are ``kudya_platform.versions``, which also covers how
+versions behave without a shared cache.
+"""
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from kudya_platform.versions import invalidate, timeout, version
+
+STORES = "stores"
+ALL = "all"
+
+
+def products_scope(store_id) -> str:
+    return f"products:{store_id}"
+
+
+def invalidate_store(store_id) -> None:
+    invalidate(products_scope(store_id))
+
+
+def snapshot(scope, request, build):
+    """``(etag, body)`` of ``build()`` rendered to JSON, cached per version and host."""
+    # Absolute media URLs depend on the host the request came in on
+    base = hashlib.sha1(request.build_absolute_uri("/").encode()).hexdigest()[:12]
+    key = f"catalog:snapshot:{scope}:{version(scope)}:{version(ALL)}:{base}"
+    cached = cache.get(key)
+    if cached is None:
+        body = json.dumps(build(), cls=DjangoJSONEncoder).encode()
+        cached = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+        cache.set(key, cached, timeout("CATALOG_CACHE_TIMEOUT", 24 * 3600))
+    return cached
+
+
+def respond(request, scope, build):
+    """The snapshot as a JSON response, or 304 if the client's ETag matches."""
+    etag, body = snapshot(scope, request, build)
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    if etag in etags or "*" in etags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"  # always revalidate; 304s are cheap
+    return response
+
+
+def store_list(request) -> dict:
+    from .models import Store
+    from .serializers import StoreSerializer
+
+    stores = (
+        Store.objects.filter(is_approved=True)
+        .select_related("store_type")
+        .prefetch_related("openinghour_set")
+        .order_by("-id")
+    )
+    return {"stores": StoreSerializer(stores, many=True, context={"request": request}).data}
+
+
+def product_list(request, store_id) -> dict:
+    from .models import Product
+    from .serializers import ProductSerializer
+
+    products = ProductSerializer.eager(Product.objects.filter(store_id=store_id)).order_by("-id")
+    return {"products": ProductSerializer(products, many=True, context={"request": request}).data}
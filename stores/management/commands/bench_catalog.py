@@ -0,0 +1,117 @@
+"""Benchmark: per-request product serialization vs the catalog snapshot cache.
+
+Seeds one throwaway store with ``--products`` products (default 500), each
+with two images, two sizes and two colors, then times
+``customer_get_products`` four ways: the previous view (serializer without
+prefetching), a cold snapshot (invalidated first), a warm snapshot and an
+``If-None-Match`` revalidation (304). Seeded rows are deleted afterwards
+unless ``--keep``.
+"""
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.http import JsonResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from customers.views import customer_get_products
+from stores import catalog
+from stores.models import Image, Product, ProductCategory, Size, Store
+from stores.models.product import Color
+from stores.serializers import ProductSerializer
+
+User = get_user_model()
+PREFIX = 'bench-catalog-'
+
+
+def legacy_get_products(request, store_id):
+    """The previous view: no prefetching, serialized on every request."""
+    products = ProductSerializer(
+        Product.objects.filter(store_id=store_id).order_by("-id"),
+        many=True,
+        context={"request": request},
+    ).data
+    return JsonResponse({"products": products})
+
+
+class Command(BaseCommand):
+    help = "Compare query count and wall time of the product list with and without the catalog cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded rows")
+
+    def handle(self, *args, **options):
+        store = self._seed(options['products'])
+        factory = RequestFactory()
+        url = f'/customer/customer/products/{store.id}/'
+        try:
+            self.stdout.write(f"database={connection.vendor} products={options['products']}")
+            self._report("legacy", lambda: legacy_get_products(factory.get(url), store.id), options['repeat'])
+
+            def cold():
+                catalog.invalidate_store(store.id)
+                return customer_get_products(factory.get(url), store.id)
+
+            self._report("cold snapshot", cold, options['repeat'])
+            etag = customer_get_products(factory.get(url), store.id)['ETag']
+            self._report("warm snapshot", lambda: customer_get_products(factory.get(url), store.id), options['repeat'])
+            self._report(
+                "304",
+                lambda: customer_get_products(factory.get(url, HTTP_IF_NONE_MATCH=etag), store.id),
+                options['repeat'],
+            )
+        finally:
+            if not options['keep']:
+                self._cleanup()
+
+    def _report(self, label, run, repeat):
+        best = None
+        for _ in range(repeat):
+            reset_queries()  # the query log is capped at 9000 entries
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                response = run()
+                elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(
+            f"{label:>14}: {len(queries):>5} queries {best * 1000:9.1f} ms "
+            f"({response.status_code}, {len(response.content):,} bytes)"
+        )
+
+    def _cleanup(self):
+        User.objects.filter(username__startswith=PREFIX).delete()
+        Image.objects.filter(image__startswith=f"product_images/{PREFIX}").delete()
+        ProductCategory.objects.filter(name__startswith=PREFIX).delete()
+        Size.objects.filter(name__startswith='bc-').delete()
+        Color.objects.filter(name__startswith='bc-').delete()
+
+    def _seed(self, count):
+        self._cleanup()
+        owner = User.objects.create(username=f"{PREFIX}owner")
+        store = Store.objects.create(user=owner, name='Bench', phone='0', address='Luanda', logo='x.png')
+        category = ProductCategory.objects.create(name=f"{PREFIX}category")
+        sizes = [Size.objects.create(name=f"bc-s{i}") for i in range(2)]
+        colors = [Color.objects.create(name=f"bc-c{i}") for i in range(2)]
+        products = Product.objects.bulk_create([
+            Product(store=store, category=category, name=f"Item {i}", description='', price=Decimal(100 + i))
+            for i in range(count)
+        ])
+        images = Image.objects.bulk_create([
+            Image(image=f"product_images/{PREFIX}{i}.jpg") for i in range(count * 2)
+        ])
+        Product.images.through.objects.bulk_create([
+            Product.images.through(product=product, image=images[index * 2 + offset])
+            for index, product in enumerate(products) for offset in range(2)
+        ])
+        Product.sizes.through.objects.bulk_create([
+            Product.sizes.through(product=product, size=size) for product in products for size in sizes
+        ])
+        Product.colors.through.objects.bulk_create([
+            Product.colors.through(product=product, color=color) for product in products for color in colors
+        ])
+        return store
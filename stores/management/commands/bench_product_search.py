@@ -0,0 +1,129 @@
+"""Benchmark: product search latency, ``icontains`` scan vs the full-text index.
+
+Seeds ``--products`` products (default 1,000,000) with generated Portuguese
+and English names and descriptions plus one of 5,000 made-up brand names,
+indexes them (stores.search), then runs a fixed mix of queries: whole words,
+plurals, prefixes, typos, brands and two-word queries. Each query is timed
+two ways: the ``name``/``description`` ``icontains`` filter the product views
+use today, and ``search_products``.
+Prints median and p95 latency per method. Seeded rows are deleted afterwards
+unless ``--keep``.
+"""
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from stores import search
+from stores.models import Product, ProductCategory, Store
+
+User = get_user_model()
+PREFIX = 'bench-search-'
+NOUNS = (
+    "camisa", "sapato", "calça", "vestido", "pizza", "hambúrguer", "sumo", "bolo", "frango", "arroz",
+    "shirt", "shoe", "dress", "burger", "juice", "cake", "chicken", "rice", "telefone", "carregador",
+)
+ADJECTIVES = (
+    "azul", "vermelho", "grande", "pequeno", "picante", "doce", "fresco", "clássico", "novo", "barato",
+    "blue", "red", "large", "small", "spicy", "sweet", "fresh", "classic", "new", "cheap",
+)
+MATERIALS = ("algodão", "couro", "linho", "queijo", "tomate", "chocolate", "cotton", "leather", "cheese", "plastic")
+SYLLABLES = ("ka", "lo", "mi", "ze", "tu", "ra", "ven", "dor", "pi", "su", "ba", "nel", "qui", "to", "xa")
+QUERIES = (
+    "camisa", "camisas", "sapatos", "hambúrguer", "chocolate", "queijos",
+    "cami", "choc", "frang", "leath",
+    "camsia", "chocolat", "fango", "vestdo",
+    "camisa azul", "pizza picante", "bolo de chocolate", "shoe leather",
+    "kalomi", "zetura", "kalomi camisa", "inexistente",
+)
+
+
+class Command(BaseCommand):
+    help = "Compare product search latency of icontains filtering and the full-text index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1_000_000)
+        parser.add_argument('--stores', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded rows")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        self._seed(options['products'], options['stores'])
+        self.stdout.write(
+            f"database={connection.vendor} products={options['products']} "
+            f"seeded and indexed in {time.perf_counter() - start:.1f} s"
+        )
+        try:
+            self._report("icontains", self._icontains, options['repeat'])
+            self._report("full-text", lambda query: search.search_products(query), options['repeat'])
+        finally:
+            if not options['keep']:
+                self._cleanup()
+
+    def _icontains(self, query):
+        products = Product.objects.all()
+        for word in query.split():
+            products = products.filter(Q(name__icontains=word) | Q(description__icontains=word))
+        return list(products.values_list("pk", flat=True)[:20])
+
+    def _report(self, label, run, repeat):
+        timings, empty = [], 0
+        for query in QUERIES:
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                found = run(query)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings.append(best)
+            empty += not found
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, round(len(timings) * 0.95))]
+        self.stdout.write(
+            f"{label:>10}: median {statistics.median(timings) * 1000:9.2f} ms  p95 {p95 * 1000:9.2f} ms  "
+            f"({empty}/{len(QUERIES)} queries without results)"
+        )
+
+    def _cleanup(self):
+        products = Product.objects.filter(store__user__username__startswith=PREFIX)
+        search.remove_products(list(products.values_list("pk", flat=True)))
+        products._raw_delete(products.db)
+        Store.objects.filter(user__username__startswith=PREFIX).delete()
+        User.objects.filter(username__startswith=PREFIX).delete()
+        ProductCategory.objects.filter(name__startswith=PREFIX).delete()
+
+    def _seed(self, count, store_count):
+        self._cleanup()
+        rng = random.Random(42)
+        brands = sorted({
+            "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(5_000)
+        } | {"kalomi", "zetura"})
+        owners = User.objects.bulk_create([User(username=f"{PREFIX}{i}") for i in range(store_count)])
+        stores = Store.objects.bulk_create([
+            Store(user=owner, name=f"Loja {rng.choice(NOUNS)} {i}", phone='0', address='Luanda', logo='x.png')
+            for i, owner in enumerate(owners)
+        ])
+        categories = ProductCategory.objects.bulk_create([
+            ProductCategory(name=f"{PREFIX}{noun}") for noun in NOUNS
+        ])
+        batch = 10_000
+        for offset in range(0, count, batch):
+            with transaction.atomic():
+                products = Product.objects.bulk_create([
+                    Product(
+                        store=rng.choice(stores),
+                        category=rng.choice(categories),
+                        name=f"{rng.choice(NOUNS)} {rng.choice(brands)} {rng.choice(ADJECTIVES)}",
+                        description=f"<p>{rng.choice(NOUNS)} de {rng.choice(MATERIALS)}, "
+                                    f"<strong>{rng.choice(ADJECTIVES)}</strong></p>",
+                        price=Decimal(rng.randint(100, 10_000)),
+                    )
+                    for _ in range(offset, min(offset + batch, count))
+                ])
+                search.index_products(Product.objects.filter(pk__in=[product.pk for product in products]))
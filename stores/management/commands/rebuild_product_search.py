@@ -0,0 +1,20 @@
+"""Create the product search index and (re)index every product (stores.search)."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from stores import search
+from stores.models import Product
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text product search index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        search.install()
+        with transaction.atomic():  # searches see the old index until the new one is complete
+            search.clear()
+            indexed = search.index_products(Product.objects.all(), chunk_size=options['chunk_size'])
+        self.stdout.write(f"Indexed {indexed} products")
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
 from django.core.mail import send_mail
 from django.contrib.auth import get_user_model
 from django_ckeditor_5.fields import CKEditor5Field
@@ -7,6 +9,8 @@ from PIL import Image as PilImage  # <--- Change here
 
 from django.core.files.base import ContentFile
 
+from stores import catalog, search
+
 
 User = get_user_model()
 
@@ -106,6 +110,17 @@ class Product(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Store the product was loaded with, so a move invalidates both catalogs
+        instance._loaded_store_id = instance.__dict__.get("store_id")
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_store_id = self.__dict__.get("store_id")
+
     @property
     def price_with_markup(self):
         return self.price * (1 + self.percentage / 100)
@@ -174,4 +189,71 @@ class Review(models.Model):
         return self.dislikes.count()
 
     def __str__(self):
-        return f"{self.user.username} - {self.product.name}"
\ No newline at end of file
+        return f"{self.user.username} - {self.product.name}"
+
+# Catalog snapshots (stores.catalog) are versioned per store; bump on writes
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product_catalog(sender, instance, **kwargs):
+    catalog.invalidate_store(instance.store_id)
+    previous_store_id = getattr(instance, "_loaded_store_id", None)
+    if previous_store_id is not None and previous_store_id != instance.store_id:
+        catalog.invalidate_store(previous_store_id)  # moved out of that store
+    instance._loaded_store_id = instance.store_id
+
+
+@receiver(m2m_changed, sender=Product.images.through)
+@receiver(m2m_changed, sender=Product.sizes.through)
+@receiver(m2m_changed, sender=Product.colors.through)
+def invalidate_product_relations(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        catalog.invalidate_store(instance.store_id)
+    elif pk_set is None:
+        catalog.invalidate(catalog.ALL)  # cleared from the image/size/color side
+    else:
+        for store_id in Product.objects.filter(pk__in=pk_set).values_list("store_id", flat=True).distinct():
+            catalog.invalidate_store(store_id)
+
+
+def _image_store_ids(image):
+    return list(Product.objects.filter(images=image).values_list("store_id", flat=True).distinct())
+
+
+@receiver(post_save, sender=Image)
+def invalidate_image_catalog(sender, instance, **kwargs):
+    for store_id in _image_store_ids(instance):
+        catalog.invalidate_store(store_id)
+
+
+@receiver(pre_delete, sender=Image)
+def invalidate_deleted_image_catalog(sender, instance, **kwargs):
+    # The Product.images rows are gone by post_delete, so find the stores now
+    store_ids = _image_store_ids(instance)
+    transaction.on_commit(lambda: [catalog.invalidate_store(store_id) for store_id in store_ids])
+
+
+@receiver([post_save, post_delete], sender=ProductCategory)
+@receiver([post_save, post_delete], sender=Size)
+@receiver([post_save, post_delete], sender=Color)
+def invalidate_shared_catalog(sender, **kwargs):
+    catalog.invalidate(catalog.ALL)
+
+
+# Keep the full-text index (stores.search) in step with product writes
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    search.index_products(Product.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Product)
+def remove_product(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(post_save, sender=ProductCategory)
+def index_category_products(sender, instance, created, **kwargs):
+    if not created:
+        search.index_products(instance.products.all())
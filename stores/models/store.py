@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from datetime import date, datetime, time
 from django.conf import settings
 from django.core.mail import send_mail, EmailMessage
@@ -8,7 +10,7 @@ from django.db.models import Sum
 from django.template.loader import render_to_string
 import logging
 from order.models import Order
-from order.utils import generate_invoice
+from stores import catalog, search
 from stores.models.restaurant import OpeningHour
 
 logger = logging.getLogger(__name__)
@@ -61,6 +63,17 @@ class Store(models.Model):
 
     def __str__(self):
         return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Name the store was loaded with, so only renames re-index its products
+        instance._loaded_name = instance.__dict__.get("name")
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_name = self.__dict__.get("name")
     
     def activate(self):
         if not self.is_approved:
@@ -86,16 +99,14 @@ class Store(models.Model):
         return orders
 
     def generate_invoice(self, period):
-        orders = self.get_orders(period)
-        total_amount = orders.aggregate(Sum("total"))["total__sum"]
-        context = {
-            "store": self,
-            "orders": orders,
-            "total_amount": total_amount,
-            "period": period,
-        }
-        pdf_path, pdf_content = generate_invoice(context)
-        return pdf_path, pdf_content
+        """``(file name, PDF bytes)`` of the last closed weekly/monthly statement, or None."""
+        from report.statements import store_statement
+
+        statement = store_statement(self, period)
+        if not statement.pdf:
+            return None
+        with statement.pdf.open("rb") as pdf:
+            return statement.pdf.name, pdf.read()
 
     def __str__(self):
         return self.name
@@ -167,3 +178,25 @@ class Store(models.Model):
             logger.error(f"Error sending email: {e}")
 
 
+
+
+@receiver([post_save, post_delete], sender=Store)
+@receiver([post_save, post_delete], sender=StoreType)
+@receiver([post_save, post_delete], sender=OpeningHour)
+def invalidate_store_catalog(sender, **kwargs):
+    # The store list embeds store types and opening hours (stores.catalog)
+    catalog.invalidate(catalog.STORES)
+
+
+@receiver(post_save, sender=Store)
+def index_store_products(sender, instance, created, update_fields, **kwargs):
+    # Product search documents include the store name (stores.search)
+    if update_fields is not None and "name" not in update_fields:
+        return
+    renamed = not created and getattr(instance, "_loaded_name", None) != instance.name
+    instance._loaded_name = instance.name
+    if renamed:
+        from stores.models.product import Product
+
+        store_id = instance.pk
+        transaction.on_commit(lambda: search.index_products(Product.objects.filter(store_id=store_id)))
@@ -5,6 +5,7 @@ from rest_framework.decorators import action
 from rest_framework.generics import ListAPIView
 from decimal import Decimal, InvalidOperation
 from rest_framework.response import Response
+from . import search
 from .models import Product
 from .serializers import ProductSerializer
 
@@ -62,7 +63,7 @@ def related_products(request, pk):
 
 
 class ProductViewSet(ModelViewSet):
-    queryset = Product.objects.all()
+    queryset = ProductSerializer.eager(Product.objects.all())
     serializer_class = ProductSerializer
 
     @action(detail=False, methods=['get'])
@@ -70,7 +71,24 @@ class ProductViewSet(ModelViewSet):
         store_id = request.query_params.get('store')
         if not store_id:
             return Response({"error": "Store ID is required."}, status=400)
-        products = Product.objects.filter(store_id=store_id)
+        products = ProductSerializer.eager(Product.objects.filter(store_id=store_id))
+        serializer = ProductSerializer(products, many=True, context={'request': request})
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "Search query is required."}, status=400)
+        try:
+            limit = max(min(int(request.query_params.get('limit', 20)), 100), 1)
+            offset = max(int(request.query_params.get('offset', 0)), 0)
+            store_id = int(request.query_params['store']) if request.query_params.get('store') else None
+        except ValueError:
+            return Response({"error": "store, limit and offset must be integers."}, status=400)
+        ids = search.search_products(query, store_id, limit=limit, offset=offset)
+        found = ProductSerializer.eager(Product.objects.filter(pk__in=ids)).in_bulk()
+        products = [found[pk] for pk in ids if pk in found]  # keep the ranking
         serializer = ProductSerializer(products, many=True, context={'request': request})
         return Response(serializer.data)
     
@@ -81,7 +99,7 @@ class ProductsByCategoryView(ListAPIView):
 
     def get_queryset(self):
         category_id = self.kwargs["category_id"]
-        queryset = Product.objects.filter(category_id=category_id)
+        queryset = ProductSerializer.eager(Product.objects.filter(category_id=category_id))
 
         min_price = self.request.query_params.get("min_price")
         max_price = self.request.query_params.get("max_price")
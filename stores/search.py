@@ -0,0 +1,361 @@
+"""Full-text product search.
+
+Every product has a search document made of its name, its description (the
+CKEditor HTML stripped), its category name and its store name. The text is
+analyzed here, not by the database. It is lowercased, accents are removed
+and every word is reduced by a light Portuguese/English stemmer: "Camisas"
+and "camisa" both become "camis", so plural and gender forms match. The stems
+are indexed by the database:
+
+- SQLite: an FTS5 table ranked with ``bm25``.
+- PostgreSQL: a weighted ``tsvector`` column with a GIN index, ranked with
+  ``ts_rank``.
+
+Both keep a table of every indexed term, used for typo correction.
+
+Both backends answer the same queries. Every word must match, except common
+Portuguese and English stopwords, which are not indexed. The last word also
+matches as a prefix, so results show up while the user is still typing. A
+word that matches nothing is replaced by the indexed terms at most one or two
+edits away from it (typo tolerance). Name matches rank above category, store
+and description matches. Ranking costs time per match, so only the newest
+``PRODUCT_SEARCH_RANK_WINDOW`` matches (default 2000) are ranked. That only
+matters for very common words.
+
+The tables are created after ``migrate`` (``install``). Signal receivers next
+to the models keep the index up to date on product, category and store
+writes. ``manage.py rebuild_product_search`` indexes existing rows.
+"""
+import functools
+import html
+import re
+import unicodedata
+from os.path import commonprefix
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.html import strip_tags
+
+TABLE = "stores_product_search"
+TERMS = "stores_product_search_terms"
+WORD = re.compile(r"\w+")
+ACCENTS = re.compile("[\u0300-\u036f]")  # combining diacritical marks, split off by NFKD
+MIN_STEM = 3
+STOPWORDS = frozenset((
+    "a", "o", "as", "os", "e", "de", "da", "do", "das", "dos", "em", "no", "na", "nos", "nas", "um", "uma",
+    "com", "para", "por", "ao", "the", "an", "and", "of", "for", "with", "in", "on", "to",
+))
+
+# (suffix, replacement); the first that matches wins. Plural and verb forms...
+INFLECTIONS = (
+    ("coes", "cao"), ("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"),
+    ("ies", "y"), ("zes", "z"), ("res", "r"), ("ses", "s"), ("ns", "m"), ("ss", "ss"),
+    ("ing", ""), ("ed", ""), ("es", ""), ("s", ""),
+)
+# ...then derivations...
+DERIVATIONS = (("amente", ""), ("mente", ""), ("idade", ""), ("ness", ""))
+# ...then the gender/final vowel
+VOWELS = "aeo"
+
+
+def normalize(text) -> str:
+    """``text`` without HTML, entities, accents or case."""
+    text = html.unescape(strip_tags(text or ""))
+    if text.isascii():
+        return text.lower()
+    return ACCENTS.sub("", unicodedata.normalize("NFKD", text)).lower()
+
+
+def _strip(word, rules):
+    for suffix, replacement in rules:
+        if word.endswith(suffix):
+            if len(word) - len(suffix) + len(replacement) >= MIN_STEM:
+                return word[: len(word) - len(suffix)] + replacement
+            return word
+    return word
+
+
+@functools.lru_cache(maxsize=100_000)  # vocabularies are small, texts are not
+def stem(word) -> str:
+    if word.isdigit():
+        return word
+    word = _strip(_strip(word, INFLECTIONS), DERIVATIONS)
+    if len(word) > MIN_STEM and word[-1] in VOWELS:
+        word = word[:-1]
+    return word
+
+
+def words(text) -> list:
+    return [word for word in WORD.findall(normalize(text)) if word not in STOPWORDS]
+
+
+def analyze(text) -> list:
+    return [stem(word) for word in words(text)]
+
+
+def distance(a, b, limit) -> int:
+    """Edit distance of ``a`` and ``b`` (a swap of neighbours is one edit), capped at ``limit + 1``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+class SearchBackend:
+    """Stores the analyzed documents and runs the queries of ``search_products``.
+
+    ``groups`` is a list of alternatives: every group must match, any
+    ``(term, prefix)`` of a group may.
+    """
+
+    def install(self, cursor):
+        raise NotImplementedError
+
+    def upsert(self, cursor, documents):
+        """``documents``: ``(product_id, store_id, name, body, category, store)`` of analyzed text."""
+        raise NotImplementedError
+
+    @staticmethod
+    def terms(documents) -> list:
+        # Terms are never removed: a stale one only costs a correction candidate
+        return sorted({term for document in documents for text in document[2:] for term in text.split()})
+
+    def delete(self, cursor, product_ids):
+        raise NotImplementedError
+
+    def clear(self, cursor):
+        cursor.execute(f"DELETE FROM {TABLE}")
+        cursor.execute(f"DELETE FROM {TERMS}")
+
+    def query(self, cursor, groups, store_id, limit, offset, window):
+        """Ids of the best matches among the newest ``window`` ones."""
+        raise NotImplementedError
+
+    def has_term(self, cursor, term, prefix=False) -> bool:
+        if prefix:
+            cursor.execute(f"SELECT 1 FROM {TERMS} WHERE term >= %s AND term < %s LIMIT 1", [term, term + "\uffff"])
+        else:
+            cursor.execute(f"SELECT 1 FROM {TERMS} WHERE term = %s", [term])
+        return cursor.fetchone() is not None
+
+    def neighbours(self, cursor, term, limit) -> list:
+        """Indexed terms starting with the same letter, at most ``limit`` characters longer or shorter."""
+        cursor.execute(
+            f"SELECT term FROM {TERMS} WHERE term >= %s AND term < %s AND length(term) BETWEEN %s AND %s",
+            [term[0], term[0] + "\uffff", len(term) - limit, len(term) + limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class SQLiteBackend(SearchBackend):
+    def install(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} "
+            "USING fts5(name, body, category, store, store_id UNINDEXED, tokenize='unicode61')"
+        )
+        # bm25 weights of name, body, category and store; ORDER BY rank lets FTS5 rank internally
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}, rank) VALUES ('rank', 'bm25(10.0, 1.0, 4.0, 3.0)')")
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {TERMS} (term TEXT PRIMARY KEY) WITHOUT ROWID")
+
+    def upsert(self, cursor, documents):
+        self.delete(cursor, [document[0] for document in documents])
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, store_id, name, body, category, store) VALUES (%s, %s, %s, %s, %s, %s)",
+            documents,
+        )
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO {TERMS} (term) VALUES (%s)", [[term] for term in self.terms(documents)],
+        )
+
+    def delete(self, cursor, product_ids):
+        if product_ids:
+            placeholders = ", ".join(["%s"] * len(product_ids))
+            cursor.execute(f"DELETE FROM {TABLE} WHERE rowid IN ({placeholders})", list(product_ids))
+
+    def query(self, cursor, groups, store_id, limit, offset, window):
+        match = " AND ".join(
+            "(" + " OR ".join(f'"{term}"' + ("*" if prefix else "") for term, prefix in group) + ")"
+            for group in groups
+        )
+        where, params = f"{TABLE} MATCH %s", [match]
+        if store_id is not None:
+            where, params = where + " AND store_id = %s", params + [int(store_id)]
+        # Rows from the window-th newest match on; FTS5 walks rowids in order without ranking
+        cursor.execute(
+            f"SELECT rowid FROM {TABLE} WHERE {where} AND rowid >= coalesce("
+            f"(SELECT rowid FROM {TABLE} WHERE {where} ORDER BY rowid DESC LIMIT 1 OFFSET %s), 0) "
+            "ORDER BY rank LIMIT %s OFFSET %s",
+            params + params + [window - 1, limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresBackend(SearchBackend):
+    # The text is analyzed already: the 'simple' configuration only splits it
+    DOCUMENT = (
+        "setweight(to_tsvector('simple', %s), 'A') || setweight(to_tsvector('simple', %s), 'D')"
+        " || setweight(to_tsvector('simple', %s), 'B') || setweight(to_tsvector('simple', %s), 'C')"
+    )
+
+    def install(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {TABLE} "
+            "(product_id bigint PRIMARY KEY, store_id bigint NOT NULL, document tsvector NOT NULL)"
+        )
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_document ON {TABLE} USING gin (document)")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {TABLE}_store ON {TABLE} (store_id)")
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS {TERMS} (term text COLLATE "C" PRIMARY KEY)')
+
+    def upsert(self, cursor, documents):
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (product_id, store_id, document) VALUES (%s, %s, {self.DOCUMENT}) "
+            "ON CONFLICT (product_id) DO UPDATE SET store_id = EXCLUDED.store_id, document = EXCLUDED.document",
+            documents,
+        )
+        cursor.execute(
+            f"INSERT INTO {TERMS} (term) SELECT unnest(%s::text[]) ON CONFLICT DO NOTHING", [self.terms(documents)],
+        )
+
+    def delete(self, cursor, product_ids):
+        if product_ids:
+            cursor.execute(f"DELETE FROM {TABLE} WHERE product_id = ANY(%s)", [list(product_ids)])
+
+    def query(self, cursor, groups, store_id, limit, offset, window):
+        tsquery = " & ".join(
+            "(" + " | ".join(term + (":*" if prefix else "") for term, prefix in group) + ")" for group in groups
+        )
+        where, params = "document @@ query", []
+        if store_id is not None:
+            where, params = where + " AND store_id = %s", [int(store_id)]
+        # ts_rank reads every matching document; the cutoff only needs the GIN index and the ids
+        cursor.execute(
+            f"SELECT product_id FROM {TABLE}, to_tsquery('simple', %s) query WHERE {where} AND product_id >= coalesce("
+            f"(SELECT product_id FROM {TABLE}, to_tsquery('simple', %s) query WHERE {where} "
+            "ORDER BY product_id DESC LIMIT 1 OFFSET %s), 0) "
+            "ORDER BY ts_rank(document, query) DESC, product_id LIMIT %s OFFSET %s",
+            [tsquery] + params + [tsquery] + params + [window - 1, limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+BACKENDS = {"sqlite": SQLiteBackend(), "postgresql": PostgresBackend()}
+
+
+def backend(using=DEFAULT_DB_ALIAS):
+    """The search backend of database ``using``, or None if its vendor has none."""
+    return BACKENDS.get(connections[using].vendor)
+
+
+def install(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Create the index tables if missing; connected to ``post_migrate``."""
+    search = backend(using)
+    if search is not None:
+        with connections[using].cursor() as cursor:
+            search.install(cursor)
+
+
+def _documents(rows):
+    return [
+        (
+            product_id,
+            store_id,
+            " ".join(analyze(name)),
+            " ".join(analyze(description)),
+            " ".join(analyze(category)),
+            " ".join(analyze(store)),
+        )
+        for product_id, store_id, name, description, category, store in rows
+    ]
+
+
+def index_products(queryset, chunk_size=500, using=DEFAULT_DB_ALIAS) -> int:
+    """(Re)index the products of ``queryset``; returns how many were indexed."""
+    search = backend(using)
+    if search is None:
+        return 0
+    rows = queryset.using(using).order_by("pk").values_list(
+        "pk", "store_id", "name", "description", "category__name", "store__name",
+    )
+    indexed, chunk = 0, []
+    with connections[using].cursor() as cursor:
+        for row in rows.iterator(chunk_size=chunk_size):
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                search.upsert(cursor, _documents(chunk))
+                indexed, chunk = indexed + len(chunk), []
+        if chunk:
+            search.upsert(cursor, _documents(chunk))
+            indexed += len(chunk)
+    return indexed
+
+
+def clear(using=DEFAULT_DB_ALIAS) -> None:
+    search = backend(using)
+    if search is not None:
+        with connections[using].cursor() as cursor:
+            search.clear(cursor)
+
+
+def remove_products(product_ids, chunk_size=500, using=DEFAULT_DB_ALIAS) -> None:
+    search = backend(using)
+    if search is not None:
+        product_ids = list(product_ids)
+        with connections[using].cursor() as cursor:
+            for start in range(0, len(product_ids), chunk_size):
+                search.delete(cursor, product_ids[start:start + chunk_size])
+
+
+def _groups(search, cursor, query):
+    """The alternatives of every query word; None when a word matches nothing."""
+    query_words = words(query)
+    groups = []
+    for position, word in enumerate(query_words):
+        term = stem(word)
+        # The last word may be incomplete unless the user typed a space after it
+        if position == len(query_words) - 1 and query[-1:].isalnum():
+            if len(word) < 2:
+                continue  # would match almost everything
+            prefix = commonprefix([word, term])
+            if len(prefix) >= 2 and search.has_term(cursor, prefix, prefix=True):
+                groups.append([(prefix, True)])
+                continue
+        if search.has_term(cursor, term):
+            groups.append([(term, False)])
+            continue
+        limit = 1 if len(term) <= 5 else 2
+        candidates = sorted(
+            (distance(term, candidate, limit), candidate) for candidate in search.neighbours(cursor, term, limit)
+        )
+        alternatives = [(candidate, False) for cost, candidate in candidates[:3] if cost <= limit]
+        if not alternatives:
+            return None
+        groups.append(alternatives)
+    return groups
+
+
+def search_products(query, store_id=None, limit=20, offset=0, using=DEFAULT_DB_ALIAS) -> list:
+    """Ids of the products matching ``query``, best first."""
+    search = backend(using)
+    if search is None:
+        from .models import Product
+
+        products = Product.objects.using(using).filter(name__icontains=query.strip())
+        if store_id is not None:
+            products = products.filter(store_id=store_id)
+        return list(products.order_by("pk").values_list("pk", flat=True)[offset:offset + limit])
+    with connections[using].cursor() as cursor:
+        groups = _groups(search, cursor, query)
+        if not groups:
+            return []
+        window = max(getattr(settings, "PRODUCT_SEARCH_RANK_WINDOW", 2000), offset + limit)
+        return search.query(cursor, groups, store_id, limit, offset, window)
@@ -92,6 +92,12 @@ class StoreSerializer(serializers.ModelSerializer):
 
 
 class ProductSerializer(serializers.ModelSerializer):
+    """Product with its image URLs, sizes, colors and category name.
+
+    Pair it with ``ProductSerializer.eager(queryset)`` so a list costs a
+    fixed number of queries. The image URL list is computed once per product
+    and shared by ``image_url``, ``images`` and ``image``.
+    """
     image_url = serializers.SerializerMethodField()
     images = serializers.SerializerMethodField()
     image = serializers.SerializerMethodField()
@@ -103,27 +109,42 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = "__all__"
 
-    def get_image_url(self, obj):
+    @staticmethod
+    def eager(queryset):
+        """Load everything the serializer reads in one query per relation."""
+        return queryset.select_related("category").prefetch_related("images", "sizes", "colors")
+
+    def _absolute(self, url):
+        # The scheme://host prefix is built once per request and shared by the
+        # list serializer's children through the context
         request = self.context.get("request")
-        images = obj.images.all()
-        if not images:
-            return []
-        image_urls = []
-        for image in images:
-            if image.image and hasattr(image.image, 'url'):
-                if request:
-                    image_urls.append(request.build_absolute_uri(image.image.url))
-                else:
-                    image_urls.append(image.image.url)
-        return image_urls
+        if not request:
+            return url
+        if not url.startswith("/") or url.startswith("//"):
+            return request.build_absolute_uri(url)
+        if "_absolute_base" not in self.context:
+            self.context["_absolute_base"] = request.build_absolute_uri("/")[:-1]
+        return self.context["_absolute_base"] + url
+
+    def _image_urls(self, obj):
+        urls = obj.__dict__.get("_image_urls")
+        if urls is None:
+            urls = [
+                self._absolute(image.image.url)
+                for image in obj.images.all()
+                if image.image and hasattr(image.image, "url")
+            ]
+            obj.__dict__["_image_urls"] = urls
+        return urls
+
+    def get_image_url(self, obj):
+        return self._image_urls(obj)
 
     def get_images(self, obj):
-        # Return the same as get_image_url
-        return self.get_image_url(obj)
+        return self._image_urls(obj)
 
     def get_image(self, obj):
-        # Return the same as get_image_url
-        return self.get_image_url(obj)
+        return self._image_urls(obj)
 
     def get_sizes(self, obj):
         return [size.name for size in obj.sizes.all()]
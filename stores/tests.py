@@ -1,3 +1,270 @@
-from django.test import TestCase
+import time
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from kudya_platform import versions
+from stores import catalog, search
+from stores.models import Image, OpeningHour, Product, ProductCategory, Size, Store
+from stores.models.product import Color
+
+
+User = get_user_model()
+
+
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user(username='store@example.com', password='StrongPass123!')
+        self.store = Store.objects.create(
+            user=owner, name='Loja', phone='900000000', address='Luanda',
+            logo='store_logos/logo.png', is_approved=True,
+        )
+        hidden = User.objects.create_user(username='pending@example.com', password='StrongPass123!')
+        Store.objects.create(user=hidden, name='Pendente', phone='0', address='Luanda', logo='store_logos/logo.png')
+        category = ProductCategory.objects.create(name='Comida')
+        self.product = Product.objects.create(
+            store=self.store, name='Prato', description='', price=Decimal('10.00'), category=category,
+        )
+        self.products_url = f'/customer/customer/products/{self.store.id}/'
+
+    def test_unchanged_catalog_is_served_from_cache_and_revalidated(self):
+        first = self.client.get(self.products_url)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([product['name'] for product in first.json()['products']], ['Prato'])
+        with self.assertNumQueries(0):
+            again = self.client.get(self.products_url)
+            not_modified = self.client.get(self.products_url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(again.content, first.content)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified['ETag'], first['ETag'])
+
+    def test_product_writes_invalidate_the_store_snapshot(self):
+        etag = self.client.get(self.products_url)['ETag']
+
+        self.product.name = 'Prato do dia'
+        self.product.save()
+        renamed = self.client.get(self.products_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(renamed.status_code, 200)
+        self.assertEqual(renamed.json()['products'][0]['name'], 'Prato do dia')
+
+        self.product.sizes.add(Size.objects.create(name='XL'))
+        sized = self.client.get(self.products_url, HTTP_IF_NONE_MATCH=renamed['ETag'])
+
+        self.assertEqual(sized.json()['products'][0]['sizes'], ['XL'])
+
+    def test_deleting_an_image_invalidates_the_store_snapshot(self):
+        image, = Image.objects.bulk_create([Image(image='product_images/prato.jpg')])
+        self.product.images.add(image)
+        first = self.client.get(self.products_url)
+        self.assertEqual(len(first.json()['products'][0]['images']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            image.delete()
+        after = self.client.get(self.products_url, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after['ETag'], first['ETag'])
+        self.assertEqual(after.json()['products'][0]['images'], [])
+
+    def test_moving_a_product_invalidates_both_stores(self):
+        owner = User.objects.create_user(username='other@example.com', password='StrongPass123!')
+        other = Store.objects.create(
+            user=owner, name='Outra', phone='0', address='Luanda', logo='store_logos/logo.png', is_approved=True,
+        )
+        other_url = f'/customer/customer/products/{other.id}/'
+        etag = self.client.get(self.products_url)['ETag']
+        other_etag = self.client.get(other_url)['ETag']
+
+        product = Product.objects.get(pk=self.product.pk)
+        product.store = other
+        product.save()
+
+        self.assertEqual(self.client.get(self.products_url, HTTP_IF_NONE_MATCH=etag).json()['products'], [])
+        moved = self.client.get(other_url, HTTP_IF_NONE_MATCH=other_etag)
+        self.assertEqual([item['name'] for item in moved.json()['products']], ['Prato'])
+
+    @override_settings(CATALOG_LOCAL_TIMEOUT=30)
+    def test_versions_expire_without_a_shared_cache(self):
+        self.assertFalse(versions.shared())
+        self.assertEqual(versions.timeout('CATALOG_CACHE_TIMEOUT', 24 * 3600), 30)
+        current = versions.version(catalog.STORES)
+
+        later = time.time() + 31
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            self.assertNotEqual(versions.version(catalog.STORES), current)
+
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://'}}
+        with override_settings(CACHES=redis):
+            self.assertTrue(versions.shared())
+            self.assertEqual(versions.timeout('CATALOG_CACHE_TIMEOUT', 24 * 3600), 24 * 3600)
+
+    def test_store_list_only_has_approved_stores_and_tracks_opening_hours(self):
+        first = self.client.get('/customer/customer/stores/')
+
+        self.assertEqual([store['name'] for store in first.json()['stores']], ['Loja'])
+        self.assertEqual(first.json()['stores'][0]['opening_hours'], [])
+
+        OpeningHour.objects.create(store=self.store, day=1, from_hour='08:00 AM', to_hour='06:00 PM')
+        second = self.client.get('/customer/customer/stores/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(len(second.json()['stores'][0]['opening_hours']), 1)
+
+
+class ProductSerializerQueryTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='store@example.com', password='StrongPass123!')
+        self.store = Store.objects.create(
+            user=owner, name='Loja', phone='900000000', address='Luanda', logo='store_logos/logo.png',
+        )
+        self.category = ProductCategory.objects.create(name='Roupa')
+        self.sizes = [Size.objects.create(name=name) for name in ('S', 'M')]
+        self.colors = [Color.objects.create(name=name) for name in ('Azul', 'Preto')]
+
+    def _add_products(self, count):
+        for _ in range(count):
+            product = Product.objects.create(
+                store=self.store, name='Camisa', description='', price=Decimal('10.00'), category=self.category,
+            )
+            product.images.add(*Image.objects.bulk_create([
+                Image(image=f'product_images/{product.id}-{index}.jpg') for index in range(2)
+            ]))
+            product.sizes.add(*self.sizes)
+            product.colors.add(*self.colors)
+
+    def _queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response.json()
+
+    def test_list_endpoints_use_a_constant_number_of_queries(self):
+        urls = (
+            '/customer/products/all/',
+            f'/store/products/by_store/?store={self.store.id}',
+            f'/store/product/category/{self.category.id}/products/',
+        )
+        self._add_products(1)
+        few = {url: self._queries(url)[0] for url in urls}
+        self._add_products(5)
+
+        for url in urls:
+            count, data = self._queries(url)
+            self.assertEqual(count, few[url], url)
+            self.assertEqual(len(data), 6, url)
+
+    def test_image_urls_are_absolute_and_shared_across_fields(self):
+        self._add_products(1)
+        product = Product.objects.get()
+
+        _, data = self._queries('/customer/products/all/')
+
+        expected = [f'http://testserver/media/product_images/{product.id}-{index}.jpg' for index in range(2)]
+        self.assertEqual(data[0]['image_url'], expected)
+        self.assertEqual(data[0]['images'], expected)
+        self.assertEqual(data[0]['image'], expected)
+        self.assertEqual((data[0]['sizes'], data[0]['colors']), (['S', 'M'], ['Azul', 'Preto']))
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        owner = User.objects.create_user(username='store@example.com', password='StrongPass123!')
+        self.store = Store.objects.create(
+            user=owner, name='Loja Central', phone='900000000', address='Luanda', logo='store_logos/logo.png',
+        )
+        pizzeria_owner = User.objects.create_user(username='pizza@example.com', password='StrongPass123!')
+        self.pizzeria = Store.objects.create(
+            user=pizzeria_owner, name='Pizzaria Bella', phone='0', address='Luanda', logo='store_logos/logo.png',
+        )
+        self.clothes = ProductCategory.objects.create(name='Roupa')
+        shoes = ProductCategory.objects.create(name='Calçado')
+        food = ProductCategory.objects.create(name='Comida')
+        self.shirt = self._product(self.store, 'Camisa azul', '<p>Algodão &amp; linho</p>', self.clothes)
+        self.shoes = self._product(self.store, 'Sapatos de couro', '<p>Feitos à mão</p>', shoes)
+        self.pizza = self._product(self.pizzeria, 'Pizza margherita', '<p>Molho de tomate</p>', food)
+
+    def _product(self, store, name, description, category):
+        return Product.objects.create(
+            store=store, name=name, description=description, price=Decimal('10.00'), category=category,
+        )
+
+    def test_matches_stems_without_accents_or_html(self):
+        self.assertEqual(search.search_products('camisas '), [self.shirt.id])
+        self.assertEqual(search.search_products('ALGODAO '), [self.shirt.id])
+        self.assertEqual(search.search_products('calcados '), [self.shoes.id])
+        self.assertEqual(search.search_products('feito a mao'), [self.shoes.id])
+        self.assertEqual(search.search_products('amp '), [])
+        self.assertEqual(search.search_products('camisa de algodão e'), [self.shirt.id])
+
+    def test_last_word_matches_as_prefix_and_typos_are_tolerated(self):
+        self.assertEqual(search.search_products('sapa'), [self.shoes.id])
+        self.assertEqual(search.search_products('couro sap'), [self.shoes.id])
+        self.assertEqual(search.search_products('piza'), [self.pizza.id])
+        self.assertEqual(search.search_products('camsia azul'), [self.shirt.id])
+        self.assertEqual(search.search_products('xyzzy'), [])
+
+    def test_name_matches_rank_above_description_matches(self):
+        linen = self._product(self.store, 'Linho branco', '<p>Tecido</p>', self.clothes)
+
+        self.assertEqual(search.search_products('linho'), [linen.id, self.shirt.id])
+        self.assertEqual(search.search_products('linho', store_id=self.pizzeria.id), [])
+
+    def test_only_the_newest_matches_are_ranked(self):
+        named = self._product(self.store, 'Linho cru', '', self.clothes)
+        described = self._product(self.store, 'Toalha', '<p>Linho</p>', self.clothes)
+
+        self.assertEqual(search.search_products('linho', limit=1), [named.id])
+        with self.settings(PRODUCT_SEARCH_RANK_WINDOW=1):
+            self.assertEqual(search.search_products('linho', limit=1), [described.id])
+
+    def test_index_follows_product_category_and_store_writes(self):
+        self.shirt.name = 'Blusa verde'
+        self.shirt.save()
+        self.assertEqual(search.search_products('camisa '), [])
+        self.assertEqual(search.search_products('blusa '), [self.shirt.id])
+
+        self.clothes.name = 'Vestuário'
+        self.clothes.save()
+        self.assertEqual(search.search_products('vestuario '), [self.shirt.id])
+
+        self.pizzeria.name = 'Forno Napolitano'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pizzeria.save()
+        self.assertEqual(search.search_products('napolitano '), [self.pizza.id])
+
+        self.pizza.delete()
+        self.assertEqual(search.search_products('pizza'), [])
+
+    def test_only_store_renames_reindex_its_products(self):
+        store = Store.objects.get(pk=self.pizzeria.pk)
+        with mock.patch.object(search, 'index_products') as index_products:
+            with self.captureOnCommitCallbacks(execute=True):
+                store.is_approved = not store.is_approved
+                store.save()
+                store.name = store.name
+                store.save()
+            index_products.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                store.name = 'Forno'
+                store.save()
+            index_products.assert_called_once()
+
+    def test_search_endpoint_returns_serialized_products_in_rank_order(self):
+        linen = self._product(self.store, 'Linho branco', '', self.clothes)
+
+        response = self.client.get('/store/products/search/', {'q': 'linho'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([product['id'] for product in response.json()], [linen.id, self.shirt.id])
+        self.assertEqual(self.client.get('/store/products/search/').status_code, 400)
+        self.assertEqual(self.client.get('/store/products/search/', {'q': 'a', 'store': 'x'}).status_code, 400)
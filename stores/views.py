@@ -71,7 +71,7 @@ class ProdutoListView(ListAPIView):
         # Get the user object from the user_id
         user = get_object_or_404(User, id=user_id)
 
-        return Product.objects.filter(store=user.store).order_by("-id")
+        return ProductSerializer.eager(Product.objects.filter(store=user.store)).order_by("-id")
 
 
 def store_get_products(request):
@@ -83,7 +83,7 @@ def store_get_products(request):
     store = access.store
 
     products = ProductSerializer(
-        Product.objects.filter(store_id=store.id),
+        ProductSerializer.eager(Product.objects.filter(store_id=store.id)),
         many=True,
         context={"request": request},
     ).data
@@ -337,26 +337,100 @@ def update_product(request, pk):
 
 
 # views.py
+import asyncio
+
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
 from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
-import json
-import time
-
+from contas.auth_helpers import AccessTokenError
+from order import streams
 
-def sse(request):
-    user_id = request.GET.get("user_id")
-    user = get_object_or_404(User, id=user_id)
+import json
 
-    def event_stream():
-        while True:
-            orders = Order.objects.filter(store=user.store).order_by("-id")
-            serializer = OrderSerializer(orders, many=True)
-            data = JSONRenderer().render(serializer.data)
-            yield f"data: {data.decode('utf-8')}\n\n"
-            time.sleep(5)  # Adjust the interval as needed
 
-    return StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+def _stream_store_id(request):
+    """Store id for ``?access_token=`` (or legacy ``?user_id=``), else None."""
+    token = request.GET.get("access_token")
+    try:
+        if token:
+            user = user_from_access_token(token)
+        else:
+            user = User.objects.get(id=request.GET.get("user_id"))
+    except (AccessTokenError, User.DoesNotExist, ValueError):
+        return None
+    return Store.objects.filter(user=user).values_list("id", flat=True).first()
+
+
+def _sse_frame(data, event=None, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def sse(request):
+    """Live order feed for a store dashboard (Server-Sent Events, ASGI only).
+
+    Starts with one unnamed ``data:`` snapshot of the store's orders, then
+    sends ``event: order`` deltas as orders are created or change status.
+    Each delta carries an ``id:`` cursor; reconnecting with ``Last-Event-ID``
+    (or ``?cursor=``) replays only what was missed.
+    """
+    store_id = await sync_to_async(_stream_store_id)(request)
+    if store_id is None:
+        return JsonResponse({"error": "store not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    cursor = request.headers.get("Last-Event-ID") or request.GET.get("cursor")
+    try:
+        cursor = int(cursor) if cursor else None
+    except ValueError:
+        cursor = None
+
+    layer = get_channel_layer()
+    group = streams.store_orders_group(store_id)
+    keepalive = getattr(settings, "ORDER_STREAM_KEEPALIVE_SECONDS", 15)
+
+    async def event_stream():
+        channel = await layer.new_channel()
+        # Subscribe before reading the backlog so nothing falls in between
+        await layer.group_add(group, channel)
+        try:
+            replay = None
+            if cursor is not None:
+                replay = await sync_to_async(streams.events_since)(store_id, cursor)
+            if replay is None:
+                last_id, orders = await sync_to_async(streams.snapshot)(store_id)
+                yield _sse_frame(orders, event_id=last_id)
+                replay = []
+            else:
+                last_id = cursor
+            for message in replay:
+                last_id = message["id"]
+                yield _sse_frame(message, event="order", event_id=last_id)
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(layer.receive(channel), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if message["id"] <= last_id:
+                    continue
+                last_id = message["id"]
+                yield _sse_frame(message, event="order", event_id=last_id)
+        finally:
+            await layer.group_discard(group, channel)
+
+    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
 
 
 class OrderListView(ListAPIView):
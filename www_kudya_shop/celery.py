@@ -0,0 +1,16 @@
+"""Celery application for background jobs (order side effects, ...).
+
+Workers: ``celery -A www_kudya_shop worker -l info``; scheduled jobs
+(``CELERY_BEAT_SCHEDULE``, e.g. exchange rates): ``celery -A www_kudya_shop beat``.
+Without a broker (``CELERY_BROKER_URL`` / ``REDIS_URL`` unset) tasks run
+eagerly in-process.
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'www_kudya_shop.settings')
+
+app = Celery('www_kudya_shop')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
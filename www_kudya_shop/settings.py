@@ -170,6 +170,34 @@ else:
         'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
     }
 
+# Cache — shared Redis in production. Catalog, search, availability, exchange-rate,
+# translation and home-screen caches are versioned through it (stores.catalog);
+# the per-process LocMem fallback only suits a single local process.
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        },
+    }
+
+# Celery — Redis broker in production; without one, tasks run eagerly in-process
+CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', REDIS_URL)
+CELERY_TASK_ALWAYS_EAGER = os.getenv(
+    'CELERY_TASK_ALWAYS_EAGER', 'False' if CELERY_BROKER_URL else 'True'
+) == 'True'
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TIMEZONE = 'Africa/Luanda'
+# Scheduled jobs run by ``celery -A www_kudya_shop beat``
+CURRENCY_REFRESH_INTERVAL = int(os.getenv('CURRENCY_REFRESH_INTERVAL', 6 * 60 * 60))
+CELERY_BEAT_SCHEDULE = {
+    'refresh-exchange-rates': {
+        'task': 'currency.tasks.refresh_exchange_rates',
+        'schedule': CURRENCY_REFRESH_INTERVAL,
+    },
+}
+
 
 
 DATABASES = {